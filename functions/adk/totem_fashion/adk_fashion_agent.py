@@ -1,37 +1,59 @@
 # adk/totem_fashion/adk_fashion_agent.py
 from __future__ import annotations
 import os
-from typing import Dict, Any, List
+from typing import TYPE_CHECKING, Dict, Any, List
 
-# Importa o ADK
-from google.adk.agents import LlmAgent
-from google.adk.tools import FunctionTool
+# O ADK e o SDK do Gemini são pesados: só são importados quando o agente é
+# criado, para não pesarem no arranque das instâncias.
+if TYPE_CHECKING:
+    from google.adk.agents import LlmAgent
 
-# Configura o Gemini localmente (apenas se GEMINI_API_KEY estiver no .env ou secret)
-try:
-    import google.generativeai as genai
-    api_key = os.environ.get("GEMINI_API_KEY")
-    if api_key:
-        genai.configure(api_key=api_key)
-except Exception:
-    pass
+from .sdk import get_genai
 
 MODEL_NAME = os.environ.get("MODEL_NAME", "gemini-2.5-pro")
 
 # Importa funções que vão ser expostas como ferramentas
-from .agent.agent import FashionStylistAgent
-from .tools.catalog_search import catalog_search
+from .services import get_services
+from .tools.catalog_search import catalog_search as _catalog_search
+from .metrics import timed
+from .tools.memo import thaw
 
+# As ferramentas usam o agente partilhado com a API, para que as sessões
+# sobrevivam entre chamadas. Os resultados em cache são só de leitura, por
+# isso são copiados (thaw) antes de seguirem para o modelo.
+@timed("adk:CatalogSearch")
+def catalog_search(
+    query: str | None = None,
+    category: str | None = None,
+    color: str | None = None,
+    gender: str | None = None,
+    price_max: float | None = None,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    return thaw(_catalog_search(query, category, color, gender, price_max, limit))
+
+@timed("adk:LikeProduct")
 def like_product(session_id: str, product: Dict[str, Any]) -> Dict[str, Any]:
-    return FashionStylistAgent().swipe_like(session_id, product)
+    return thaw(get_services().agent.swipe_like(session_id, product))
 
+@timed("adk:DislikeProduct")
 def dislike_product(session_id: str, product: Dict[str, Any]) -> Dict[str, Any]:
-    return FashionStylistAgent().swipe_dislike(session_id, product)
+    return thaw(get_services().agent.swipe_dislike(session_id, product))
+
+@timed("adk:OutfitComposer")
+def compose_outfit(session_id: str, seed_id: str, budget: float | None = None, k: int = 1) -> Dict[str, Any]:
+    return thaw(get_services().agent.create_outfit_from_seed(session_id, seed_id, budget, k))
+
+@timed("adk:SimilarItems")
+def similar_items(item_id: str, k: int = 10) -> List[Dict[str, Any]]:
+    return thaw(get_services().agent.similar(item_id, k))
 
-def compose_outfit(session_id: str, seed_id: str, budget: float | None = None) -> Dict[str, Any]:
-    return FashionStylistAgent().create_outfit_from_seed(session_id, seed_id, budget)
+def create_stylist_agent(model_name: str | None = None) -> "LlmAgent":
+    from google.adk.agents import LlmAgent
+    from google.adk.tools import FunctionTool
 
-def create_stylist_agent(model_name: str | None = None) -> LlmAgent:
+    # Configura o Gemini (apenas se GEMINI_API_KEY estiver no .env ou secret)
+    get_genai()
     model = model_name or MODEL_NAME
     tools: List[FunctionTool] = [
         FunctionTool.from_fn(
@@ -49,6 +71,11 @@ def create_stylist_agent(model_name: str | None = None) -> LlmAgent:
             name="DislikeProduct",
             description="Regista um dislike e actualiza as preferências",
         ),
+        FunctionTool.from_fn(
+            similar_items,
+            name="SimilarItems",
+            description="Devolve os produtos mais parecidos com uma peça (\"mais como este\")",
+        ),
         FunctionTool.from_fn(
             compose_outfit,
             name="OutfitComposer",
@@ -11,51 +11,142 @@ and compose outfits.
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
 
 from .session import SessionManager
+from ..tools.catalog import CatalogVersion, current_catalog
 from ..tools.catalog_search import catalog_search
+from ..tools.deck import PAGE_SIZE, DeckPage, DeckService
 from ..tools.preference_store import PreferenceStoreTool
-from ..tools.outfit_composer import compose_outfit_from_seed
+from ..tools.lookbook import lookbook_outfit
+from ..tools.outfit_composer import outfit_for_seed
 from ..tools.history_recall import infer_traits_from_history
+from ..tools.recommender import recommend_for_session
+from ..tools.similarity import similar_items
+from ..tools.singleflight import SingleFlight
+
+# Identical concurrent requests (e.g. mirrors retrying, or waking up together)
+# share one computation; keys carry the catalog version. Decks coalesce their
+# session-independent part in DeckService.
+_OUTFIT = SingleFlight("outfit")
 
 
 class FashionStylistAgent:
     """Central coordinator for styling recommendations."""
 
-    def __init__(self, session_manager: Optional[SessionManager] = None) -> None:
+    def __init__(self, session_manager: Optional[SessionManager] = None, events: Optional[Any] = None) -> None:
         self.sm = session_manager or SessionManager()
+        # Analytics export of composed outfits (an `EventSink`), if any
+        self.events = events
         self.prefs = PreferenceStoreTool(self.sm)
+        self.deck = DeckService(self.sm)
 
     # --- Discovery mode (Tinder-like) ---
-    def discover(self, session_id: str, category: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Return a batch of items for the user to swipe through."""
-        return catalog_search(category=category, limit=30)
+    def discover(
+        self,
+        session_id: str,
+        category: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = PAGE_SIZE,
+    ) -> DeckPage:
+        """Return the next page of the session's shuffled deck and its cursor.
+
+        Items the session already swiped are left out. Pass the returned
+        `next_cursor` back to continue; it is None once the deck runs out.
+        """
+        return self.deck.page(session_id, category, cursor, limit)
 
     def swipe_like(self, session_id: str, product: Dict[str, Any]) -> Dict[str, Any]:
         """Handle a 'like' event and return fresh suggestions."""
         self.prefs.like(session_id, product)
+        self.deck.prefetch(session_id)
         return self._recommend_from_profile(session_id)
 
     def swipe_dislike(self, session_id: str, product: Dict[str, Any]) -> Dict[str, Any]:
         """Handle a 'dislike' event and return fresh suggestions."""
         self.prefs.dislike(session_id, product)
+        self.deck.prefetch(session_id)
         return self._recommend_from_profile(session_id)
 
+    def swipe_batch(self, session_id: str, events: Sequence[Mapping[str, Any]]) -> Dict[str, Any]:
+        """Apply an ordered list of swipes at once and return fresh suggestions.
+
+        Meant for kiosks that queue swipes while offline: the session is
+        written back once and recommendations are computed once, after the
+        last event.
+
+        Args:
+            session_id: Session the swipes belong to.
+            events: Dicts with `type` ("like"/"dislike"), either `product`
+                (payload) or `product_id` (looked up in the catalog), and an
+                optional `ts` (epoch seconds of the original swipe).
+
+        Returns:
+            The recommendations, plus `applied` and the ids in `skipped`
+            (unknown products).
+        """
+        catalog = current_catalog()
+        swipes = []
+        skipped: List[Any] = []
+        for event in events:
+            product = event.get("product")
+            if product is None:
+                product = catalog.index.get(event.get("product_id"))
+                if product is None:
+                    skipped.append(event.get("product_id"))
+                    continue
+            swipes.append((event["type"], product, event.get("ts")))
+        result = self.prefs.record_batch(session_id, swipes)
+        self.deck.prefetch(session_id)
+        return {
+            **self._recommend_from_profile(session_id),
+            "applied": result["applied"],
+            "skipped": skipped,
+        }
+
+    # --- More like this ---
+    def similar(self, item_id: str, k: int = 10) -> List[Dict[str, Any]]:
+        """Return the k products most similar to `item_id`, best first."""
+        return similar_items(current_catalog(), item_id, k)
+
     # --- Outfit mode ---
-    def create_outfit_from_seed(self, session_id: str, seed_id: str, budget: Optional[float] = None) -> Dict[str, Any]:
-        """Compose an outfit starting from a seed item id."""
-        seed = self._get_product_by_id(seed_id)
-        return compose_outfit_from_seed(seed, budget)
+    def create_outfit_from_seed(
+        self, session_id: str, seed_id: str, budget: Optional[float] = None, k: int = 1
+    ) -> Mapping[str, Any]:
+        """Compose the k best outfits starting from a seed item id."""
+        catalog = current_catalog()
+        key = (catalog.version, seed_id, None if budget is None else float(budget), k)
+        outfit, source = _OUTFIT.do(key, lambda: self._compose_outfit(catalog, seed_id, budget, k))
+        if self.events is not None:
+            self.events.outfit(session_id, seed_id, outfit, source, budget, k)
+        return outfit
 
     # --- Internal helpers ---
+    def _compose_outfit(
+        self, catalog: CatalogVersion, seed_id: str, budget: Optional[float], k: int
+    ) -> Tuple[Mapping[str, Any], str]:
+        """The outfit for a seed and where it came from ("lookbook" or "live")."""
+        # Precomputed lookbook first (O(1)); compose live on a miss
+        outfit = lookbook_outfit(catalog, seed_id, budget, k)
+        if outfit is not None:
+            return outfit, "lookbook"
+        seed = self._get_product_by_id(seed_id, catalog)
+        return outfit_for_seed(seed, budget, catalog, k), "live"
+
     def _recommend_from_profile(self, session_id: str) -> Dict[str, Any]:
         """Generate recommendations based on the session's inferred traits."""
         session = self.sm.get_session(session_id)
         traits = infer_traits_from_history(session)
         color = traits.get("preferred_color")
-        # If a preferred color exists, filter by that; otherwise, general list
-        suggestions = catalog_search(color=color, limit=12) if color else catalog_search(limit=12)
+        aggregates = session["aggregates"]
+        # Once the user has swiped, rank the whole catalog against their
+        # likes/dislikes; otherwise, what is popular across sessions
+        if aggregates["likes"]["total"] or aggregates["dislikes"]["total"]:
+            suggestions = recommend_for_session(session, current_catalog(), k=12)
+        elif self.sm.popularity is not None:
+            suggestions = self.sm.popularity.top(current_catalog(), 12)
+        else:
+            suggestions = catalog_search(limit=12)
         hint = (
             f"Baseado na tua preferência por {color}"
             if color
@@ -66,10 +157,11 @@ class FashionStylistAgent:
             "hint": hint,
         }
 
-    def _get_product_by_id(self, product_id: str) -> Dict[str, Any]:
-        """Look up a single product by id in the data set."""
-        from ..tools.data_loader import ITEMS
-        for item in ITEMS:
-            if item.get("id") == product_id:
-                return item
+    def _get_product_by_id(
+        self, product_id: str, catalog: Optional[CatalogVersion] = None
+    ) -> Dict[str, Any]:
+        """Look up a single product by id in the given (or current) catalog version."""
+        item = (catalog or current_catalog()).index.get(product_id)
+        if item is not None:
+            return item
         raise ValueError(f"Produto com id '{product_id}' não encontrado")
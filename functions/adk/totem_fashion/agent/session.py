@@ -2,22 +2,52 @@
 Session management for the Totem Fashion Finder agent.
 
 This module defines a simple in-memory session store and a session manager
-that records user likes, dislikes, traits and history.
+that records user likes, dislikes, traits and history, and keeps running
+aggregates of the liked/disliked attributes up to date on every swipe.
 You can swap the underlying store with a different backend (e.g. Firestore)
 by implementing the BaseSessionStore interface.
+
+Concurrency: API endpoints run on a thread pool, so one kiosk can have two
+swipes in flight at once. `SessionManager` serializes the writes of a session
+with one of SESSION_LOCK_STRIPES striped locks (sessions hashing to different
+stripes never wait for each other) and never mutates a session it handed out:
+each write copies the session, applies all its changes to the copy and
+publishes it with one `put`. Readers therefore get immutable snapshots they
+can use without any locking, and never see half of an update. The copy
+shares history, likes and dislikes (append-only `AppendLog`s) with the
+original, so a swipe costs the same on a long session as on a short one.
+Popularity,
+analytics and the store's event log hear about a swipe only once its session
+has been stored.
 """
 
 from __future__ import annotations
 
+import os
+import threading
 import time
+from collections import OrderedDict, deque
+from collections.abc import Sequence
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from ..metrics import STORE_LATENCY, timer
+from ..tools.history_recall import empty_aggregates, ensure_aggregates, record_event
+
+T = TypeVar("T")
+
+LOCK_STRIPES = int(os.environ.get("SESSION_LOCK_STRIPES", "64"))
+# InMemoryStore reads refresh LRU order under the lock at most this often
+# per session; in between they are lock-free.
+_TOUCH_INTERVAL = 1.0
 
 
 class BaseSessionStore:
     """Abstract interface for a session store.
 
     Subclasses should implement get, put and update to persist session data.
+    SessionManager never mutates the dict returned by get: it puts a modified
+    copy, which replaces the stored session as a whole.
     """
 
     def get(self, session_id: str) -> Dict[str, Any]:  # pragma: no cover
@@ -29,42 +59,384 @@ class BaseSessionStore:
     def update(self, session_id: str, patch: Dict[str, Any]) -> None:  # pragma: no cover
         raise NotImplementedError
 
+    def append_event(self, session_id: str, event: "SwipeEvent") -> None:
+        """Record a history event in a separate log, for stores that keep one.
+
+        The event is also part of the session's `history`; stores that persist
+        the session as a whole can ignore this hook. It is called after the
+        session is stored, outside its lock: concurrent swipes of a session
+        may arrive in either order.
+        """
+
+
+@dataclass(frozen=True, slots=True)
+class SwipeEvent:
+    """A single interaction in the session history.
+
+    Stored instead of a per-event dict to keep long histories compact; it
+    still supports `event["type"]` and `event.get("item_id")` lookups.
+    """
+
+    type: str
+    item_id: Any
+    ts: float
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.type, "item_id": self.item_id, "ts": self.ts}
+
+
+class AppendLog(Sequence):
+    """Append-only list whose copies share their storage.
+
+    Copying is O(1): a copy remembers the window `[start, stop)` of the
+    backing list it shares with the original, and appends to whichever copy
+    owns the end of that list. A copy appending behind another one's back
+    (e.g. a draft that was discarded and then redone) takes its own backing
+    list first. With `maxlen` the log is a ring buffer keeping the most
+    recent entries; the backing list is compacted once the dropped entries
+    outnumber the live ones, so appends stay O(1) amortized.
+
+    `total` counts every entry ever appended (dropped ones included), and
+    `since(total)` returns the entries appended after that mark.
+    """
+
+    __slots__ = ("_items", "_base", "_start", "_stop", "maxlen")
+
+    def __init__(self, entries: Iterable[Any] = (), maxlen: Optional[int] = None) -> None:
+        self.maxlen = maxlen
+        self._items: List[Any] = list(entries)
+        self._base = 0  # entries dropped from the front of _items by compaction
+        self._stop = len(self._items)
+        self._start = max(0, self._stop - maxlen) if maxlen else 0
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, index: Any) -> Any:
+        positions = range(self._start, self._stop)[index]
+        if isinstance(positions, range):
+            return [self._items[i] for i in positions]
+        return self._items[positions]
+
+    def __iter__(self) -> Iterator[Any]:
+        items = self._items
+        for i in range(self._start, self._stop):
+            yield items[i]
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (AppendLog, list, tuple, deque)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"AppendLog({list(self)!r}, maxlen={self.maxlen})"
+
+    @property
+    def total(self) -> int:
+        return self._base + self._stop
+
+    def since(self, mark: int) -> List[Any]:
+        """Entries appended after `total` was `mark` that are still kept."""
+        return self._items[max(mark - self._base, self._start) : self._stop]
+
+    def copy(self) -> "AppendLog":
+        clone = AppendLog.__new__(AppendLog)
+        clone.maxlen = self.maxlen
+        clone._items, clone._base, clone._start, clone._stop = self._items, self._base, self._start, self._stop
+        return clone
+
+    def append(self, entry: Any) -> None:
+        if self._stop != len(self._items):
+            # Another copy appended past our window: stop sharing with it
+            self._base += self._start
+            self._items = self._items[self._start : self._stop]
+            self._start, self._stop = 0, len(self._items)
+        self._items.append(entry)
+        self._stop += 1
+        if self.maxlen and self._stop - self._start > self.maxlen:
+            self._start += 1
+            if self._start > self.maxlen:
+                self._base += self._start
+                self._items = self._items[self._start :]
+                self._start, self._stop = 0, len(self._items)
+
+    def extend(self, entries: Iterable[Any]) -> None:
+        for entry in entries:
+            self.append(entry)
+
+
+def new_session(max_events: Optional[int] = None) -> Dict[str, Any]:
+    """Return the data structure of a brand-new session.
+
+    History, likes and dislikes are `AppendLog`s; with `max_events` they are
+    ring buffers that keep only the most recent entries. The aggregates keep
+    counting everything.
+    """
+    return {
+        "created_at": time.time(),
+        "preferences": {"likes": AppendLog(maxlen=max_events), "dislikes": AppendLog(maxlen=max_events)},
+        "traits": {},
+        "history": AppendLog(maxlen=max_events),
+        "aggregates": empty_aggregates(),
+    }
+
+
+def _copy_events(events: Any) -> Any:
+    if isinstance(events, AppendLog):
+        return events.copy()
+    if isinstance(events, deque):
+        return AppendLog(events, maxlen=events.maxlen)
+    return AppendLog(events)
+
+
+def copy_session(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a session that can be modified without touching the original.
+
+    History, likes and dislikes become `AppendLog`s sharing their entries
+    with the original, so copying them is O(1); the traits and aggregate
+    tallies, whose size does not grow with the session, are copied. The
+    products, events and values they hold are shared, as writers only ever
+    replace or append them.
+    """
+    draft = dict(session)
+    prefs = session.get("preferences")
+    if prefs is not None:
+        draft["preferences"] = {key: _copy_events(value) for key, value in prefs.items()}
+    if "history" in session:
+        draft["history"] = _copy_events(session["history"])
+    if "traits" in session:
+        draft["traits"] = dict(session["traits"])
+    aggregates = session.get("aggregates")
+    if aggregates is not None:
+        draft["aggregates"] = {
+            kind: {
+                dim: {"counts": dict(t["counts"]), "first": dict(t["first"]), "top": t["top"]}
+                if isinstance(t, dict)
+                else t
+                for dim, t in side.items()
+            }
+            for kind, side in aggregates.items()
+        }
+    return draft
+
+
+# Rough per-object sizes used for the byte budget of InMemoryStore. They are
+# deliberately coarse: the budget is a ceiling, not an accounting system.
+_SESSION_BASE_BYTES = 4096
+_EVENT_BYTES = 80
+_PRODUCT_BYTES = 480
+_AGGREGATE_KEY_BYTES = 160
+
+
+def _estimate_bytes(session: Dict[str, Any]) -> int:
+    """Approximate memory footprint of a session, in O(number of counters)."""
+    prefs = session.get("preferences", {})
+    products = len(prefs.get("likes", ())) + len(prefs.get("dislikes", ()))
+    counters = 0
+    for side in (session.get("aggregates") or {}).values():
+        counters += sum(len(t["counts"]) for t in side.values() if isinstance(t, dict))
+    return (
+        _SESSION_BASE_BYTES
+        + len(session.get("history", ())) * _EVENT_BYTES
+        + products * _PRODUCT_BYTES
+        + counters * _AGGREGATE_KEY_BYTES
+    )
+
+
+class _Entry:
+    __slots__ = ("session", "last_access", "size")
+
+    def __init__(self, session: Dict[str, Any], now: float) -> None:
+        self.session = session
+        self.last_access = now
+        self.size = _estimate_bytes(session)
+
+
+# Limits applied by InMemoryStore.from_env when the variables are unset.
+_DEFAULT_LIMITS = {
+    "SESSION_MAX_SESSIONS": 10_000,
+    "SESSION_TTL_SECONDS": 6 * 3600,
+    "SESSION_MAX_BYTES": 256 * 1024 * 1024,
+    "SESSION_MAX_EVENTS": 500,
+}
+
+
+def _env_limit(name: str, cast: Any) -> Any:
+    """Read a limit from the environment; "0" disables it."""
+    value = cast(os.environ.get(name, _DEFAULT_LIMITS[name]))
+    return value or None
+
 
 class InMemoryStore(BaseSessionStore):
-    """A simple in-memory session storage for demo and testing purposes."""
+    """An in-memory session storage, optionally bounded.
 
-    def __init__(self) -> None:
-        # Dictionary keyed by session_id storing session data dicts
-        self._mem: Dict[str, Dict[str, Any]] = {}
+    Without limits it behaves as a plain dict, which is fine for demos and
+    tests. On long-lived instances, bound it with any combination of:
 
-    def get(self, session_id: str) -> Dict[str, Any]:
-        """Return the session dict for a given session_id, creating it if absent."""
-        return self._mem.setdefault(
-            session_id,
-            {
-                "created_at": time.time(),
-                "preferences": {"likes": [], "dislikes": []},
-                "traits": {},
-                "history": [],
-            },
+    Args:
+        max_sessions: Maximum number of sessions kept; least recently used
+            sessions are evicted first.
+        ttl: Idle time in seconds after which a session is dropped.
+        max_bytes: Approximate memory budget for all sessions together.
+        max_events: Size of the history/likes/dislikes ring buffers of new
+            sessions.
+    """
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        max_events: Optional[int] = None,
+    ) -> None:
+        # Sessions keyed by session_id, ordered from least to most recently used
+        self._mem: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_events = max_events
+        self._bytes = 0
+        self._evictions = {"lru": 0, "ttl": 0, "bytes": 0}
+
+    @classmethod
+    def from_env(cls) -> "InMemoryStore":
+        """Build a bounded store configured by the environment.
+
+        Reads SESSION_MAX_SESSIONS, SESSION_TTL_SECONDS, SESSION_MAX_BYTES and
+        SESSION_MAX_EVENTS, falling back to conservative defaults. Set a
+        variable to 0 to lift that limit.
+        """
+        return cls(
+            max_sessions=_env_limit("SESSION_MAX_SESSIONS", int),
+            ttl=_env_limit("SESSION_TTL_SECONDS", float),
+            max_bytes=_env_limit("SESSION_MAX_BYTES", int),
+            max_events=_env_limit("SESSION_MAX_EVENTS", int),
         )
 
+    def get(self, session_id: str) -> Dict[str, Any]:
+        """Return the session dict for a given session_id, creating it if absent.
+
+        Reads of a live session recently touched take no lock.
+        """
+        now = time.time()
+        entry = self._mem.get(session_id)
+        if (
+            entry is not None
+            and now - entry.last_access < _TOUCH_INTERVAL
+            and (self.ttl is None or now - entry.last_access <= self.ttl)
+        ):
+            return entry.session
+        with self._lock:
+            entry = self._mem.get(session_id)
+            if entry is not None and self.ttl is not None and now - entry.last_access > self.ttl:
+                self._evict(session_id, "ttl")
+                entry = None
+            if entry is None:
+                entry = _Entry(new_session(self.max_events), now)
+                self._mem[session_id] = entry
+                self._bytes += entry.size
+            else:
+                self._touch(session_id, entry, now)
+            self._enforce_limits(now)
+            return entry.session
+
     def put(self, session_id: str, data: Dict[str, Any]) -> None:
         """Overwrite the session data for a given id."""
-        self._mem[session_id] = data
+        now = time.time()
+        with self._lock:
+            old = self._mem.get(session_id)
+            if old is not None and old.session is data:
+                # Write-back of a session mutated in place: refresh its size.
+                self._touch(session_id, old, now)
+                self._enforce_limits(now)
+                return
+            if old is not None:
+                del self._mem[session_id]
+                self._bytes -= old.size
+            entry = _Entry(data, now)
+            self._mem[session_id] = entry
+            self._bytes += entry.size
+            self._enforce_limits(now)
 
     def update(self, session_id: str, patch: Dict[str, Any]) -> None:
         """Update nested keys in the session data.
 
-        Performs a shallow merge of dicts for nested structures.
+        Performs a shallow merge of dicts for nested structures, on a copy
+        that then replaces the stored session.
         """
-        base = self.get(session_id)
+        base = dict(self.get(session_id))
         for key, value in patch.items():
             if isinstance(value, dict) and isinstance(base.get(key), dict):
                 # update nested dicts
-                base[key].update(value)
+                base[key] = {**base[key], **value}
             else:
                 base[key] = value
+        self.put(session_id, base)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current size and eviction counters of the store."""
+        with self._lock:
+            return {
+                "sessions": len(self._mem),
+                "approx_bytes": self._bytes,
+                "evictions": dict(self._evictions),
+                "limits": {
+                    "max_sessions": self.max_sessions,
+                    "ttl": self.ttl,
+                    "max_bytes": self.max_bytes,
+                    "max_events": self.max_events,
+                },
+            }
+
+    # --- Internal helpers (called with the lock held) ---
+    def _touch(self, session_id: str, entry: _Entry, now: float) -> None:
+        entry.last_access = now
+        size = _estimate_bytes(entry.session)
+        self._bytes += size - entry.size
+        entry.size = size
+        self._mem.move_to_end(session_id)
+
+    def _evict(self, session_id: str, reason: str) -> None:
+        entry = self._mem.pop(session_id)
+        self._bytes -= entry.size
+        self._evictions[reason] += 1
+
+    def _enforce_limits(self, now: float) -> None:
+        if self.ttl is not None:
+            # The least recently used sessions sit at the front.
+            while self._mem:
+                oldest_id, oldest = next(iter(self._mem.items()))
+                if now - oldest.last_access <= self.ttl:
+                    break
+                self._evict(oldest_id, "ttl")
+        # Never evict the most recent session, which the caller is about to use.
+        while self.max_sessions is not None and len(self._mem) > self.max_sessions:
+            self._evict(next(iter(self._mem)), "lru")
+        while self.max_bytes is not None and self._bytes > self.max_bytes and len(self._mem) > 1:
+            self._evict(next(iter(self._mem)), "bytes")
+
+
+def default_session_store() -> BaseSessionStore:
+    """Return the store configured by the environment.
+
+    Uses SQLite at SESSION_DB_PATH when set, otherwise a bounded InMemoryStore.
+    """
+    db_path = os.environ.get("SESSION_DB_PATH")
+    if db_path:
+        from .sqlite_store import SQLiteSessionStore
+
+        return SQLiteSessionStore(db_path, max_events=_env_limit("SESSION_MAX_EVENTS", int))
+    return InMemoryStore.from_env()
 
 
 def _slim(product: Dict[str, Any]) -> Dict[str, Any]:
@@ -76,6 +448,8 @@ def _slim(product: Dict[str, Any]) -> Dict[str, Any]:
         "id": product.get("id"),
         "name": product.get("name"),
         "category": product.get("category"),
+        "brand": product.get("brand"),
+        "gender": product.get("gender"),
         "color": product.get("color"),
         "price": product.get("price"),
     }
@@ -84,30 +458,126 @@ def _slim(product: Dict[str, Any]) -> Dict[str, Any]:
 class SessionManager:
     """High-level session manager that persists user interactions and preferences."""
 
-    def __init__(self, store: Optional[BaseSessionStore] = None) -> None:
-        self.store = store or InMemoryStore()
+    def __init__(
+        self,
+        store: Optional[BaseSessionStore] = None,
+        popularity: Optional[Any] = None,
+        events: Optional[Any] = None,
+        stripes: int = LOCK_STRIPES,
+    ) -> None:
+        self.store = store or default_session_store()
+        # Cross-session aggregator (a `PopularityAggregator`) fed every swipe
+        self.popularity = popularity
+        # Analytics export (an `EventSink`); emitting never blocks on disk
+        self.events = events
+        self._locks = [threading.Lock() for _ in range(max(1, stripes))]
 
     def get_session(self, session_id: str) -> Dict[str, Any]:
-        """Return session data for the given id."""
-        return self.store.get(session_id)
+        """Return the current snapshot of a session.
+
+        The snapshot is never modified afterwards, so it can be read without
+        locking; treat it as read-only.
+        """
+        return self._get(session_id)
+
+    def update(self, session_id: str, mutate: Callable[[Dict[str, Any]], T]) -> T:
+        """Apply several changes to a session atomically.
+
+        `mutate` receives a private copy of the session, e.g. to record a like
+        together with the traits it implies; the copy replaces the session
+        once `mutate` returns. Updates of the same session run one at a time,
+        and readers see either none or all of the changes. If `mutate` raises,
+        nothing is stored, so `mutate` must not have side effects of its own.
+
+        Returns:
+            What `mutate` returned.
+        """
+        with self._locks[hash(session_id) % len(self._locks)]:
+            draft = copy_session(self._get(session_id))
+            result = mutate(draft)
+            self._put(session_id, draft)
+        return result
 
     def add_like(self, session_id: str, product: Dict[str, Any]) -> None:
-        """Record a liked product and append it to the session history."""
-        session = self.store.get(session_id)
-        session["preferences"]["likes"].append(_slim(product))
-        session["history"].append(
-            {"type": "like", "item_id": product.get("id"), "ts": time.time()}
-        )
+        """Record a liked product, update the aggregates and append it to the history."""
+        self._record(session_id, [("like", product, None)])
 
     def add_dislike(self, session_id: str, product: Dict[str, Any]) -> None:
-        """Record a disliked product and append it to the session history."""
-        session = self.store.get(session_id)
-        session["preferences"]["dislikes"].append(_slim(product))
-        session["history"].append(
-            {"type": "dislike", "item_id": product.get("id"), "ts": time.time()}
-        )
+        """Record a disliked product, update the aggregates and append it to the history."""
+        self._record(session_id, [("dislike", product, None)])
+
+    def record_batch(
+        self, session_id: str, swipes: Iterable[Tuple[str, Dict[str, Any], Optional[float]]]
+    ) -> int:
+        """Apply several swipes in order with a single write back to the store.
+
+        Args:
+            session_id: Session the swipes belong to.
+            swipes: `(kind, product, ts)` tuples, kind "like" or "dislike";
+                `ts` is when the swipe happened (None means now), so queued
+                swipes keep their original time.
+
+        Returns:
+            The number of swipes applied.
+        """
+        swipes = list(swipes)
+        if not swipes:
+            return 0
+        return self._record(session_id, swipes)
+
+    def _record(self, session_id: str, swipes: List[Tuple[str, Dict[str, Any], Optional[float]]]) -> int:
+        """Apply swipes to the session, then let the rest of the system know.
+
+        Popularity, analytics and the store's event log only hear about the
+        swipes once the session is stored: a swipe that fails halfway through
+        a batch leaves no trace anywhere. They are told after the session's
+        lock is released, so a slow sink never holds up the other sessions of
+        the stripe; concurrent swipes of one session may reach them in either
+        order (each event carries its `ts`).
+        """
+
+        def apply_all(session: Dict[str, Any]) -> List[Tuple[SwipeEvent, Dict[str, Any]]]:
+            return [self._apply(session, kind, product, ts) for kind, product, ts in swipes]
+
+        applied = self.update(session_id, apply_all)
+        self._publish(session_id, applied)
+        return len(applied)
+
+    def _apply(
+        self,
+        session: Dict[str, Any],
+        kind: str,
+        product: Dict[str, Any],
+        ts: Optional[float] = None,
+    ) -> Tuple[SwipeEvent, Dict[str, Any]]:
+        """Fold one swipe into the session dict; returns its event and slim product."""
+        aggregates = ensure_aggregates(session)
+        slim = _slim(product)
+        session["preferences"]["likes" if kind == "like" else "dislikes"].append(slim)
+        record_event(aggregates, kind, slim)
+        event = SwipeEvent(kind, product.get("id"), time.time() if ts is None else ts)
+        session["history"].append(event)
+        return event, slim
+
+    def _publish(self, session_id: str, applied: List[Tuple[SwipeEvent, Dict[str, Any]]]) -> None:
+        """Hand stored swipes to popularity, analytics and the store's event log."""
+        for event, slim in applied:
+            if self.popularity is not None:
+                self.popularity.record(event.type, slim, event.ts)
+            if self.events is not None:
+                self.events.swipe(event.type, session_id, event.item_id, event.ts)
+            with timer(STORE_LATENCY, "append_event"):
+                self.store.append_event(session_id, event)
 
     def set_trait(self, session_id: str, key: str, value: Any) -> None:
         """Set a single trait (e.g. preferred_color) in the session."""
-        session = self.store.get(session_id)
-        session["traits"][key] = value
+        self.update(session_id, lambda session: session["traits"].__setitem__(key, value))
+
+    # Store access, timed per operation
+    def _get(self, session_id: str) -> Dict[str, Any]:
+        with timer(STORE_LATENCY, "get"):
+            return self.store.get(session_id)
+
+    def _put(self, session_id: str, session: Dict[str, Any]) -> None:
+        with timer(STORE_LATENCY, "put"):
+            self.store.put(session_id, session)
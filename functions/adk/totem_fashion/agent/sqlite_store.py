@@ -0,0 +1,319 @@
+"""
+SQLite-backed session store.
+
+A persistent `BaseSessionStore` that serves as a local stand-in for Firestore:
+sessions survive instance restarts. The database runs in WAL mode so readers
+never block the writer. Use one process per database file: the read cache is
+never invalidated by another process's writes, so a second process would read
+stale sessions and could overwrite newer ones.
+
+Writes are not committed one by one. `put` only queues the change; a
+background thread commits everything queued during the last
+`commit_interval` seconds in a single transaction (group commit). Reads go
+through an in-process LRU cache, so the hot path of a swipe never touches the
+disk.
+
+A swipe must not cost more on a long session than on a short one, so the
+session row holds only the parts whose size does not grow with it (traits,
+aggregates, ...). History, likes and dislikes are append-only: `put` queues
+just the entries appended since the version it was derived from, as rows of
+an `events` table (each with its slim product), and the most recent ones are
+loaded back when a session is read from disk. The session dict remembers
+which entries are already persisted under PERSISTED_KEY.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from .session import AppendLog, BaseSessionStore, SwipeEvent, new_session
+
+# Session key holding the totals of (history, likes, dislikes) already queued
+# for the events table; copies of the session carry it along.
+PERSISTED_KEY = "_persisted"
+# Keys stored as event rows instead of in the session row
+_EVENT_KEYS = ("history", "preferences", PERSISTED_KEY)
+
+_Row = Tuple[str, str, Optional[str], float, Optional[str]]
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        type TEXT NOT NULL,
+        item_id TEXT,
+        ts REAL NOT NULL,
+        product TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS events_by_session ON events (session_id, id)",
+)
+
+
+def _encode(value: Any) -> Any:
+    """JSON fallback for the non-dict containers used inside sessions."""
+    if isinstance(value, (AppendLog, deque)):
+        return list(value)
+    if isinstance(value, SwipeEvent):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class SQLiteSessionStore(BaseSessionStore):
+    """Session store persisted to SQLite, with group commit and a read cache.
+
+    Args:
+        path: Database file (created if missing); ":memory:" works for tests.
+        commit_interval: Seconds between group commits.
+        cache_size: Number of sessions kept in the read-through cache.
+        max_events: History entries loaded back per session (and ring buffer
+            size of the lists of new sessions); None keeps them all.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        commit_interval: float = 0.05,
+        cache_size: int = 1024,
+        max_events: Optional[int] = 500,
+    ) -> None:
+        self.path = path
+        self.commit_interval = commit_interval
+        self.cache_size = cache_size
+        self.max_events = max_events
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(events)")}
+        if "product" not in columns:  # database created before products were logged
+            self._conn.execute("ALTER TABLE events ADD COLUMN product TEXT")
+
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # session_id -> serialized session awaiting the next group commit
+        self._dirty: Dict[str, str] = {}
+        self._events: List[_Row] = []
+        self._lock = threading.Lock()  # guards cache and write queues
+        self._db_lock = threading.Lock()  # serializes use of the connection
+        self._stats = {"cache_hits": 0, "cache_misses": 0, "commits": 0, "rows_written": 0}
+
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._run_flusher, name="session-commit", daemon=True)
+        self._flusher.start()
+
+    # --- BaseSessionStore ---
+    def get(self, session_id: str) -> Dict[str, Any]:
+        """Return the session, from cache if possible, creating it if absent."""
+        with self._lock:
+            session = self._cache.get(session_id)
+            if session is not None:
+                self._cache.move_to_end(session_id)
+                self._stats["cache_hits"] += 1
+                return session
+            self._stats["cache_misses"] += 1
+        session = self._load(session_id)
+        with self._lock:
+            # Another thread may have loaded it meanwhile; keep the first copy.
+            session = self._cache.setdefault(session_id, session)
+            self._cache.move_to_end(session_id)
+            self._trim_cache()
+            return session
+
+    def put(self, session_id: str, data: Dict[str, Any]) -> None:
+        """Store the session and queue its new events for the next group commit.
+
+        Only what was appended to history, likes and dislikes since the
+        version `data` was copied from is queued, so the cost of a put does
+        not grow with the session.
+        """
+        # Serialize now, in the caller's thread: the commit thread must never
+        # iterate a session that a request may be mutating.
+        encoded = json.dumps({k: v for k, v in data.items() if k not in _EVENT_KEYS}, default=_encode)
+        logs = _logs(data)
+        marks = data.get(PERSISTED_KEY) or (0, 0, 0)
+        rows = _event_rows(session_id, *(_appended(log, mark) for log, mark in zip(logs, marks)))
+        data = {**data, PERSISTED_KEY: tuple(_total(log) for log in logs)}
+        with self._lock:
+            self._cache[session_id] = data
+            self._cache.move_to_end(session_id)
+            self._dirty[session_id] = encoded
+            self._events.extend(rows)
+            self._trim_cache()
+
+    def update(self, session_id: str, patch: Dict[str, Any]) -> None:
+        """Shallow-merge `patch` into a copy of the session (nested dicts are merged)."""
+        base = dict(self.get(session_id))
+        for key, value in patch.items():
+            if isinstance(value, dict) and isinstance(base.get(key), dict):
+                base[key] = {**base[key], **value}
+            else:
+                base[key] = value
+        self.put(session_id, base)
+
+    # --- Lifecycle ---
+    def flush(self) -> None:
+        """Commit everything queued so far, in the calling thread."""
+        # Queues are taken under the connection lock: a reader holding it
+        # finds every write either committed or still queued, never in between.
+        with self._db_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, {}
+                events, self._events = self._events, []
+            if not dirty and not events:
+                return
+            now = time.time()
+            rows = [(sid, encoded, now) for sid, encoded in dirty.items()]
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, "
+                    "updated_at = excluded.updated_at",
+                    rows,
+                )
+                self._conn.executemany(
+                    "INSERT INTO events (session_id, type, item_id, ts, product) VALUES (?, ?, ?, ?, ?)",
+                    events,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                with self._lock:
+                    # Requeue so the next commit retries; newer puts win.
+                    for sid, encoded in dirty.items():
+                        self._dirty.setdefault(sid, encoded)
+                    self._events[:0] = events
+                raise
+        with self._lock:
+            self._stats["commits"] += 1
+            self._stats["rows_written"] += len(rows) + len(events)
+
+    def close(self) -> None:
+        """Stop the commit thread, flush pending writes and close the database."""
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache and commit counters."""
+        with self._lock:
+            return {
+                **self._stats,
+                "cached_sessions": len(self._cache),
+                "pending_sessions": len(self._dirty),
+                "pending_events": len(self._events),
+            }
+
+    # --- Internal helpers ---
+    def _run_flusher(self) -> None:
+        while not self._closed.wait(self.commit_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as exc:
+                print(f"⚠️  Falha ao gravar sessões em {self.path}: {exc}")
+
+    def _trim_cache(self) -> None:
+        # Queued sessions stay reachable through _dirty until committed.
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _load(self, session_id: str) -> Dict[str, Any]:
+        """Read a session and its recent history, likes and dislikes from disk.
+
+        Writes queued but not yet committed win over the committed state:
+        the queued session replaces the stored row and queued events follow
+        the committed ones.
+        """
+        limit = self.max_events if self.max_events else -1
+        with self._db_lock:
+            with self._lock:
+                data = self._dirty.get(session_id)
+                queued = [row[1:] for row in self._events if row[0] == session_id]
+            if data is None:
+                row = self._conn.execute(
+                    "SELECT data FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                if row is None and not queued:
+                    return new_session(self.max_events)
+                data = row[0] if row is not None else None
+            history = self._conn.execute(
+                "SELECT type, item_id, ts, product FROM events WHERE session_id = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (session_id, limit),
+            ).fetchall()
+            products = {
+                kind: self._conn.execute(
+                    "SELECT type, item_id, ts, product FROM events "
+                    "WHERE session_id = ? AND type = ? AND product IS NOT NULL ORDER BY id DESC LIMIT ?",
+                    (session_id, kind, limit),
+                ).fetchall()
+                for kind in ("like", "dislike")
+            }
+
+        session = json.loads(data) if data is not None else new_session(self.max_events)
+        session["history"] = AppendLog(
+            (SwipeEvent(kind, item_id, ts) for kind, item_id, ts, _ in [*reversed(history), *queued]),
+            maxlen=self.max_events,
+        )
+        session["preferences"] = {
+            key: AppendLog(
+                (json.loads(r[3]) for r in [*reversed(products[kind]), *queued] if r[0] == kind and r[3]),
+                maxlen=self.max_events,
+            )
+            for key, kind in (("likes", "like"), ("dislikes", "dislike"))
+        }
+        session[PERSISTED_KEY] = tuple(_total(log) for log in _logs(session))
+        return session
+
+
+def _logs(session: Dict[str, Any]) -> Tuple[Any, Any, Any]:
+    prefs = session.get("preferences") or {}
+    return session.get("history", ()), prefs.get("likes", ()), prefs.get("dislikes", ())
+
+
+def _total(log: Any) -> int:
+    return log.total if isinstance(log, AppendLog) else len(log)
+
+
+def _appended(log: Any, mark: int) -> List[Any]:
+    """Entries of a history/likes/dislikes log appended after `mark`."""
+    if isinstance(log, AppendLog):
+        return log.since(mark)
+    return list(log)[mark:]
+
+
+def _event_rows(
+    session_id: str, events: List[SwipeEvent], likes: List[Dict[str, Any]], dislikes: List[Dict[str, Any]]
+) -> List[_Row]:
+    """Event rows for new history entries, each with the product it appended.
+
+    Every swipe appends one event and one product, so they pair up in order;
+    they are matched from the newest, as a ring buffer that overflowed within
+    one write drops the oldest of both.
+    """
+    pending = {"like": list(likes), "dislike": list(dislikes)}
+    rows: List[_Row] = []
+    for event in reversed(events):
+        products = pending.get(event.type)
+        product = products.pop() if products else None
+        item_id = event.item_id if event.item_id is None else str(event.item_id)
+        encoded = json.dumps(product, default=_encode) if product is not None else None
+        rows.append((session_id, event.type, item_id, event.ts, encoded))
+    rows.reverse()
+    return rows
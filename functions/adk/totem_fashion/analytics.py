@@ -0,0 +1,246 @@
+"""
+Non-blocking analytics export of swipes and outfits.
+
+`EventSink.emit` puts a compact event record on a bounded in-memory queue
+and returns; a background worker drains the queue in batches and appends
+them to gzip-compressed JSON Lines files, so request handlers never wait on
+disk. One event per line:
+
+    {"type": "like", "session": "...", "item": "...", "ts": 1760000000.0}
+    {"type": "outfit", "session": "...", "item": "<seed>", "ts": ...,
+     "items": [...], "total_price": 99.9, "source": "lookbook", "budget": null, "k": 1}
+
+Files are written under ANALYTICS_DIR as `events-<start>-<pid>-<n>.jsonl.gz.part`
+and renamed to `.jsonl.gz` once closed, so collectors can pick up every
+file without the `.part` suffix. A file is closed after ANALYTICS_ROTATE_BYTES
+of (uncompressed) events or ANALYTICS_ROTATE_SECONDS, whichever comes first.
+Each batch is a separate gzip member; `gzip.open` reads them as one stream.
+
+When the queue is full, ANALYTICS_BACKPRESSURE decides: "drop" (default)
+discards the event and counts it, "block" makes the caller wait for room.
+`close()` flushes what is queued and closes the current file; the service
+container calls it on instance shutdown. ANALYTICS_DIR="" disables the sink.
+
+Counters: `analytics_events_queued_total`, `_flushed_total`, `_dropped_total`
+(see metrics).
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+from .metrics import counter
+
+ANALYTICS_DIR = os.getenv("ANALYTICS_DIR", os.path.join(tempfile.gettempdir(), "totem_events"))
+QUEUE_SIZE = int(os.getenv("ANALYTICS_QUEUE_SIZE", "10000"))
+BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "500"))
+FLUSH_SECONDS = float(os.getenv("ANALYTICS_FLUSH_SECONDS", "5"))
+ROTATE_BYTES = int(os.getenv("ANALYTICS_ROTATE_BYTES", str(64 * 1024 * 1024)))
+ROTATE_SECONDS = float(os.getenv("ANALYTICS_ROTATE_SECONDS", "3600"))
+BACKPRESSURE = os.getenv("ANALYTICS_BACKPRESSURE", "drop").lower()
+
+EVENTS_QUEUED = counter("analytics_events_queued_total", "Analytics events put on the export queue.")
+EVENTS_FLUSHED = counter("analytics_events_flushed_total", "Analytics events written to files.")
+EVENTS_DROPPED = counter("analytics_events_dropped_total", "Analytics events dropped (queue full or write error).")
+
+# Queue markers handled by the worker
+_FLUSH = "flush"
+_CLOSE = "close"
+
+
+class _RotatingWriter:
+    """Appends batches of lines to gzip JSONL files, rotating by size and age."""
+
+    def __init__(self, directory: str, rotate_bytes: int, rotate_seconds: float) -> None:
+        self.directory = directory
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.files = 0
+        self._path: Optional[str] = None
+        self._opened = 0.0
+        self._bytes = 0
+
+    def write(self, lines: List[str]) -> None:
+        if self._path is not None and (
+            self._bytes >= self.rotate_bytes or time.time() - self._opened >= self.rotate_seconds
+        ):
+            self.close()
+        if self._path is None:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+            self._path = os.path.join(self.directory, f"events-{stamp}-{os.getpid()}-{self.files}.jsonl.gz.part")
+            self._opened, self._bytes = time.time(), 0
+            self.files += 1
+        data = "".join(lines).encode("utf-8")
+        with open(self._path, "ab") as fh:
+            fh.write(gzip.compress(data, compresslevel=6))
+        self._bytes += len(data)
+
+    def close(self) -> None:
+        """Publish the current file under its final name."""
+        if self._path is not None:
+            os.replace(self._path, self._path[: -len(".part")])
+            self._path = None
+
+
+class EventSink:
+    """Bounded queue of analytics events drained to files by a worker thread."""
+
+    def __init__(
+        self,
+        directory: str = ANALYTICS_DIR,
+        queue_size: int = QUEUE_SIZE,
+        batch_size: int = BATCH_SIZE,
+        flush_seconds: float = FLUSH_SECONDS,
+        backpressure: str = BACKPRESSURE,
+        rotate_bytes: int = ROTATE_BYTES,
+        rotate_seconds: float = ROTATE_SECONDS,
+    ) -> None:
+        if backpressure not in ("drop", "block"):
+            raise ValueError(f"ANALYTICS_BACKPRESSURE inválido: {backpressure!r} (use 'drop' ou 'block')")
+        self.directory = directory
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.block = backpressure == "block"
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._writer = _RotatingWriter(directory, rotate_bytes, rotate_seconds)
+        self._stats = {"queued": 0, "flushed": 0, "dropped": 0}
+        self._lock = threading.Lock()
+        # Held from the closed check to the put, so close() never overtakes
+        # an emit: every accepted event is queued ahead of the close marker.
+        self._emit_lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="analytics-sink", daemon=True)
+        self._worker.start()
+
+    def emit(self, event: Dict[str, Any]) -> bool:
+        """Queue one event; returns False if it was dropped."""
+        with self._emit_lock:
+            if self._closed:
+                return self._count("dropped", EVENTS_DROPPED)
+            try:
+                if self.block:
+                    self._queue.put(event)
+                else:
+                    self._queue.put_nowait(event)
+            except queue.Full:
+                return self._count("dropped", EVENTS_DROPPED)
+        self._count("queued", EVENTS_QUEUED)
+        return True
+
+    def swipe(self, kind: str, session_id: str, item_id: Any, ts: float) -> bool:
+        return self.emit({"type": kind, "session": session_id, "item": item_id, "ts": ts})
+
+    def outfit(
+        self,
+        session_id: str,
+        seed_id: str,
+        outfit: Mapping[str, Any],
+        source: str,
+        budget: Optional[float] = None,
+        k: int = 1,
+    ) -> bool:
+        return self.emit(
+            {
+                "type": "outfit",
+                "session": session_id,
+                "item": seed_id,
+                "ts": time.time(),
+                "items": [item.get("id") for item in outfit.get("items", ())],
+                "total_price": outfit.get("total_price"),
+                "source": source,
+                "budget": budget,
+                "k": k,
+            }
+        )
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write everything queued so far; returns False on timeout."""
+        return self._send(_FLUSH, timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> bool:
+        """Flush, close the current file and stop the worker (idempotent)."""
+        with self._emit_lock:
+            if self._closed:
+                return True
+            self._closed = True
+        done = self._send(_CLOSE, timeout)
+        self._worker.join(timeout)
+        return done
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(
+                self._stats,
+                pending=self._queue.qsize(),
+                files=self._writer.files,
+                backpressure="block" if self.block else "drop",
+                directory=self.directory,
+            )
+
+    # --- Internal helpers ---
+    def _count(self, key: str, metric: Any, amount: int = 1) -> bool:
+        with self._lock:
+            self._stats[key] += amount
+        metric.inc(amount)
+        return False
+
+    def _send(self, marker: str, timeout: Optional[float]) -> bool:
+        done = threading.Event()
+        try:
+            # Markers always wait for room, whatever the backpressure mode
+            self._queue.put((marker, done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def _run(self) -> None:
+        batch: List[str] = []
+        deadline = time.monotonic() + self.flush_seconds
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            marker = item if isinstance(item, tuple) else None
+            if isinstance(item, dict):
+                batch.append(json.dumps(item, ensure_ascii=False, separators=(",", ":"), default=str) + "\n")
+            if batch and (marker or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_seconds
+            if marker is not None:
+                kind, done = marker
+                if kind == _CLOSE:
+                    self._close_file()
+                    done.set()
+                    return
+                done.set()
+
+    def _write(self, batch: List[str]) -> None:
+        try:
+            self._writer.write(batch)
+        except OSError as exc:  # the worker must survive a full or read-only disk
+            print(f"⚠️  Falha ao gravar eventos de analytics em {self.directory}: {exc}")
+            self._count("dropped", EVENTS_DROPPED, len(batch))
+            return
+        self._count("flushed", EVENTS_FLUSHED, len(batch))
+
+    def _close_file(self) -> None:
+        try:
+            self._writer.close()
+        except OSError as exc:
+            print(f"⚠️  Falha ao fechar o ficheiro de analytics: {exc}")
+
+
+def default_event_sink() -> Optional[EventSink]:
+    """The sink configured by the ANALYTICS_* variables (None when disabled)."""
+    return EventSink() if ANALYTICS_DIR else None
@@ -0,0 +1,100 @@
+"""
+Admission control: shed load with fast 503s instead of queueing it.
+
+Under a burst, requests beyond what the instance can serve wait for a
+worker thread, and latency climbs for every client. `AdmissionMiddleware`
+counts the requests in flight on the instance and, once more than
+ADMISSION_MAX_IN_FLIGHT are being served, answers new ones at once with
+503 and `Retry-After: ADMISSION_RETRY_AFTER` (seconds), so mirrors back off
+and retry (possibly on another instance) while admitted requests keep their
+latency. `/health` and `/metrics` are always admitted.
+
+ADMISSION_MAX_IN_FLIGHT=0 disables shedding. The limit lives on the
+module-level `ADMISSION` object and can be changed at runtime.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Dict
+
+from ..metrics import counter
+
+MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64"))
+RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+EXEMPT_PATHS = frozenset({"/health", "/metrics"})
+
+SHED = counter("http_requests_shed_total", "Requests rejected with 503 by admission control.")
+
+_BODY = json.dumps({"detail": "Serviço sobrecarregado, tente novamente"}, ensure_ascii=False).encode("utf-8")
+
+
+class AdmissionControl:
+    """In-flight request counter with a configurable depth."""
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, retry_after: int = RETRY_AFTER) -> None:
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.peak = 0
+        self.shed = 0
+        self._lock = threading.Lock()
+
+    def try_enter(self) -> bool:
+        with self._lock:
+            if 0 < self.max_in_flight <= self.in_flight:
+                self.shed += 1
+                SHED.inc()
+                return False
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            return True
+
+    def leave(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "peak": self.peak,
+                "shed": self.shed,
+                "max_in_flight": self.max_in_flight,
+            }
+
+
+ADMISSION = AdmissionControl()
+
+
+class AdmissionMiddleware:
+    """ASGI middleware answering 503 + Retry-After when too many requests are in flight."""
+
+    def __init__(self, app: Any, control: AdmissionControl = ADMISSION) -> None:
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope.get("path") in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        if not self.control.try_enter():
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 503,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(_BODY)).encode()),
+                        (b"retry-after", str(self.control.retry_after).encode()),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": _BODY})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.control.leave()
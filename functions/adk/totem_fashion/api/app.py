@@ -1,37 +1,48 @@
 from __future__ import annotations
 
 import os
-from fastapi import FastAPI, Query
-from pydantic import BaseModel
+import time
+from typing import Any, Dict, List, Literal
+
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from ..sdk import load_local_env
 
 # 1) Carrega .env em ambiente de desenvolvimento (ignora se não existir)
-try:
-    from dotenv import load_dotenv
-    from pathlib import Path
-    # Sobe um nível: api/ -> totem_fashion/
-    env_path = Path(__file__).resolve().parent.parent / ".env"
-    load_dotenv(dotenv_path=env_path)
-except Exception as e:
-    print(f"⚠️  Não foi possível carregar .env: {e}")
-
-# 2) (Opcional) Configurar Gemini via API key (local .env ou secret em Firebase)
-try:
-    import google.generativeai as genai
-    api_key = os.environ.get("GEMINI_API_KEY")
-    if api_key:
-        genai.configure(api_key=api_key)
-except Exception:
-    # Mantém a app a funcionar mesmo que a lib não esteja instalada
-    pass
+load_local_env()
 
-MODEL_NAME = os.environ.get("MODEL_NAME", "gemini-2.5-pro")
+# 2) O SDK do Gemini não é importado aqui: /health e os endpoints de catálogo
+#    não usam o modelo. Quem precisar chama sdk.get_genai() no primeiro uso.
 
-from ..agent.agent import FashionStylistAgent
+MODEL_NAME = os.environ.get("MODEL_NAME", "gemini-2.5-pro")
+SWIPE_BATCH_MAX = int(os.environ.get("SWIPE_BATCH_MAX", "500"))
+# Tolerância (segundos) para relógios de quiosque adiantados em /swipe/batch
+SWIPE_TS_MAX_SKEW = float(os.environ.get("SWIPE_TS_MAX_SKEW", "300"))
+
+from ..metrics import MetricsMiddleware, render as render_metrics
+from ..services import get_services
+from ..tools.catalog import CATALOG, current_catalog
+from ..tools.item_json import parse_fields
+from ..tools.memo import memo_stats
+from ..tools.similarity import NEIGHBORS as SIMILAR_NEIGHBORS
+from ..tools.singleflight import singleflight_stats
+from .admission import ADMISSION, AdmissionMiddleware
+from .responses import RawJSONResponse
 
 app = FastAPI(title="Totem Fashion Finder Agent API")
+# Admissão dentro das métricas, para que os 503 também sejam medidos
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
-# Instância "global" do agente (podes trocar para DI se quiseres)
-agent = FashionStylistAgent()
+# Agente partilhado com as ferramentas do ADK (ver services.py)
+services = get_services()
+agent = services.agent
+
+
+# Projecção dos produtos nas respostas, ex.: fields=id,image,price
+FIELDS_QUERY = Query(default=None, description="Comma-separated product fields to return (default: all)")
 
 
 class ProductInput(BaseModel):
@@ -46,27 +57,175 @@ class ProductInput(BaseModel):
     gender: str | None = None
 
 
+class SwipeEventInput(BaseModel):
+    """One queued swipe: a product payload or just its catalog id."""
+    type: Literal["like", "dislike"]
+    product_id: str | None = None
+    product: ProductInput | None = None
+    ts: float | None = Field(default=None, ge=0, description="Epoch seconds of the original swipe")
+
+    @field_validator("ts")
+    @classmethod
+    def _plausible_ts(cls, ts: float | None) -> float | None:
+        if ts is None:
+            return ts
+        if ts > 1e11:
+            raise ValueError("ts deve estar em segundos desde a época, não em milissegundos")
+        if ts > time.time() + SWIPE_TS_MAX_SKEW:
+            raise ValueError("ts está no futuro")
+        return ts
+
+    @model_validator(mode="after")
+    def _needs_product(self) -> "SwipeEventInput":
+        if self.product is None and self.product_id is None:
+            raise ValueError("Indique product ou product_id")
+        return self
+
+
+class SwipeBatch(BaseModel):
+    """Ordered swipes of one session, as flushed by a kiosk."""
+    events: List[SwipeEventInput] = Field(max_length=SWIPE_BATCH_MAX)
+
+
+class CatalogDelta(BaseModel):
+    """Catalog changes to apply without a redeploy.
+
+    Each upsert is a whole product: it replaces the catalog entry with the
+    same id (fields are not merged), or is added when the id is new.
+    """
+    upserts: List[Dict[str, Any]] = []
+    deletes: List[str] = []
+
+    @field_validator("upserts")
+    @classmethod
+    def _upserts_have_ids(cls, upserts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Validado aqui: o delta é aplicado em segundo plano, depois da resposta
+        for n, item in enumerate(upserts):
+            if not isinstance(item.get("id"), str):
+                raise ValueError(f"upserts[{n}] precisa de um id (texto)")
+        return upserts
+
+
+def _product(product: ProductInput) -> Dict[str, Any]:
+    """Swiped product: the catalog entry overlaid with the fields the client sent.
+
+    Kiosks may send just the id; unknown products are taken as sent.
+    """
+    known = current_catalog().index.get(product.id)
+    if known is None:
+        return product.model_dump()
+    return {**known, **product.model_dump(exclude_none=True)}
+
+
+def _raw(payload: Any, fields: str | None = None, headers: Dict[str, str] | None = None) -> RawJSONResponse:
+    """Encode a response from the cached JSON of its products (see tools/item_json.py)."""
+    encoder = current_catalog().derived("item_json")
+    return RawJSONResponse(encoder.encode(payload, parse_fields(fields)), headers=headers)
+
+
+def _check_admin(token: str | None) -> None:
+    """Reject catalog admin calls unless CATALOG_ADMIN_TOKEN is set and matches."""
+    expected = os.environ.get("CATALOG_ADMIN_TOKEN")
+    if not expected or token != expected:
+        raise HTTPException(status_code=403, detail="Operação não autorizada")
+
+
 @app.get("/health")
 def health():
-    return {"status": "ok", "model": MODEL_NAME}
+    store = services.store
+    return {
+        "status": "ok",
+        "model": MODEL_NAME,
+        "warm": services.is_warm,
+        "catalog": current_catalog().describe(),
+        "sessions": store.stats() if hasattr(store, "stats") else None,
+        "memo": memo_stats(),
+        "singleflight": singleflight_stats(),
+        "admission": ADMISSION.stats(),
+        "deck": agent.deck.stats(),
+        "popularity": services.popularity.stats(),
+        "analytics": services.events.stats() if services.events is not None else None,
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """Latency histograms and counters in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.post("/catalog/reload", status_code=202)
+def catalog_reload(x_admin_token: str | None = Header(default=None)):
+    """Reload the catalog file in the background; poll /health for the new version."""
+    _check_admin(x_admin_token)
+    CATALOG.reload_in_background()
+    return {"scheduled": "reload", "current_version": current_catalog().version}
+
+
+@app.post("/catalog/delta", status_code=202)
+def catalog_delta(delta: CatalogDelta, x_admin_token: str | None = Header(default=None)):
+    """Apply product upserts/deletes in the background; poll /health for the new version."""
+    _check_admin(x_admin_token)
+    CATALOG.apply_delta_in_background(delta.model_dump())
+    return {"scheduled": "delta", "current_version": current_catalog().version}
 
 
 @app.get("/discover")
-def discover(session_id: str, category: str | None = None):
-    """Return items for the initial swipe deck."""
-    return agent.discover(session_id=session_id, category=category)
+def discover(
+    session_id: str,
+    category: str | None = None,
+    cursor: str | None = Query(default=None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(default=30, ge=1, le=100),
+    fields: str | None = FIELDS_QUERY,
+):
+    """Return a page of the session's swipe deck; the next page's cursor goes in X-Next-Cursor."""
+    try:
+        page = agent.discover(session_id=session_id, category=category, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else None
+    return _raw(page.items, fields, headers)
 
 
 @app.post("/swipe/like")
-def swipe_like(session_id: str, product: ProductInput):
+def swipe_like(session_id: str, product: ProductInput, fields: str | None = FIELDS_QUERY):
     """Record a like and return suggestions."""
-    return agent.swipe_like(session_id=session_id, product=product.model_dump())
+    return _raw(agent.swipe_like(session_id=session_id, product=_product(product)), fields)
 
 
 @app.post("/swipe/dislike")
-def swipe_dislike(session_id: str, product: ProductInput):
+def swipe_dislike(session_id: str, product: ProductInput, fields: str | None = FIELDS_QUERY):
     """Record a dislike and return suggestions."""
-    return agent.swipe_dislike(session_id=session_id, product=product.model_dump())
+    return _raw(agent.swipe_dislike(session_id=session_id, product=_product(product)), fields)
+
+
+@app.post("/swipe/batch")
+def swipe_batch(session_id: str, batch: SwipeBatch, fields: str | None = FIELDS_QUERY):
+    """Record queued swipes in order and return suggestions once, after the last one."""
+    events = [
+        {
+            "type": event.type,
+            "product_id": event.product_id,
+            "product": _product(event.product) if event.product else None,
+            "ts": event.ts,
+        }
+        for event in batch.events
+    ]
+    return _raw(agent.swipe_batch(session_id=session_id, events=events), fields)
+
+
+@app.get("/similar")
+def similar(
+    item_id: str,
+    k: int = Query(default=10, ge=1, le=SIMILAR_NEIGHBORS),
+    fields: str | None = FIELDS_QUERY,
+):
+    """Return the k products most similar to an item ("more like this")."""
+    try:
+        items = agent.similar(item_id=item_id, k=k)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _raw(items, fields)
 
 
 @app.get("/outfit")
@@ -74,7 +233,13 @@ def get_outfit(
     session_id: str,
     seed_id: str,
     budget: float | None = Query(default=None, description="Optional budget for the outfit"),
+    k: int = Query(default=1, ge=1, le=20, description="Number of alternative outfits"),
+    fields: str | None = FIELDS_QUERY,
 ):
-    """Create a coordinated outfit from a seed item."""
-    return agent.create_outfit_from_seed(session_id=session_id, seed_id=seed_id, budget=budget)
+    """Create the k best coordinated outfits from a seed item."""
+    try:
+        outfit = agent.create_outfit_from_seed(session_id=session_id, seed_id=seed_id, budget=budget, k=k)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _raw(outfit, fields)
 
@@ -0,0 +1,148 @@
+"""
+Bridge between synchronous Cloud Functions handlers and ASGI apps.
+
+Each Functions request used to spin up and tear down its own event loop with
+`asyncio.run`, which also meant nothing bound to a loop (HTTP clients, async
+stores) could outlive a request. `AsgiBridge` instead keeps one event loop per
+instance running on a dedicated daemon thread and submits every request to it.
+
+Responses are not buffered: the handler returns as soon as the app has sent
+`http.response.start`. A single-chunk body is handed over as the very bytes
+object the app produced; when the app streams (`more_body=True`) the body is
+an iterator that yields chunks as they arrive, so the Functions response can
+stream them straight to the client.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import queue
+import threading
+import traceback
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+Headers = List[Tuple[bytes, bytes]]
+Body = Union[bytes, Iterator[bytes]]
+
+# Markers put on the hand-off queue by the loop thread.
+_START = "start"
+_BODY = "body"
+_DONE = "done"
+_ERROR = "error"
+
+
+class AsgiBridge:
+    """Runs ASGI apps on a long-lived event loop owned by a background thread."""
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The bridge's event loop, started on first use."""
+        loop = self._loop
+        if loop is not None:
+            return loop
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def _run() -> None:
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                threading.Thread(target=_run, name="asgi-loop", daemon=True).start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro: Any) -> "concurrent.futures.Future[Any]":
+        """Schedule a coroutine on the bridge loop (for loop-bound resources)."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, app: Callable, scope: Dict[str, Any], body: bytes) -> Tuple[int, Headers, Body]:
+        """Call an ASGI app with a complete request body.
+
+        Returns:
+            (status, headers, body) where body is either bytes or, for
+            streamed responses, an iterator of byte chunks.
+        """
+        handoff: "queue.SimpleQueue[Tuple[str, Any, Any]]" = queue.SimpleQueue()
+        self.submit(_serve(app, scope, body, handoff))
+
+        kind, status, headers = handoff.get()
+        if kind == _ERROR:
+            raise status
+        if kind == _DONE:
+            raise RuntimeError("ASGI app returned without starting a response")
+
+        kind, chunk, more_body = handoff.get()
+        if kind == _ERROR:
+            raise chunk
+        if kind == _DONE:
+            return status, headers, b""
+        if not more_body:
+            return status, headers, chunk
+        return status, headers, _stream(chunk, handoff)
+
+
+def _stream(first: bytes, handoff: "queue.SimpleQueue[Tuple[str, Any, Any]]") -> Iterator[bytes]:
+    """Yield body chunks as the app sends them."""
+    if first:
+        yield first
+    while True:
+        kind, chunk, more_body = handoff.get()
+        if kind == _ERROR:
+            raise chunk
+        if kind == _DONE:
+            return
+        if chunk:
+            yield chunk
+        if not more_body:
+            return
+
+
+async def _serve(
+    app: Callable,
+    scope: Dict[str, Any],
+    body: bytes,
+    handoff: "queue.SimpleQueue[Tuple[str, Any, Any]]",
+) -> None:
+    """Run one request on the bridge loop, forwarding messages to `handoff`."""
+    request_sent = False
+    finished = asyncio.Event()
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Nothing else to read: report a disconnect once the response is done.
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            handoff.put((_START, message.get("status", 200), message.get("headers", [])))
+        elif message["type"] == "http.response.body":
+            more_body = message.get("more_body", False)
+            handoff.put((_BODY, message.get("body", b""), more_body))
+            if not more_body:
+                finished.set()
+
+    try:
+        await app(scope, receive, send)
+    except BaseException as exc:  # noqa: BLE001 - surfaced in the calling thread
+        # Apps may raise after already sending an error response, in which
+        # case nobody reads the queued error; keep the traceback in the logs.
+        traceback.print_exc()
+        handoff.put((_ERROR, exc, None))
+        if not isinstance(exc, Exception):
+            raise
+    finally:
+        finished.set()
+        handoff.put((_DONE, None, None))
@@ -0,0 +1,22 @@
+"""
+Response classes for payloads that are already encoded.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.responses import Response
+
+
+class RawJSONResponse(Response):
+    """JSON response whose content is already-encoded bytes (sent as-is).
+
+    Returning it from an endpoint skips FastAPI's validation and encoding of
+    the payload; see `tools.item_json` for how the bytes are assembled.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return content
@@ -0,0 +1,5 @@
+"""Package init for benchmarks.
+
+Stand-alone performance scripts for the Fashion Finder. Run them from the
+`functions/` directory, e.g. `python -m adk.totem_fashion.benchmarks.bench_snapshot`.
+"""
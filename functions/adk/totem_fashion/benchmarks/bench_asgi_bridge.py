@@ -0,0 +1,97 @@
+"""
+Per-request overhead of the ASGI bridge used by main.py.
+
+Compares the previous approach (a fresh event loop per request via
+`asyncio.run`, with the body buffered into a bytearray and copied again) with
+`AsgiBridge`, which reuses one loop and hands the body over without copies.
+A trivial ASGI app keeps the numbers about the bridge itself; the optional
+`--fastapi` flag also measures a real `/health` call.
+
+Usage (from functions/):
+    python -m adk.totem_fashion.benchmarks.bench_asgi_bridge
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict
+
+from ..api.asgi_bridge import AsgiBridge
+
+_SCOPE: Dict[str, Any] = {
+    "type": "http",
+    "http_version": "1.1",
+    "method": "GET",
+    "path": "/health",
+    "raw_path": b"/health",
+    "query_string": b"",
+    "headers": [],
+    "scheme": "https",
+    "server": ("functions", 443),
+    "client": ("", 0),
+}
+
+_PAYLOAD = b'{"status":"ok"}' * 64
+
+
+async def _tiny_app(scope, receive, send) -> None:
+    await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": _PAYLOAD})
+
+
+async def _legacy_run_asgi(app, scope, body: bytes):
+    """The per-request implementation main.py used before the bridge."""
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+    status, headers, chunks = 200, [], bytearray()
+    async def send(message):
+        nonlocal status, headers, chunks
+        if message["type"] == "http.response.start":
+            status = message.get("status", 200)
+            headers = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            chunks.extend(message.get("body", b""))
+    await app(scope, receive, send)
+    return status, headers, bytes(chunks)
+
+
+def _per_request_us(call: Callable[[], Any], requests: int) -> float:
+    for _ in range(min(100, requests)):
+        call()
+    start = time.perf_counter()
+    for _ in range(requests):
+        call()
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def _compare(app: Callable, requests: int) -> Dict[str, float]:
+    bridge = AsgiBridge()
+    legacy = _per_request_us(lambda: asyncio.run(_legacy_run_asgi(app, _SCOPE, b"")), requests)
+    bridged = _per_request_us(lambda: bridge.run(app, _SCOPE, b""), requests)
+    return {
+        "asyncio_run_us": round(legacy, 1),
+        "bridge_us": round(bridged, 1),
+        "speedup": round(legacy / bridged, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--fastapi", action="store_true", help="also measure the FastAPI /health endpoint")
+    args = parser.parse_args()
+
+    results = {"tiny_app": _compare(_tiny_app, args.requests)}
+    if args.fastapi:
+        from ..api.app import app
+
+        results["fastapi_health"] = _compare(app, args.requests // 5)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Burst benchmark: request coalescing and admission control.
+
+Simulates store opening: `--mirrors` kiosks wake up at the same moment
+(released by a barrier) and each opens the deck of the same category, asks
+for the featured outfit and, like a flaky kiosk retrying, repeats its first
+`/discover` call. Requests go through the in-process ASGI driver of
+bench_load, so the whole middleware stack (metrics, admission) is exercised.
+
+Every mode (coalescing on/off x each `--max-in-flight` depth, 0 = no
+shedding) runs on a freshly loaded synthetic catalog, so caches start cold.
+Reports per mode: latency of admitted requests (p50/p95/p99/max), how many
+were shed with 503 and how fast, and how many calls were served from a
+shared computation.
+
+Usage (from functions/):
+    python -m adk.totem_fashion.benchmarks.bench_burst --items 100000 --mirrors 200
+    python -m adk.totem_fashion.benchmarks.bench_burst --max-in-flight 0,16,48 --waves 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from .bench_load import AsgiDriver, _percentile
+from .synthetic import generate_items
+
+
+def burst(driver: AsgiDriver, mirrors: int, category: str, seed_id: str, tag: str) -> List[Tuple[str, int, float]]:
+    """Release `mirrors` kiosks at once; returns (path, status, seconds) per request."""
+    barrier = threading.Barrier(mirrors)
+
+    def mirror(i: int) -> List[Tuple[str, int, float]]:
+        session = f"{tag}-{i}"
+        calls = [
+            ("/discover", {"session_id": session, "category": category}),
+            ("/outfit", {"session_id": session, "seed_id": seed_id}),
+            ("/discover", {"session_id": session, "category": category}),
+        ]
+        barrier.wait()
+        samples = []
+        for path, query in calls:
+            start = time.perf_counter()
+            status, _, _ = driver.request("GET", path, query)
+            samples.append((path, status, time.perf_counter() - start))
+        return samples
+
+    with ThreadPoolExecutor(max_workers=mirrors) as pool:
+        return [s for samples in pool.map(mirror, range(mirrors)) for s in samples]
+
+
+def _summary(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    if not ordered:
+        return {}
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(_percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(ordered, 0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def run_mode(driver: AsgiDriver, args: argparse.Namespace, coalesce: bool, depth: int) -> Dict[str, Any]:
+    from ..api.admission import ADMISSION
+    from ..tools import singleflight
+    from ..tools.catalog import CATALOG, current_catalog
+
+    items = generate_items(args.items)
+    CATALOG.replace(items, source=f"synthetic-{args.items}")
+    catalog = current_catalog()
+    category = Counter(item["category"] for item in items).most_common(1)[0][0]
+    seed_id = items[catalog.index.positions(category)[0]]["id"]
+
+    singleflight.ENABLED = coalesce
+    ADMISSION.max_in_flight = depth
+    ADMISSION.peak = 0
+    shared_before = sum(g["shared"] for g in singleflight.singleflight_stats().values())
+
+    samples: List[Tuple[str, int, float]] = []
+    start = time.perf_counter()
+    for wave in range(args.waves):
+        tag = f"{'sf' if coalesce else 'nosf'}-{depth}-{wave}"
+        samples += burst(driver, args.mirrors, category, seed_id, tag)
+    wall = time.perf_counter() - start
+
+    admitted = [s for s in samples if s[1] != 503]
+    shed = [s for s in samples if s[1] == 503]
+    return {
+        "coalescing": coalesce,
+        "max_in_flight": depth,
+        "requests": len(samples),
+        "wall_s": round(wall, 2),
+        "admitted": {"count": len(admitted), **_summary([s[2] for s in admitted])},
+        "by_endpoint": {
+            path: _summary([s[2] for s in admitted if s[0] == path]) for path in ("/discover", "/outfit")
+        },
+        "shed": {"count": len(shed), **_summary([s[2] for s in shed])},
+        "errors": sum(1 for s in admitted if not 200 <= s[1] < 300),
+        "coalesced_calls": sum(g["shared"] for g in singleflight.singleflight_stats().values()) - shared_before,
+        "peak_in_flight": ADMISSION.stats()["peak"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100_000, help="synthetic catalog size")
+    parser.add_argument("--mirrors", type=int, default=200, help="kiosks waking up at once")
+    parser.add_argument("--waves", type=int, default=3, help="bursts per mode")
+    parser.add_argument("--max-in-flight", default="0,32", help="comma-separated admission depths (0 = off)")
+    parser.add_argument("--output", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    from ..api.app import app
+
+    driver = AsgiDriver(app)
+    results = []
+    for depth in (int(d) for d in args.max_in_flight.split(",")):
+        for coalesce in (False, True):
+            results.append(run_mode(driver, args, coalesce, depth))
+
+    report = json.dumps({"items": args.items, "mirrors": args.mirrors, "results": results}, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Synthetic-scale load test of the Fashion Finder API.
+
+For each catalog size, swaps a synthetic catalog into the process-wide
+holder, then replays shopper sessions against the FastAPI app in-process,
+over the same ASGI bridge `totem_api` uses (no network). Every session pages
+through its `/discover` deck, likes or dislikes each card according to its
+`Persona`, and asks for an `/outfit` around every few likes. Sessions run on
+`--concurrency` threads.
+
+Reports p50/p95/p99 latency and throughput per endpoint as JSON (stdout, and
+`--output` if given) and exits with status 1 when a regression check fails:
+
+* `--thresholds`: JSON file of absolute ceilings per endpoint, e.g.
+  `{"/discover": {"p95_ms": 40, "p99_ms": 120}}` (default:
+  load_thresholds.json next to this file);
+* `--baseline`: a previous `--output` file; p95 and throughput may not be
+  more than `--tolerance` worse than in it, at the same catalog size.
+
+Any non-2xx response also fails the run.
+
+Usage (from functions/):
+    python -m adk.totem_fashion.benchmarks.bench_load --items 1000,100000 --sessions 200
+    python -m adk.totem_fashion.benchmarks.bench_load --items 1000000 --baseline last.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from .synthetic import Persona, generate_items, generate_personas
+from ..api.asgi_bridge import AsgiBridge
+
+THRESHOLDS_FILE = os.path.join(os.path.dirname(__file__), "load_thresholds.json")
+ENDPOINTS = ("/discover", "/swipe/like", "/swipe/dislike", "/outfit")
+
+
+class AsgiDriver:
+    """Sends requests to an ASGI app in-process and records their latency."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+        self.bridge = AsgiBridge()
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def request(
+        self, method: str, path: str, query: Dict[str, Any], body: Optional[Dict[str, Any]] = None
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        payload = json.dumps(body).encode() if body is not None else b""
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": method,
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": urlencode(query).encode(),
+            "headers": [(b"content-type", b"application/json")],
+            "scheme": "https",
+            "server": ("functions", 443),
+            "client": ("", 0),
+        }
+        start = time.perf_counter()
+        status, headers, content = self.bridge.run(self.app, scope, payload)
+        if not isinstance(content, bytes):
+            content = b"".join(content)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies.setdefault(path, []).append(elapsed)
+            if not 200 <= status < 300:
+                self.errors[path] = self.errors.get(path, 0) + 1
+        return status, {k.decode().lower(): v.decode() for k, v in headers}, content
+
+    def reset(self) -> None:
+        with self._lock:
+            self.latencies.clear()
+            self.errors.clear()
+
+
+def replay(driver: AsgiDriver, persona: Persona, swipes: int, outfit_every: int) -> None:
+    """Page through one session's deck, swiping every card, with outfits along the way."""
+    query = {"session_id": persona.session_id}
+    cursor: Optional[str] = None
+    likes = 0
+    while swipes > 0:
+        page_query = {**query, "cursor": cursor} if cursor else query
+        status, headers, content = driver.request("GET", "/discover", page_query)
+        cards = json.loads(content) if status == 200 else []
+        if not cards:
+            return
+        for card in cards[:swipes]:
+            liked = persona.likes(card)
+            driver.request("POST", "/swipe/like" if liked else "/swipe/dislike", query, {"id": card["id"]})
+            swipes -= 1
+            if liked:
+                likes += 1
+                if likes % outfit_every == 0:
+                    driver.request("GET", "/outfit", {**query, "seed_id": card["id"]})
+        cursor = headers.get("x-next-cursor")
+        if not cursor:
+            return
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def run_scale(driver: AsgiDriver, items: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Load a synthetic catalog of `items` products and replay the sessions."""
+    from ..tools.catalog import CATALOG
+
+    start = time.perf_counter()
+    CATALOG.replace(generate_items(items), source=f"synthetic-{items}")
+    build_s = time.perf_counter() - start
+
+    personas = generate_personas(args.sessions, seed=items)
+    driver.reset()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for future in [pool.submit(replay, driver, p, args.swipes, args.outfit_every) for p in personas]:
+            future.result()
+    wall = time.perf_counter() - start
+
+    endpoints = {}
+    for path in ENDPOINTS:
+        ordered = sorted(driver.latencies.get(path, []))
+        if not ordered:
+            continue
+        endpoints[path] = {
+            "requests": len(ordered),
+            "errors": driver.errors.get(path, 0),
+            "p50_ms": round(statistics.median(ordered) * 1000, 3),
+            "p95_ms": round(_percentile(ordered, 0.95) * 1000, 3),
+            "p99_ms": round(_percentile(ordered, 0.99) * 1000, 3),
+            "throughput_rps": round(len(ordered) / wall, 1),
+        }
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "items": items,
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "catalog_build_s": round(build_s, 2),
+        "wall_s": round(wall, 2),
+        "throughput_rps": round(total / wall, 1),
+        "endpoints": endpoints,
+    }
+
+
+def check(
+    results: List[Dict[str, Any]],
+    thresholds: Dict[str, Any],
+    baseline: Optional[List[Dict[str, Any]]],
+    tolerance: float,
+) -> List[str]:
+    """Return a description of every regression check that failed."""
+    failures = []
+    previous = {r["items"]: r for r in baseline or []}
+    for result in results:
+        scale = result["items"]
+        for path, stats in result["endpoints"].items():
+            if stats["errors"]:
+                failures.append(f"{scale} itens {path}: {stats['errors']} respostas com erro")
+            for metric, ceiling in (thresholds.get(path) or {}).items():
+                if stats.get(metric, 0.0) > ceiling:
+                    failures.append(f"{scale} itens {path}: {metric} {stats[metric]} > {ceiling}")
+            before = previous.get(scale, {}).get("endpoints", {}).get(path)
+            if before:
+                if stats["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                    failures.append(f"{scale} itens {path}: p95 {stats['p95_ms']} ms vs {before['p95_ms']} ms na baseline")
+                if stats["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+                    failures.append(
+                        f"{scale} itens {path}: {stats['throughput_rps']} req/s vs {before['throughput_rps']} na baseline"
+                    )
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", default="1000,10000,100000", help="comma-separated catalog sizes (up to 1000000)")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--swipes", type=int, default=40, help="swipes per session")
+    parser.add_argument("--outfit-every", type=int, default=5, help="ask for an outfit every N likes")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--thresholds", default=THRESHOLDS_FILE)
+    parser.add_argument("--baseline", default=None, help="previous --output file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression vs baseline")
+    parser.add_argument("--output", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    from ..api.app import app
+
+    driver = AsgiDriver(app)
+    results = [run_scale(driver, int(n), args) for n in args.items.split(",")]
+
+    thresholds: Dict[str, Any] = {}
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds, "r", encoding="utf-8") as fh:
+            thresholds = json.load(fh)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)["results"]
+    failures = check(results, thresholds, baseline, args.tolerance)
+
+    report = json.dumps({"results": results, "failures": failures}, indent=2, ensure_ascii=False)
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(report)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
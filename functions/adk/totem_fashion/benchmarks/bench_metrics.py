@@ -0,0 +1,113 @@
+"""
+Overhead of the latency instrumentation on real API requests.
+
+Drives the FastAPI app through the ASGI bridge (as `totem_api` does) with a
+mix of deck, swipe and outfit requests, alternating rounds with metrics
+enabled and disabled, and reports the relative cost. Also times a single
+histogram observation.
+
+Usage (from functions/):
+    python -m adk.totem_fashion.benchmarks.bench_metrics --rounds 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Dict, List, Tuple
+
+from .. import metrics
+from ..api.asgi_bridge import AsgiBridge
+
+
+def _scope(method: str, path: str, query: str) -> Dict[str, Any]:
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [(b"content-type", b"application/json")],
+        "scheme": "https",
+        "server": ("functions", 443),
+        "client": ("", 0),
+    }
+
+
+def _requests(items: List[Dict[str, Any]], count: int, tag: str) -> List[Tuple[Dict[str, Any], bytes]]:
+    """A repeatable mix: deck page, like, dislike, outfit, one fresh session per cycle."""
+    mix = []
+    for i in range(count):
+        item = items[i % len(items)]
+        session = f"bench-{tag}-{i // 4}"
+        step = i % 4
+        if step == 0:
+            mix.append((_scope("GET", "/discover", f"session_id={session}&limit=30"), b""))
+        elif step == 3:
+            mix.append((_scope("GET", "/outfit", f"session_id={session}&seed_id={item['id']}"), b""))
+        else:
+            path = "/swipe/like" if step == 1 else "/swipe/dislike"
+            body = json.dumps({"id": item["id"]}).encode()
+            mix.append((_scope("POST", path, f"session_id={session}"), body))
+    return mix
+
+
+def _run(bridge: AsgiBridge, app: Any, mix: List[Tuple[Dict[str, Any], bytes]]) -> float:
+    start = time.perf_counter()
+    for scope, body in mix:
+        status, _, _ = bridge.run(app, dict(scope), body)
+        assert status == 200, status
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    from ..api.app import app
+    from ..tools.catalog import current_catalog
+
+    bridge = AsgiBridge()
+    items = list(current_catalog().items)
+    _run(bridge, app, _requests(items, args.requests, "warm"))  # caches, derived structures
+
+    # Fresh sessions every round, so that rounds do equal work
+    timings: Dict[bool, List[float]] = {True: [], False: []}
+    for round_ in range(args.rounds):
+        for enabled in (False, True) if round_ % 2 else (True, False):
+            mix = _requests(items, args.requests, f"{round_}-{enabled}")
+            metrics.ENABLED = enabled
+            timings[enabled].append(_run(bridge, app, mix))
+    metrics.ENABLED = True
+
+    histogram = metrics.Histogram("bench_seconds", "bench", ("tool",))
+    loops = 200_000
+    start = time.perf_counter()
+    for _ in range(loops):
+        histogram.observe(0.0012, "bench")
+    observe_ns = (time.perf_counter() - start) / loops * 1e9
+
+    off = statistics.median(timings[False])
+    on = statistics.median(timings[True])
+    print(
+        json.dumps(
+            {
+                "requests_per_round": args.requests,
+                "rounds": args.rounds,
+                "request_us_metrics_off": round(off / args.requests * 1e6, 1),
+                "request_us_metrics_on": round(on / args.requests * 1e6, 1),
+                "overhead_pct": round((on - off) / off * 100, 2),
+                "observe_ns": round(observe_ns, 1),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Outfit composition latency with thousands of candidates per category.
+
+Builds the per-category pools for a synthetic catalog, then composes the
+top-k outfits for random seeds and budgets, the work done by `/outfit` on a
+lookbook miss.
+
+Usage (from functions/):
+    python -m adk.totem_fashion.benchmarks.bench_outfit_solver --items 200000 --k 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from .synthetic import generate_items
+from ..tools.catalog import CatalogVersion
+from ..tools.outfit_composer import compose_outfit_from_seed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    catalog = CatalogVersion(generate_items(args.items), version=1, source="synthetic")
+    start = time.perf_counter()
+    pools = catalog.derived("outfit_pools")
+    build_s = time.perf_counter() - start
+
+    rng = random.Random(7)
+    latencies = []
+    for _ in range(args.requests):
+        seed = catalog.items[rng.randrange(args.items)]
+        budget = rng.choice([None, 40.0, 60.0, 90.0])
+        t0 = time.perf_counter()
+        compose_outfit_from_seed(seed, budget, catalog, k=args.k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    latencies.sort()
+    print(
+        json.dumps(
+            {
+                "items": args.items,
+                "categories": len(pools),
+                "largest_category": max(len(pool.positions) for pool in pools.values()),
+                "k": args.k,
+                "build_s": round(build_s, 2),
+                "outfit_ms_p50": round(statistics.median(latencies), 3),
+                "outfit_ms_p95": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+                "outfit_ms_max": round(latencies[-1], 3),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
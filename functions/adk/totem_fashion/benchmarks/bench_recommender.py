@@ -0,0 +1,68 @@
+"""
+Per-swipe recommendation latency on a large synthetic catalog.
+
+Builds the preference scorer for a synthetic catalog, then measures the work
+done on each swipe: building the session preference vector, scoring the
+catalog and picking the top-k unseen items.
+
+Usage (from functions/):
+    python -m adk.totem_fashion.benchmarks.bench_recommender --items 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from .synthetic import generate_items
+from ..agent.session import SessionManager
+from ..tools.catalog import CatalogVersion
+from ..tools.recommender import PreferenceScorer, recommend_for_session
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--swipes", type=int, default=200)
+    parser.add_argument("--k", type=int, default=12)
+    args = parser.parse_args()
+
+    catalog = CatalogVersion(generate_items(args.items), version=1, source="synthetic")
+    start = time.perf_counter()
+    scorer = catalog.derived("preference_scorer")
+    build_s = time.perf_counter() - start
+    assert isinstance(scorer, PreferenceScorer)
+
+    rng = random.Random(7)
+    sm = SessionManager()
+    latencies = []
+    for _ in range(args.swipes):
+        product = catalog.items[rng.randrange(args.items)]
+        (sm.add_like if rng.random() < 0.6 else sm.add_dislike)("bench", product)
+        session = sm.get_session("bench")
+        t0 = time.perf_counter()
+        recommend_for_session(session, catalog, k=args.k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    latencies.sort()
+    print(
+        json.dumps(
+            {
+                "items": args.items,
+                "profiles": scorer.profiles,
+                "features": scorer.matrix.shape[1],
+                "build_s": round(build_s, 2),
+                "swipe_ms_p50": round(statistics.median(latencies), 3),
+                "swipe_ms_p95": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+                "swipe_ms_max": round(latencies[-1], 3),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
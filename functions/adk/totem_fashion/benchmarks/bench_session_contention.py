@@ -0,0 +1,124 @@
+"""
+Session write contention: striped per-session locks vs one global lock.
+
+Worker threads replay swipes through `SessionManager`, each on its own
+kiosks, plus rapid double-swipes (pairs of threads swiping the same session
+at once). The store adds `--store-latency-ms` to every read and write, like a
+Firestore round trip; sleeping releases the GIL, as network I/O would. Each
+thread count runs twice: with SESSION_LOCK_STRIPES stripes and with a single
+stripe, i.e. a global lock. Reports swipes per second and scaling efficiency
+(throughput / (threads x single-thread throughput)), and checks that no
+swipe was lost: every session's history, likes/dislikes and aggregates must
+account for all the swipes sent to it.
+
+With no store latency the work is pure Python and the GIL, not the locks,
+caps the scaling.
+
+Usage (from functions/):
+    python -m adk.totem_fashion.benchmarks.bench_session_contention
+    python -m adk.totem_fashion.benchmarks.bench_session_contention --threads 1,4,16 --store-latency-ms 0
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List
+
+from .synthetic import generate_items
+from ..agent.session import LOCK_STRIPES, BaseSessionStore, InMemoryStore, SessionManager
+
+
+class LatencyStore(BaseSessionStore):
+    """InMemoryStore with a fixed delay per read and write."""
+
+    def __init__(self, latency: float) -> None:
+        self.inner = InMemoryStore()
+        self.latency = latency
+
+    def get(self, session_id: str) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self.inner.get(session_id)
+
+    def put(self, session_id: str, data: Dict[str, Any]) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        self.inner.put(session_id, data)
+
+    def update(self, session_id: str, patch: Dict[str, Any]) -> None:
+        self.inner.update(session_id, patch)
+
+
+def run(threads: int, stripes: int, args: argparse.Namespace, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    sm = SessionManager(LatencyStore(args.store_latency_ms / 1000), stripes=stripes)
+    sent: Dict[str, int] = {}
+    sent_lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(w: int) -> None:
+        rng = random.Random(w)
+        counts: Dict[str, int] = {}
+        barrier.wait()
+        for n in range(args.swipes):
+            # Every 10th swipe goes to a session shared with the neighbouring
+            # worker: the same kiosk swiping twice in a row
+            sid = f"kiosk-{w // 2}-shared" if n % 10 == 0 else f"kiosk-{w}-{rng.randrange(args.sessions)}"
+            (sm.add_like if rng.random() < 0.6 else sm.add_dislike)(sid, rng.choice(items))
+            counts[sid] = counts.get(sid, 0) + 1
+        with sent_lock:
+            for sid, count in counts.items():
+                sent[sid] = sent.get(sid, 0) + count
+
+    pool = [threading.Thread(target=worker, args=(w,)) for w in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    lost = 0
+    for sid, count in sent.items():
+        session = sm.get_session(sid)
+        prefs, aggregates = session["preferences"], session["aggregates"]
+        recorded = (
+            len(session["history"]),
+            len(prefs["likes"]) + len(prefs["dislikes"]),
+            aggregates["likes"]["total"] + aggregates["dislikes"]["total"],
+        )
+        lost += sum(count - r for r in recorded)
+    return {
+        "threads": threads,
+        "stripes": stripes,
+        "swipes_per_s": round(threads * args.swipes / elapsed),
+        "lost_updates": lost,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", default="1,2,4,8,16,32", help="comma-separated worker thread counts")
+    parser.add_argument("--swipes", type=int, default=300, help="swipes per thread")
+    parser.add_argument("--sessions", type=int, default=20, help="kiosk sessions per thread")
+    parser.add_argument("--store-latency-ms", type=float, default=2.0, help="delay per store read/write")
+    args = parser.parse_args()
+
+    items = generate_items(500)
+    results = []
+    for stripes in (LOCK_STRIPES, 1):
+        base = None
+        for threads in (int(t) for t in args.threads.split(",")):
+            result = run(threads, stripes, args, items)
+            base = base or result["swipes_per_s"]
+            result["efficiency"] = round(result["swipes_per_s"] / (threads * base), 2)
+            results.append(result)
+
+    print(json.dumps({"store_latency_ms": args.store_latency_ms, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Session store throughput: InMemoryStore vs SQLiteSessionStore.
+
+Replays swipes spread over many sessions through `SessionManager` and reports
+swipes per second for each store, plus how long the SQLite store needs to
+drain its last group commit and how fast it serves cold reads from disk.
+
+Usage (from functions/):
+    python -m adk.totem_fashion.benchmarks.bench_session_store
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Any, Dict
+
+from .synthetic import generate_items
+from ..agent.session import BaseSessionStore, InMemoryStore, SessionManager
+from ..agent.sqlite_store import SQLiteSessionStore
+
+
+def _replay(store: BaseSessionStore, sessions: int, swipes: int) -> Dict[str, Any]:
+    items = generate_items(500)
+    rng = random.Random(3)
+    sm = SessionManager(store)
+    start = time.perf_counter()
+    for _ in range(swipes):
+        sid = f"kiosk-{rng.randrange(sessions)}"
+        (sm.add_like if rng.random() < 0.6 else sm.add_dislike)(sid, rng.choice(items))
+    elapsed = time.perf_counter() - start
+    return {"swipes_per_s": round(swipes / elapsed), "elapsed_s": round(elapsed, 3)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--swipes", type=int, default=50_000)
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {
+        "sessions": args.sessions,
+        "swipes": args.swipes,
+        "in_memory": _replay(InMemoryStore(max_events=500), args.sessions, args.swipes),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.db")
+        store = SQLiteSessionStore(path, cache_size=args.sessions)
+        results["sqlite"] = _replay(store, args.sessions, args.swipes)
+        start = time.perf_counter()
+        store.flush()
+        results["sqlite"]["final_flush_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        results["sqlite"].update(store.stats())
+        store.close()
+
+        # A fresh store has an empty cache: every first read hits the disk.
+        cold = SQLiteSessionStore(path, cache_size=args.sessions)
+        start = time.perf_counter()
+        for i in range(args.sessions):
+            cold.get(f"kiosk-{i}")
+        elapsed = time.perf_counter() - start
+        results["sqlite"]["cold_reads_per_s"] = round(args.sessions / elapsed)
+        cold.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
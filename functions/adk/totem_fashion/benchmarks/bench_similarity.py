@@ -0,0 +1,69 @@
+"""
+Build time, memory and query latency of the "more like this" index.
+
+Builds the item-to-item similarity index for a synthetic catalog (after the
+recommender's profile matrix it reuses) and looks up the neighbors of random
+products, the work done by `/similar`.
+
+Usage (from functions/):
+    python -m adk.totem_fashion.benchmarks.bench_similarity --items 500000 --k 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from .synthetic import generate_items
+from ..tools.catalog import CatalogVersion
+from ..tools.similarity import similar_items
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=500_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    catalog = CatalogVersion(generate_items(args.items), version=1, source="synthetic")
+    start = time.perf_counter()
+    scorer = catalog.derived("preference_scorer")
+    profiles_s = time.perf_counter() - start
+    start = time.perf_counter()
+    index = catalog.derived("similarity")
+    build_s = time.perf_counter() - start
+
+    rng = random.Random(7)
+    latencies = []
+    for _ in range(args.requests):
+        item_id = catalog.items[rng.randrange(args.items)]["id"]
+        t0 = time.perf_counter()
+        similar_items(catalog, item_id, args.k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    latencies.sort()
+    print(
+        json.dumps(
+            {
+                "items": args.items,
+                "profiles": scorer.profiles,
+                "features": scorer.matrix.shape[1],
+                "neighbors_per_item": index.neighbors.shape[1] - 1,
+                "profiles_s": round(profiles_s, 2),
+                "build_s": round(build_s, 2),
+                "index_mb": round(index.nbytes / 1e6, 2),
+                "query_ms_p50": round(statistics.median(latencies), 4),
+                "query_ms_p95": round(latencies[int(len(latencies) * 0.95) - 1], 4),
+                "query_ms_max": round(latencies[-1], 4),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Cold-start benchmark: JSON catalog vs memory-mapped columnar snapshot.
+
+Generates a synthetic catalog, writes it both as JSON and as a snapshot, then
+imports `tools.data_loader` in a fresh interpreter for each format and reports
+import time and resident memory. A second figure touches the first items to
+show that views stay cheap to read.
+
+Usage (from functions/):
+    python -m adk.totem_fashion.benchmarks.bench_snapshot --items 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from .synthetic import write_catalog
+from ..tools.snapshot import build_snapshot
+
+FUNCTIONS_DIR = Path(__file__).resolve().parents[3]
+
+_PROBE = """
+import json, resource, time
+rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+t0 = time.perf_counter()
+from adk.totem_fashion.tools.data_loader import ITEMS
+t1 = time.perf_counter()
+total = sum(item["price"] for item in ITEMS[:1000])
+t2 = time.perf_counter()
+rss1 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "type": type(ITEMS).__name__,
+    "items": len(ITEMS),
+    "import_s": round(t1 - t0, 4),
+    "touch_1k_ms": round((t2 - t1) * 1000, 3),
+    "rss_delta_mb": round((rss1 - rss0) / 1024, 1),
+}))
+"""
+
+
+def _probe(data_file: str, snapshot_file: str) -> dict:
+    env = dict(os.environ, DATA_FILE=data_file, SNAPSHOT_FILE=snapshot_file)
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=FUNCTIONS_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = os.path.join(tmp, "catalog.json")
+        snap_file = os.path.join(tmp, "catalog.snap")
+        items = write_catalog(data_file, args.items)
+        build_snapshot(items, snap_file)
+        del items
+
+        results = {
+            "items": args.items,
+            "json_bytes": os.path.getsize(data_file),
+            "snapshot_bytes": os.path.getsize(snap_file),
+            # A missing snapshot path forces the JSON loader.
+            "json": _probe(data_file, os.path.join(tmp, "missing.snap")),
+            "snapshot": _probe(data_file, snap_file),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
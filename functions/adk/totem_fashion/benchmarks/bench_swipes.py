@@ -0,0 +1,84 @@
+"""
+Swipe latency as a function of session length.
+
+Fills sessions with N prior swipes, then times one more like followed by
+trait inference, which is the per-swipe work done by
+`FashionStylistAgent._recommend_from_profile`. The "recount" column replays
+the previous approach (a Counter over every like) for comparison.
+
+The incremental path must stay flat: the run exits with status 1 when its
+per-swipe time at the longest session exceeds `--max-growth` times the time
+at the shortest one. Set SESSION_MAX_EVENTS=0 to time unbounded sessions.
+
+Usage (from functions/):
+    python -m adk.totem_fashion.benchmarks.bench_swipes
+    SESSION_MAX_EVENTS=0 python -m adk.totem_fashion.benchmarks.bench_swipes --lengths 100,10000,50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict
+
+from .synthetic import generate_items
+from ..agent.session import SessionManager
+from ..tools.history_recall import infer_traits_from_history
+
+
+def _recount_traits(session: Dict[str, Any]) -> Dict[str, Any]:
+    colors = [p.get("color") for p in session["preferences"]["likes"] if p.get("color")]
+    most_common = Counter(colors).most_common(1)
+    return {"preferred_color": most_common[0][0]} if most_common else {}
+
+
+def _time_per_swipe(fn, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lengths", default="10,100,1000,10000")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--max-growth", type=float, default=1.5, help="allowed slowdown of the longest session")
+    args = parser.parse_args()
+
+    items = generate_items(1000)
+    rows = []
+    for length in (int(n) for n in args.lengths.split(",")):
+        sm = SessionManager()
+        for i in range(length):
+            (sm.add_like if i % 3 else sm.add_dislike)("s", items[i % len(items)])
+        product = items[length % len(items)]
+
+        # Each swipe stores a new snapshot: infer from the one it produced
+        def incremental() -> None:
+            sm.add_like("s", product)
+            infer_traits_from_history(sm.get_session("s"))
+
+        def recount() -> None:
+            sm.add_like("s", product)
+            _recount_traits(sm.get_session("s"))
+
+        rows.append(
+            {
+                "session_length": length,
+                "incremental_us": round(_time_per_swipe(incremental, args.repeats), 2),
+                "recount_us": round(_time_per_swipe(recount, args.repeats), 2),
+            }
+        )
+    print(json.dumps(rows, indent=2))
+    growth = rows[-1]["incremental_us"] / rows[0]["incremental_us"]
+    if growth > args.max_growth:
+        print(f"per-swipe time grew {growth:.2f}x with session length (max {args.max_growth})", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
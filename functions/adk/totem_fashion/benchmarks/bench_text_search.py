@@ -0,0 +1,84 @@
+"""
+Free-text query latency: inverted BM25 index vs the original linear scan.
+
+The scan is the pre-index `catalog_search(query=...)`: three lowercased
+substring checks per item. The index is `CatalogIndex.search(query=...)`,
+which also folds accents and ranks by relevance, so the two are compared on
+latency only. `--unique-names` appends a reference number to every name, so
+that item texts are not shared and the vocabulary grows with the catalog.
+
+Usage (from functions/):
+    python -m adk.totem_fashion.benchmarks.bench_text_search --items 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+
+from .synthetic import generate_items
+from ..tools.catalog_index import CatalogIndex
+
+QUERIES = ["calças", "calcas ganga", "camisola malha", "bomber", "vestido mulher", "cam", "anga", "lion porches", "zzz"]
+
+
+def _legacy_scan(items: List[Dict[str, Any]], query: str, limit: int) -> List[Dict[str, Any]]:
+    q = query.lower()
+    results = []
+    for item in items:
+        if (
+            q in item.get("name", "").lower()
+            or q in item.get("category", "").lower()
+            or q in item.get("brand", "").lower()
+        ):
+            results.append(item)
+    return results[:limit]
+
+
+def _median_ms(call, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        call()
+        times.append((time.perf_counter() - t0) * 1000)
+    return round(statistics.median(times), 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--unique-names", action="store_true")
+    args = parser.parse_args()
+
+    items = generate_items(args.items)
+    if args.unique_names:
+        for i, item in enumerate(items):
+            item["name"] = f"{item['name']} Ref {i:07d}"
+    index = CatalogIndex(items)
+    start = time.perf_counter()
+    text = index.text_index
+    build_s = time.perf_counter() - start
+
+    queries = {}
+    for query in QUERIES:
+        queries[query] = {
+            "scan_ms": _median_ms(lambda: _legacy_scan(items, query, args.limit), args.repeat),
+            "index_ms": _median_ms(lambda: index.search(query=query, limit=args.limit), args.repeat),
+            "matches": len(index.search(query=query, limit=-1)) if args.items <= 200_000 else None,
+        }
+    print(
+        json.dumps(
+            {"items": args.items, "vocabulary": len(text), "build_s": round(build_s, 2), "queries": queries},
+            indent=2,
+            ensure_ascii=False,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
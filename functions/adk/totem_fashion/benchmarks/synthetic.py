@@ -0,0 +1,138 @@
+"""
+Synthetic catalog generator for benchmarks.
+
+Produces products with the same schema as db_preco.json. Categories, colors
+and brands are drawn from skewed distributions so that a few values dominate,
+as they do in a real fashion catalog, and prices depend on the category.
+
+Shoppers are simulated by `Persona`s: each one has a gender, a couple of
+favourite colors and categories and a price ceiling, and likes a card with a
+probability that grows with how many of those it matches, so replayed swipe
+sequences show the same consistent taste real sessions do.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Tuple
+
+# (category, gender, base price)
+CATEGORIES = [
+    ("Camisola de Malha", None, 22.99),
+    ("Casaco Bomber", None, 39.99),
+    ("Calças de Ganga Skinny", "Mulher", 19.99),
+    ("Calças de Ganga Wide Leg", "Mulher", 19.99),
+    ("Calças de Ganga Slim Straight", None, 17.99),
+    ("Calças Loose Fit", None, 19.99),
+    ("Calças Marine", "Mulher", 22.99),
+    ("Jeans Slim Fit", None, 14.99),
+    ("Polo Jersey", "Homem", 19.99),
+    ("Polo em Malha", None, 25.99),
+    ("Casaco Acolchoado", None, 39.99),
+    ("Vestido Liocel", "Mulher", 25.99),
+    ("Vestido Comprido de Riscas", "Mulher", 19.99),
+    ("Vestido Comprido em Crochet", "Mulher", 22.99),
+    ("Pijama Polar de Natal", None, 19.99),
+    ("T-shirt Básica", None, 7.99),
+    ("Camisa Oxford", "Homem", 24.99),
+    ("Saia Midi Plissada", "Mulher", 21.99),
+    ("Blazer Estruturado", None, 44.99),
+    ("Sweatshirt com Capuz", None, 24.99),
+]
+
+COLORS = [
+    "preto", "branco", "bege", "azul escuro", "cinzento escuro", "cinzento",
+    "bege claro", "castanho", "verde", "rosa", "azul claro", "multicor",
+    "vermelho", "amarelo", "bordeaux", "caqui",
+]
+
+BRANDS = ["MO", "MO Basics", "MO Studio", "MO Kids", "Zippy", "Losan", "Salsa", "Lion of Porches"]
+
+
+def _zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    return [1.0 / (rank ** s) for rank in range(1, n + 1)]
+
+
+def generate_items(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Return `count` synthetic products with realistic attribute skew."""
+    rng = random.Random(seed)
+    cat_w = _zipf_weights(len(CATEGORIES), 0.8)
+    color_w = _zipf_weights(len(COLORS), 1.0)
+    brand_w = _zipf_weights(len(BRANDS), 1.4)
+    categories = rng.choices(CATEGORIES, cat_w, k=count)
+    colors = rng.choices(COLORS, color_w, k=count)
+    brands = rng.choices(BRANDS, brand_w, k=count)
+
+    items: List[Dict[str, Any]] = []
+    for i in range(count):
+        category, fixed_gender, base_price = categories[i]
+        gender = fixed_gender or rng.choice(("Homem", "Mulher"))
+        color = colors[i]
+        item_id = f"{41000000000 + i:015d}"
+        price = round(max(2.99, base_price * rng.uniform(0.6, 1.6)) - 0.01, 2)
+        items.append(
+            {
+                "id": item_id,
+                "name": f"{category}, {gender}, {color.title()}",
+                "brand": brands[i],
+                "category": category,
+                "gender": gender,
+                "color": color,
+                "image": f"image/{item_id}",
+                "price": price,
+            }
+        )
+    return items
+
+
+def write_catalog(path: str, count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Generate a synthetic catalog and write it to `path` as JSON."""
+    items = generate_items(count, seed)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(items, fh, ensure_ascii=False)
+    return items
+
+
+@dataclass
+class Persona:
+    """Taste of one simulated shopper."""
+
+    session_id: str
+    gender: str
+    colors: Tuple[str, ...]
+    categories: Tuple[str, ...]
+    max_price: float
+    rng: random.Random
+
+    def likes(self, item: Mapping[str, Any]) -> bool:
+        """Decide a swipe: more matching traits, more likely a like."""
+        if item.get("gender") not in (None, self.gender):
+            return self.rng.random() < 0.02
+        matches = (
+            (item.get("color") in self.colors)
+            + (item.get("category") in self.categories)
+            + ((item.get("price") or 0.0) <= self.max_price)
+        )
+        return self.rng.random() < (0.05, 0.15, 0.45, 0.8)[matches]
+
+
+def generate_personas(count: int, seed: int = 7) -> List[Persona]:
+    """Return `count` shoppers whose tastes follow the catalog's skew."""
+    rng = random.Random(seed)
+    color_w = _zipf_weights(len(COLORS), 1.0)
+    cat_w = _zipf_weights(len(CATEGORIES), 0.8)
+    personas = []
+    for i in range(count):
+        personas.append(
+            Persona(
+                session_id=f"synthetic-{seed}-{i}",
+                gender=rng.choice(("Homem", "Mulher")),
+                colors=tuple(set(rng.choices(COLORS, color_w, k=2))),
+                categories=tuple(set(c[0] for c in rng.choices(CATEGORIES, cat_w, k=3))),
+                max_price=rng.choice((20.0, 30.0, 45.0, 80.0)),
+                rng=random.Random(rng.random()),
+            )
+        )
+    return personas
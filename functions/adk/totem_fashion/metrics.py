@@ -0,0 +1,312 @@
+"""
+Low-overhead latency and throughput instrumentation.
+
+Counters and histograms live in one process-wide registry and are rendered
+in the Prometheus text format by `/metrics`. What is measured:
+
+* `http_request_duration_seconds{method, route, status}`: every API request,
+  labelled by route template (`MetricsMiddleware`);
+* `function_request_duration_seconds{entry}`: Cloud Functions entry points,
+  ASGI bridge included (`totem_api`, and `adk_webhook` where Gemini calls
+  happen);
+* `tool_duration_seconds{tool}`: tools and pipeline steps decorated with
+  `timed` (catalog search, trait inference, recommendations, outfits, ADK
+  tool calls);
+* `session_store_duration_seconds{op}`: session store reads and writes;
+* `catalog_search_items_scanned_total` / `_returned_total`: candidates probed
+  and results returned by `catalog_search`.
+
+Recording a sample is a lock, a bisect and two additions. METRICS_ENABLED=0
+turns every instrument into a no-op.
+
+Timed blocks can also emit trace spans (name, trace/span/parent ids, start,
+duration and attributes) to a sink: TRACE_SPANS=stdout prints one JSON line
+per span, and `set_span_sink(SpanCollector())` captures them in memory, as a
+stand-in for a tracing collector. Without a sink, spans cost nothing.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+ENABLED = os.environ.get("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+
+# Latency buckets in seconds, from 0.1 ms to 10 s.
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *labels: str) -> None:
+        if not ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items()) or ([((), 0.0)] if not self.labels else [])
+        return [f"{self.name}{_label_text(self.labels, key)} {value:g}" for key, value in values]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by labels."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (+Inf last), sum]
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not ENABLED:
+            return
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][slot] += 1
+            series[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted((key, list(counts), total[0]) for key, (counts, total) in self._series.items())
+        lines = []
+        for key, counts, total in snapshot:
+            running = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                running += count
+                le = bound if isinstance(bound, str) else f"{bound:g}"
+                labels = _label_text(self.labels, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {running}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {total:.9g}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {running}")
+        return lines
+
+
+_REGISTRY: Dict[str, Any] = {}
+_registry_lock = threading.Lock()
+
+
+def counter(name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+    """Return the registered counter `name`, creating it on first use."""
+    with _registry_lock:
+        return _REGISTRY.setdefault(name, Counter(name, help, labels))
+
+
+def histogram(
+    name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+) -> Histogram:
+    """Return the registered histogram `name`, creating it on first use."""
+    with _registry_lock:
+        return _REGISTRY.setdefault(name, Histogram(name, help, labels, buckets))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines: List[str] = []
+    with _registry_lock:
+        metrics = list(_REGISTRY.values())
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+HTTP_LATENCY = histogram(
+    "http_request_duration_seconds", "API request latency by route template.", ("method", "route", "status")
+)
+FUNCTION_LATENCY = histogram(
+    "function_request_duration_seconds", "Cloud Functions request latency, ASGI bridge included.", ("entry",)
+)
+TOOL_LATENCY = histogram("tool_duration_seconds", "Latency of tools and pipeline steps.", ("tool",))
+STORE_LATENCY = histogram("session_store_duration_seconds", "Session store operation latency.", ("op",))
+SEARCH_SCANNED = counter("catalog_search_items_scanned_total", "Candidate items probed by catalog_search.")
+SEARCH_RETURNED = counter("catalog_search_items_returned_total", "Items returned by catalog_search.")
+
+
+# --- Trace spans ---
+_span_sink: Optional[Callable[[Dict[str, Any]], None]] = None
+_current_span: ContextVar[Optional[Tuple[str, str]]] = ContextVar("current_span", default=None)
+
+
+class SpanCollector:
+    """In-memory span sink keeping the most recent spans (a local collector stand-in)."""
+
+    def __init__(self, maxlen: int = 10_000) -> None:
+        self._spans: "deque[Dict[str, Any]]" = deque(maxlen=maxlen)
+
+    def __call__(self, span: Dict[str, Any]) -> None:
+        self._spans.append(span)
+
+    def spans(self) -> List[Dict[str, Any]]:
+        return list(self._spans)
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+
+def _stdout_sink(span: Dict[str, Any]) -> None:
+    print(json.dumps({"severity": "DEBUG", "message": "span", **span}), flush=True)
+
+
+def set_span_sink(sink: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+    """Send finished spans to `sink` (None stops tracing)."""
+    global _span_sink
+    _span_sink = sink
+
+
+if os.environ.get("TRACE_SPANS", "").lower() == "stdout":
+    set_span_sink(_stdout_sink)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    """Trace a block as a span, nested under the enclosing span if any."""
+    sink = _span_sink
+    if sink is None:
+        yield
+        return
+    parent = _current_span.get()
+    trace_id = parent[0] if parent else secrets.token_hex(16)
+    span_id = secrets.token_hex(8)
+    token = _current_span.set((trace_id, span_id))
+    start_wall, start = time.time(), time.perf_counter()
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+        sink(
+            {
+                "name": name,
+                "trace_id": trace_id,
+                "span_id": span_id,
+                "parent_id": parent[1] if parent else None,
+                "start": start_wall,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 4),
+                "attributes": attributes,
+            }
+        )
+
+
+@contextmanager
+def timer(metric: Histogram, *labels: str) -> Iterator[None]:
+    """Observe the duration of a block in `metric` (and trace it as a span)."""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        if _span_sink is None:
+            yield
+        else:
+            with span(f"{metric.name}:{':'.join(labels)}"):
+                yield
+    finally:
+        metric.observe(time.perf_counter() - start, *labels)
+
+
+def timed(tool: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator recording a function's latency as `tool_duration_seconds{tool}`."""
+
+    def decorate(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with timer(TOOL_LATENCY, tool):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by route template.
+
+    Requests that match no route are labelled "unmatched" so that arbitrary
+    paths cannot grow the number of series.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+        status = ["500"]
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = str(message.get("status", 200))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            with span("http", method=scope.get("method"), path=scope.get("path")):
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_LATENCY.observe(
+                time.perf_counter() - start,
+                scope.get("method", ""),
+                getattr(route, "path", "unmatched"),
+                status[0],
+            )
@@ -0,0 +1,50 @@
+"""
+Lazy access to heavy optional SDKs.
+
+Importing `google.generativeai` (and configuring it) costs far more than the
+rest of the API combined, yet `/health` and the catalog endpoints never talk
+to the model. The helpers below defer that work to the first caller that
+actually needs it and cache the result for the life of the instance.
+"""
+
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+ENV_PATH = Path(__file__).resolve().parent / ".env"
+
+
+@lru_cache(maxsize=1)
+def load_local_env() -> bool:
+    """Load totem_fashion/.env once, if it exists (development only).
+
+    Returns True when variables were loaded.
+    """
+    if not ENV_PATH.exists():
+        return False
+    try:
+        from dotenv import load_dotenv
+    except Exception as e:
+        print(f"⚠️  Não foi possível carregar .env: {e}")
+        return False
+    return load_dotenv(dotenv_path=ENV_PATH)
+
+
+@lru_cache(maxsize=1)
+def get_genai() -> Optional[Any]:
+    """Import and configure the Gemini SDK on first use.
+
+    The API key comes from GEMINI_API_KEY (local .env or a Firebase secret).
+    Returns None when the library is not installed, so callers keep working.
+    """
+    try:
+        import google.generativeai as genai
+    except Exception:
+        return None
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if api_key:
+        genai.configure(api_key=api_key)
+    return genai
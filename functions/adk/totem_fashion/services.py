@@ -0,0 +1,92 @@
+"""
+Process-wide service container.
+
+The FastAPI app and the ADK tools used to build their own objects: the API
+kept a global `FashionStylistAgent`, while every ADK tool call created a fresh
+agent, session manager and store, paying construction cost each time and
+losing the session state the next call needed. `ServiceContainer` owns one
+catalog holder, session store, session manager, popularity aggregator and
+stylist agent per process and both entry points share it through
+`get_services()`.
+
+`shutdown()` flushes the analytics sink and snapshots popularity; it runs
+at interpreter exit, and on SIGTERM when no server installed its own handler.
+
+`warm_up()` builds the catalog index, fingerprint and every registered
+derived structure ahead of time, so instance startup rather than the first
+user request pays for them.
+"""
+
+from __future__ import annotations
+
+import atexit
+import signal
+import sys
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from .agent.agent import FashionStylistAgent
+from .analytics import default_event_sink
+from .agent.session import BaseSessionStore, SessionManager, default_session_store
+from .tools.catalog import CATALOG, CatalogHolder
+from .tools.popularity import PopularityAggregator
+
+
+class ServiceContainer:
+    """Owns the long-lived objects shared by every request of an instance."""
+
+    def __init__(
+        self,
+        catalog: Optional[CatalogHolder] = None,
+        store: Optional[BaseSessionStore] = None,
+    ) -> None:
+        self.catalog = catalog or CATALOG
+        self.store = store or default_session_store()
+        self.popularity = PopularityAggregator()
+        self.events = default_event_sink()
+        self.sessions = SessionManager(self.store, self.popularity, self.events)
+        self.agent = FashionStylistAgent(self.sessions, self.events)
+        self._warm = threading.Event()
+        self.warm_up_seconds: Optional[float] = None
+
+    @property
+    def is_warm(self) -> bool:
+        return self._warm.is_set()
+
+    def warm_up(self) -> Dict[str, Any]:
+        """Build indexes and derived catalog structures now; safe to call twice."""
+        start = time.perf_counter()
+        version = self.catalog.current().prepare()
+        if self.warm_up_seconds is None:
+            self.warm_up_seconds = time.perf_counter() - start
+        self._warm.set()
+        return {"catalog": version.describe(), "seconds": round(self.warm_up_seconds, 3)}
+
+    def shutdown(self) -> None:
+        """Flush queued analytics events and snapshot popularity; safe to call twice."""
+        if self.events is not None:
+            self.events.close()
+        self.popularity.save()
+
+    def install_shutdown_hooks(self) -> None:
+        """Run `shutdown` at exit, turning SIGTERM into a normal exit if unhandled."""
+        atexit.register(self.shutdown)
+        main = threading.current_thread() is threading.main_thread()
+        if main and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    def warm_up_in_background(self) -> threading.Thread:
+        """Run `warm_up` on a daemon thread so startup is not blocked."""
+        thread = threading.Thread(target=self.warm_up, name="services-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+
+@lru_cache(maxsize=1)
+def get_services() -> ServiceContainer:
+    """Return the container shared by the FastAPI app and the ADK tools."""
+    services = ServiceContainer()
+    services.install_shutdown_hooks()
+    return services
@@ -0,0 +1,111 @@
+"""
+Opt-in cold-start profiling.
+
+Set `STARTUP_PROFILE=1` to record how long each module takes to import and
+how long the first request of each entry point (`totem_api`, `adk_webhook`)
+takes, lazy app construction included. Each entry point emits one structured
+log line on its first request, e.g.::
+
+    {"severity": "INFO", "message": "startup_profile", "entry": "totem_api",
+     "first_request_ms": 812.4, "import_total_ms": 640.2, "imports": [...]}
+
+Cloud Logging parses JSON lines on stdout, so the fields can be charted per
+deploy to catch cold-start regressions. When the flag is unset, nothing is
+installed and the only cost is one boolean check per request.
+"""
+
+from __future__ import annotations
+
+import builtins
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+ENABLED = os.environ.get("STARTUP_PROFILE", "").lower() in ("1", "true", "yes")
+# Number of slowest modules included in the report.
+TOP_IMPORTS = int(os.environ.get("STARTUP_PROFILE_TOP", "25"))
+
+_process_start = time.perf_counter()
+_original_import = builtins.__import__
+_local = threading.local()
+_imports: Dict[str, Dict[str, float]] = {}
+_reported: Dict[str, bool] = {}
+_lock = threading.Lock()
+
+
+def _timed_import(name: str, globals: Any = None, locals: Any = None, fromlist: Any = (), level: int = 0) -> Any:
+    """`__import__` replacement that times modules imported for the first time."""
+    absolute = name
+    if level:
+        try:
+            absolute = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+        except (ImportError, ValueError):
+            pass
+    if absolute in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    stack: List[List[Any]] = getattr(_local, "stack", None) or []
+    _local.stack = stack
+    frame = [absolute, time.perf_counter(), 0.0]
+    stack.append(frame)
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        stack.pop()
+        elapsed = time.perf_counter() - frame[1]
+        if stack:
+            stack[-1][2] += elapsed
+        _imports.setdefault(
+            absolute,
+            {
+                "module": absolute,
+                "cumulative_ms": round(elapsed * 1000, 2),
+                "self_ms": round((elapsed - frame[2]) * 1000, 2),
+            },
+        )
+
+
+def install() -> None:
+    """Start recording import times, if profiling is enabled."""
+    if ENABLED and builtins.__import__ is not _timed_import:
+        builtins.__import__ = _timed_import
+
+
+@contextmanager
+def first_request(entry: str) -> Iterator[None]:
+    """Time the first request of an entry point and log the startup profile."""
+    if not ENABLED or _reported.get(entry):
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            if not _reported.get(entry):
+                _reported[entry] = True
+                _report(entry, time.perf_counter() - start)
+
+
+def _report(entry: str, first_request_s: float) -> None:
+    modules = sorted(_imports.values(), key=lambda m: m["self_ms"], reverse=True)
+    print(
+        json.dumps(
+            {
+                "severity": "INFO",
+                "message": "startup_profile",
+                "entry": entry,
+                "first_request_ms": round(first_request_s * 1000, 2),
+                "since_process_start_ms": round((time.perf_counter() - _process_start) * 1000, 2),
+                "import_total_ms": round(sum(m["self_ms"] for m in modules), 2),
+                "modules_imported": len(modules),
+                "imports": modules[:TOP_IMPORTS],
+            }
+        ),
+        flush=True,
+    )
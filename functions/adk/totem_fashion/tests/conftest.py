@@ -0,0 +1,12 @@
+"""
+Shared test setup.
+
+Snapshots and analytics files are disabled before the package modules read
+their configuration, so tests never touch the temp directory of a real run.
+"""
+
+import os
+
+os.environ["POPULARITY_FILE"] = ""
+os.environ["ANALYTICS_DIR"] = ""
+os.environ.pop("SESSION_DB_PATH", None)
@@ -0,0 +1,52 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from ..api.admission import ADMISSION
+from ..api.app import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def saturated(monkeypatch):
+    # As if two requests were being served with room for two
+    monkeypatch.setattr(ADMISSION, "max_in_flight", 2)
+    monkeypatch.setattr(ADMISSION, "in_flight", 2)
+    yield ADMISSION
+
+
+def test_requests_beyond_the_limit_get_a_fast_503(client, saturated):
+    shed = saturated.shed
+
+    response = client.get("/discover", params={"session_id": "s"})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(saturated.retry_after)
+    assert response.json()["detail"]
+    assert saturated.shed == shed + 1
+    assert saturated.in_flight == 2
+
+
+@pytest.mark.parametrize("path", ["/health", "/metrics"])
+def test_health_and_metrics_are_always_admitted(client, saturated, path):
+    assert client.get(path).status_code == 200
+
+
+def test_admitted_requests_release_their_slot(client, monkeypatch):
+    monkeypatch.setattr(ADMISSION, "max_in_flight", 1)
+    before = ADMISSION.in_flight
+
+    for _ in range(3):
+        assert client.get("/discover", params={"session_id": "s"}).status_code == 200
+
+    assert ADMISSION.in_flight == before
+
+
+def test_zero_disables_shedding(client, monkeypatch):
+    monkeypatch.setattr(ADMISSION, "max_in_flight", 0)
+    monkeypatch.setattr(ADMISSION, "in_flight", 1000)
+
+    assert client.get("/discover", params={"session_id": "s"}).status_code == 200
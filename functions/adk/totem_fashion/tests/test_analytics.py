@@ -0,0 +1,102 @@
+import glob
+import gzip
+import json
+import os
+import threading
+
+from ..analytics import EventSink
+
+
+def _read(directory):
+    events = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.jsonl.gz"))):
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            events += [json.loads(line) for line in fh]
+    return events
+
+
+def test_flush_writes_gzip_json_lines(tmp_path):
+    sink = EventSink(str(tmp_path), flush_seconds=60)
+    sink.swipe("like", "s1", "a", 1.0)
+    sink.swipe("dislike", "s1", "b", 2.0)
+    sink.outfit("s1", "a", {"items": [{"id": "a"}, {"id": "c"}], "total_price": 99.9}, "lookbook")
+
+    assert sink.flush(timeout=5)
+    # Still open: only the .part file exists, and it already reads as gzip
+    (part,) = glob.glob(str(tmp_path / "*.part"))
+    with gzip.open(part, "rt", encoding="utf-8") as fh:
+        assert [json.loads(line)["type"] for line in fh] == ["like", "dislike", "outfit"]
+
+    assert sink.close(timeout=5)
+    assert not glob.glob(str(tmp_path / "*.part"))
+    events = _read(tmp_path)
+    assert events[0] == {"type": "like", "session": "s1", "item": "a", "ts": 1.0}
+    assert events[2]["items"] == ["a", "c"]
+    assert sink.stats()["flushed"] == 3
+
+
+def test_full_queue_drops_and_counts(tmp_path):
+    sink = EventSink(str(tmp_path), queue_size=1, batch_size=1, flush_seconds=60)
+    writing, release = threading.Event(), threading.Event()
+    write = sink._writer.write
+
+    def slow_write(lines):
+        writing.set()
+        release.wait(5)
+        write(lines)
+
+    sink._writer.write = slow_write
+    assert sink.swipe("like", "s", "a", 1.0)
+    assert writing.wait(5)  # the worker holds "a"; the queue has room for one
+    assert sink.swipe("like", "s", "b", 2.0)
+    assert not sink.swipe("like", "s", "c", 3.0)
+
+    release.set()
+    assert sink.close(timeout=5)
+    assert [event["item"] for event in _read(tmp_path)] == ["a", "b"]
+    assert sink.stats()["dropped"] == 1
+
+
+def test_files_rotate_by_size(tmp_path):
+    sink = EventSink(str(tmp_path), batch_size=1, flush_seconds=60, rotate_bytes=1)
+    for n in range(3):
+        sink.swipe("like", "s", str(n), float(n))
+        assert sink.flush(timeout=5)
+    sink.close(timeout=5)
+
+    assert len(glob.glob(str(tmp_path / "*.jsonl.gz"))) == 3
+    assert [event["item"] for event in _read(tmp_path)] == ["0", "1", "2"]
+
+
+def test_emit_after_close_is_dropped(tmp_path):
+    sink = EventSink(str(tmp_path))
+    sink.close(timeout=5)
+
+    assert not sink.swipe("like", "s", "a", 1.0)
+    assert sink.close() is True
+    assert sink.stats()["dropped"] == 1
+
+
+def test_close_waits_for_an_emit_already_under_way(tmp_path):
+    sink = EventSink(str(tmp_path), flush_seconds=60)
+    putting, release = threading.Event(), threading.Event()
+    put = sink._queue.put_nowait
+
+    def slow_put(event):
+        putting.set()
+        release.wait(5)
+        put(event)
+
+    sink._queue.put_nowait = slow_put
+    emitter = threading.Thread(target=sink.swipe, args=("like", "s", "a", 1.0))
+    emitter.start()
+    assert putting.wait(5)  # past the closed check, not yet queued
+    closer = threading.Thread(target=sink.close, kwargs={"timeout": 5})
+    closer.start()
+    closer.join(0.2)
+
+    release.set()
+    emitter.join(5)
+    closer.join(5)
+    assert [event["item"] for event in _read(tmp_path)] == ["a"]
+    assert sink.stats()["pending"] == 0
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ..api.app import app
+from ..tools.catalog import current_catalog
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def item_id():
+    return current_catalog().items[0]["id"]
+
+
+def _batch(client, ts, item_id):
+    return client.post(
+        "/swipe/batch",
+        params={"session_id": "batch-ts"},
+        json={"events": [{"type": "like", "product_id": item_id, "ts": ts}]},
+    )
+
+
+def test_batch_accepts_recent_timestamps(client, item_id):
+    response = _batch(client, time.time() - 60, item_id)
+    assert response.status_code == 200
+    assert response.json()["applied"] == 1
+
+
+@pytest.mark.parametrize("ts", [time.time() * 1000, time.time() + 3600, -1.0])
+def test_batch_rejects_implausible_timestamps(client, item_id, ts):
+    assert _batch(client, ts, item_id).status_code == 422
+
+
+def test_outfit_for_unknown_seed_is_404(client):
+    response = client.get("/outfit", params={"session_id": "s", "seed_id": "nao-existe"})
+    assert response.status_code == 404
+
+
+def test_similar_for_unknown_item_is_404(client):
+    assert client.get("/similar", params={"item_id": "nao-existe"}).status_code == 404
+
+
+@pytest.mark.parametrize("upsert", [{"name": "Sem id"}, {"id": 7, "name": "Id numérico"}])
+def test_delta_rejects_upserts_without_a_string_id(client, monkeypatch, upsert):
+    monkeypatch.setenv("CATALOG_ADMIN_TOKEN", "segredo")
+    version = current_catalog().version
+
+    response = client.post("/catalog/delta", headers={"x-admin-token": "segredo"}, json={"upserts": [upsert]})
+
+    assert response.status_code == 422
+    assert current_catalog().version == version
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+
+import pytest
+
+from ..api.asgi_bridge import AsgiBridge
+
+SCOPE = {"type": "http", "method": "GET", "path": "/"}
+
+
+@pytest.fixture(scope="module")
+def bridge():
+    return AsgiBridge()
+
+
+def _app(*bodies, gate=None):
+    async def app(scope, receive, send):
+        request = await receive()
+        assert request["type"] == "http.request"
+        await send({"type": "http.response.start", "status": 201, "headers": [(b"x-a", b"1")]})
+        for n, body in enumerate(bodies):
+            if n == 1 and gate is not None:
+                await asyncio.get_running_loop().run_in_executor(None, gate.wait, 5)
+            await send({"type": "http.response.body", "body": body, "more_body": n < len(bodies) - 1})
+
+    return app
+
+
+def test_single_chunk_is_returned_as_is(bridge):
+    body = b'{"ok":true}'
+
+    status, headers, returned = bridge.run(_app(body), SCOPE, b"")
+
+    assert (status, headers) == (201, [(b"x-a", b"1")])
+    assert returned is body
+
+
+def test_streamed_body_yields_chunks_as_they_arrive(bridge):
+    gate = threading.Event()
+
+    status, _, body = bridge.run(_app(b"a", b"b", b"", b"c", gate=gate), SCOPE, b"")
+
+    assert status == 201
+    assert next(body) == b"a"  # while the app still waits to send the rest
+    gate.set()
+    assert list(body) == [b"b", b"c"]
+
+
+def test_request_body_reaches_the_app(bridge):
+    async def echo(scope, receive, send):
+        request = await receive()
+        await send({"type": "http.response.start", "status": 200})
+        await send({"type": "http.response.body", "body": request["body"]})
+
+    assert bridge.run(echo, SCOPE, b"payload")[2] == b"payload"
+
+
+def test_errors_surface_in_the_caller(bridge):
+    async def broken(scope, receive, send):
+        raise LookupError("sem resposta")
+
+    async def silent(scope, receive, send):
+        return None
+
+    with pytest.raises(LookupError):
+        bridge.run(broken, SCOPE, b"")
+    with pytest.raises(RuntimeError):
+        bridge.run(silent, SCOPE, b"")
+
+
+def test_requests_share_one_loop(bridge):
+    async def current():
+        return asyncio.get_running_loop()
+
+    assert bridge.submit(current()).result(5) is bridge.submit(current()).result(5) is bridge.loop
@@ -0,0 +1,140 @@
+import random
+import threading
+
+import pytest
+
+from ..agent.session import InMemoryStore, SessionManager
+from ..benchmarks.synthetic import generate_items
+from ..tools import popularity as popularity_module
+from ..tools.catalog import CATALOG, current_catalog
+from ..tools.deck import DeckService, decode_cursor, encode_cursor
+from ..tools.popularity import PopularityAggregator
+
+
+@pytest.fixture
+def catalog():
+    original = current_catalog().items
+    yield CATALOG.replace(generate_items(500), source="test-deck")
+    CATALOG.replace(original, source="test-deck-restore")
+
+
+def _manager():
+    return SessionManager(InMemoryStore(), popularity=PopularityAggregator(path="", snapshot_seconds=0))
+
+
+def test_walk_while_popularity_changes_deals_every_product_once(catalog, monkeypatch):
+    monkeypatch.setattr(popularity_module, "RANK_TTL", 0.0)
+    sm = _manager()
+    rng = random.Random(7)
+    for n in range(50):
+        sm.add_like(f"other-{n % 5}", rng.choice(catalog.items))
+    deck = DeckService(sm, max_entries=0)
+
+    served, cursor = [], None
+    while True:
+        page = deck.page("kiosk", cursor=cursor, limit=20)
+        served += [item["id"] for item in page.items]
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+        # Other kiosks keep reshaping the ranking between pages
+        for n in range(5):
+            sm.add_like(f"other-{n}", rng.choice(catalog.items))
+
+    assert len(served) == len(set(served)) == len(catalog.items)
+
+
+def test_deck_opens_with_the_popular_products(catalog):
+    sm = _manager()
+    liked = [catalog.items[pos] for pos in (10, 200, 499)]
+    for item in liked:
+        sm.add_like("other", item)
+
+    page = DeckService(sm, max_entries=0).page("kiosk", limit=40)
+    head = decode_cursor(page.next_cursor)[2]
+
+    # Liked products lead; their category and color pull in a few more
+    assert {10, 200, 499} <= set(head)
+    assert {item["id"] for item in page.items[: len(head)]} == {catalog.items[pos]["id"] for pos in head}
+
+
+def test_cursor_resumes_the_same_page_anywhere(catalog):
+    sm = _manager()
+    sm.add_like("other", catalog.items[42])
+    first = DeckService(sm, max_entries=0).page("kiosk", limit=10)
+    second = DeckService(sm, max_entries=0).page("kiosk", cursor=first.next_cursor, limit=10)
+
+    # Another instance, with popularity that looks nothing like the first one
+    elsewhere = _manager()
+    for item in catalog.items[:30]:
+        elsewhere.add_like("other", item)
+    again = DeckService(elsewhere, max_entries=0).page("kiosk", cursor=first.next_cursor, limit=10)
+
+    assert [item["id"] for item in again.items] == [item["id"] for item in second.items]
+    assert again.next_cursor == second.next_cursor
+
+
+def test_deck_without_votes_is_a_plain_shuffle(catalog):
+    served = []
+    deck, cursor = DeckService(_manager(), max_entries=0), None
+    while True:
+        page = deck.page("kiosk", category=catalog.items[0]["category"], cursor=cursor, limit=25)
+        served += [item["id"] for item in page.items]
+        assert page.next_cursor is None or decode_cursor(page.next_cursor)[2] == ()
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+
+    expected = [item["id"] for item in catalog.items if item["category"] == catalog.items[0]["category"]]
+    assert sorted(served) == sorted(expected)
+    assert served != expected
+
+
+def test_swiped_products_are_skipped(catalog):
+    sm = _manager()
+    sm.add_like("kiosk", catalog.items[3])
+    sm.add_dislike("kiosk", catalog.items[4])
+
+    deck, served, cursor = DeckService(sm, max_entries=0), [], None
+    while True:
+        page = deck.page("kiosk", cursor=cursor, limit=50)
+        served += [item["id"] for item in page.items]
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+
+    assert len(served) == len(set(served)) == len(catalog.items) - 2
+    assert catalog.items[3]["id"] not in served
+
+
+@pytest.mark.parametrize("cursor", ["não-é-base64", encode_cursor(1, 2)[:-3], encode_cursor(1, 2) + "AA"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(2**64 - 1, 7, (3, 1, 2))) == (2**64 - 1, 7, (3, 1, 2))
+    assert decode_cursor(encode_cursor(5, 0)) == (5, 0, ())
+
+
+def test_prefetch_backlog_is_bounded(catalog):
+    deck = DeckService(_manager(), max_backlog=2)
+    for sid in ("a", "b", "c"):
+        deck.page(sid, limit=5)
+    busy, release = threading.Event(), threading.Event()
+    deck._executor.submit(lambda: (busy.set(), release.wait(5)))
+    assert busy.wait(5)
+
+    for _ in range(3):
+        deck.prefetch("a")  # one queued per session
+    deck.prefetch("b")
+    deck.prefetch("c")  # over the backlog
+    assert deck.stats()["prefetch_backlog"] == 2
+
+    release.set()
+    deck._executor.shutdown(wait=True)
+    stats = deck.stats()
+    assert (stats["prefetched"], stats["prefetch_dropped"], stats["prefetch_backlog"]) == (2, 1, 0)
+    assert deck.page("a", cursor=deck._next["a"][1], limit=5) is not None
+    assert deck.stats()["hits"] == 1
@@ -0,0 +1,28 @@
+from ..agent.session import InMemoryStore, SessionManager
+from ..tools.history_recall import infer_traits_from_history, rebuild_aggregates
+
+
+def _product(i, color="preto"):
+    return {"id": str(i), "category": "Camisa", "color": color, "price": 19.9}
+
+
+def test_aggregates_keep_counting_past_the_ring_buffers():
+    sm = SessionManager(InMemoryStore(max_events=5))
+    for i in range(8):
+        sm.add_like("s", _product(i, "azul" if i < 6 else "preto"))
+    session = sm.get_session("s")
+
+    assert len(session["preferences"]["likes"]) == 5
+    assert session["aggregates"]["likes"]["total"] == 8
+    assert infer_traits_from_history(session)["preferred_color"] == "azul"
+
+
+def test_rebuild_only_sees_the_buffered_products():
+    sm = SessionManager(InMemoryStore(max_events=5))
+    for i in range(8):
+        sm.add_like("s", _product(i))
+
+    rebuilt = rebuild_aggregates(sm.get_session("s"))
+
+    assert rebuilt["likes"]["total"] == 5
+    assert rebuilt["likes"]["color"]["counts"] == {"preto": 5}
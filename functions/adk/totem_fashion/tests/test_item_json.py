@@ -0,0 +1,50 @@
+import json
+
+from ..tools.catalog import CatalogVersion
+from ..tools.item_json import ItemJSON, parse_fields
+
+ITEMS = [
+    {"id": "a", "name": "Camisa Ávila", "price": 29.9, "image": "a.jpg", "color": "azul"},
+    {"id": "b", "name": "Calça", "price": 59.0, "image": "b.jpg"},
+]
+
+
+def _encoder():
+    return ItemJSON(CatalogVersion(ITEMS, version=1, source="test"))
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields(" , ") is None
+    assert parse_fields("id, price,id") == ("id", "price")
+
+
+def test_fragments_are_projected_and_cached():
+    encoder = _encoder()
+
+    full = encoder.fragment(0)
+    projected = encoder.fragment(0, ("id", "price", "missing"))
+
+    assert json.loads(full) == ITEMS[0]
+    assert "Ávila" in full.decode("utf-8")
+    assert json.loads(projected) == {"id": "a", "price": 29.9}
+    assert encoder.fragment(0, ("id", "price", "missing")) is projected
+
+
+def test_every_product_of_a_response_gets_the_projection():
+    encoder = _encoder()
+    modified = {**ITEMS[1], "price": 10.0}
+    unknown = {"id": "z", "name": "Fora do catálogo", "price": 5.0, "image": "z.jpg"}
+    payload = {"suggestions": [ITEMS[0], modified, unknown], "hint": "olá"}
+
+    decoded = json.loads(encoder.encode(payload, ("id", "image", "price")))
+
+    assert decoded == {
+        "suggestions": [
+            {"id": "a", "image": "a.jpg", "price": 29.9},
+            {"id": "b", "image": "b.jpg", "price": 10.0},
+            {"id": "z", "image": "z.jpg", "price": 5.0},
+        ],
+        "hint": "olá",
+    }
+    assert json.loads(encoder.encode(payload)) == payload
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from ..tools import compatibility
+from ..tools.catalog import CatalogVersion, current_catalog
+from ..tools.lookbook import Lookbook, build_lookbook
+from ..tools.outfit_composer import compose_outfit_from_seed
+
+
+@pytest.fixture(scope="module")
+def source(tmp_path_factory):
+    path = tmp_path_factory.mktemp("lookbook") / "catalog.json"
+    path.write_text(json.dumps([dict(item) for item in current_catalog().items]), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def lookbook(source):
+    return build_lookbook(source, tiers=(None, 50.0), workers=1)
+
+
+def _catalog(source, version):
+    with open(source, encoding="utf-8") as fh:
+        return CatalogVersion(json.load(fh), version=version, source="test")
+
+
+def _ids(outfit):
+    return [item["id"] for item in outfit["items"]]
+
+
+def test_lookbook_serves_what_the_composer_would(source, lookbook):
+    catalog = _catalog(source, 1)
+    for seed in catalog.items:
+        for budget in (None, 50.0):
+            expected = compose_outfit_from_seed(seed, budget, catalog)
+            assert _ids(lookbook.outfit(catalog, seed["id"], budget)) == _ids(expected)
+
+
+def test_lookbook_misses_off_tier(source, lookbook):
+    catalog = _catalog(source, 1)
+    seed_id = catalog.items[0]["id"]
+
+    assert lookbook.outfit(catalog, seed_id, 60.0) is None
+    assert lookbook.outfit(catalog, seed_id, None, k=2) is None
+    assert lookbook.outfit(catalog, "não-existe") is None
+
+
+def test_lookbook_misses_after_the_tables_change(source, lookbook, tmp_path, monkeypatch):
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"compatibility": {"color_pairs": {"preto": ["rosa"]}}}), encoding="utf-8")
+    monkeypatch.setattr(compatibility, "CONFIG_FILE", str(config))
+    # Same items, so same fingerprint; only the stylist's tables changed
+    catalog = _catalog(source, 2)
+
+    assert catalog.fingerprint == lookbook.fingerprint
+    assert lookbook.outfit(catalog, catalog.items[0]["id"]) is None
+
+
+def test_lookbook_round_trip(lookbook, tmp_path):
+    path = str(tmp_path / "lookbook.npz")
+    lookbook.save(path)
+
+    loaded = Lookbook.load(path)
+
+    assert (loaded.fingerprint, loaded.tables, loaded.tiers) == (lookbook.fingerprint, lookbook.tables, lookbook.tiers)
+    assert (loaded.members == lookbook.members).all()
@@ -0,0 +1,67 @@
+from types import MappingProxyType
+
+import pytest
+
+from ..tools.catalog import CatalogVersion
+from ..tools.memo import VersionedMemo, freeze, thaw
+
+ITEMS = [{"id": "a", "color": "azul"}]
+
+
+def _catalog(version):
+    return CatalogVersion(ITEMS, version=version, source="test")
+
+
+def test_freeze_and_thaw_round_trip():
+    value = {"items": [{"id": "a", "tags": ["x"]}], "total": 1.5}
+
+    frozen = freeze(value)
+
+    assert isinstance(frozen, MappingProxyType)
+    assert frozen["items"] == ({"id": "a", "tags": ("x",)},)
+    with pytest.raises(TypeError):
+        frozen["items"][0]["id"] = "b"
+    assert thaw(frozen) == value
+    thawed = thaw(frozen)
+    thawed["items"][0]["tags"].append("y")
+    assert frozen["items"][0]["tags"] == ("x",)
+
+
+def test_results_are_frozen_and_memoized_per_version():
+    memo = VersionedMemo("test-memo-versions")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return [{"id": "a"}]
+
+    v1 = _catalog(1)
+    first = memo.get_or_compute(v1, "key", compute)
+    assert memo.get_or_compute(v1, "key", compute) is first
+    assert first == ({"id": "a"},) and len(calls) == 1
+
+    memo.get_or_compute(_catalog(2), "key", compute)
+    assert len(calls) == 2
+    assert memo.stats() == {"hits": 1, "misses": 2, "evictions": 0, "invalidations": 1, "maxsize": memo.maxsize}
+
+
+def test_lru_evicts_the_oldest_key():
+    memo = VersionedMemo("test-memo-lru", maxsize=2)
+    catalog = _catalog(1)
+    for key in ("a", "b", "a", "c"):
+        memo.get_or_compute(catalog, key, lambda: key)
+
+    calls = []
+    memo.get_or_compute(catalog, "b", lambda: calls.append("b"))
+
+    assert calls == ["b"]
+    assert memo.stats()["evictions"] == 2
+
+
+def test_zero_size_disables_the_cache():
+    memo = VersionedMemo("test-memo-off", maxsize=0)
+    calls = []
+    for _ in range(2):
+        memo.get_or_compute(_catalog(1), "key", lambda: calls.append(1) or {"n": len(calls)})
+
+    assert len(calls) == 2
@@ -0,0 +1,70 @@
+import itertools
+import random
+
+import pytest
+
+from ..tools.outfit_solver import top_k_outfits
+
+_EPS = 1e-9
+
+
+def _groups(rng, sizes):
+    pos = itertools.count()
+    return [
+        sorted(
+            ((rng.choice((200, 250, 300)), float(rng.randint(10, 60)), next(pos)) for _ in range(size)),
+            key=lambda c: (-c[0], c[1], c[2]),
+        )
+        for size in sizes
+    ]
+
+
+def _brute_force(groups, budget):
+    """Every combination the solver may return: in budget, none missing a piece that fits."""
+    outfits = []
+    for combo in itertools.product(*[[None, *group] for group in groups]):
+        picked = [c for c in combo if c is not None]
+        price = sum(c[1] for c in picked)
+        if budget is not None and price > budget + _EPS:
+            continue
+        left = None if budget is None else budget - price
+        if any(c is None and group and (left is None or min(o[1] for o in group) <= left + _EPS)
+               for c, group in zip(combo, groups)):
+            continue
+        outfits.append((sum(c[0] for c in picked), price, frozenset(c[2] for c in picked)))
+    return sorted(outfits, key=lambda o: (-o[0], o[1]))
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("budget", [None, 40.0, 90.0])
+def test_top_k_matches_brute_force(seed, budget):
+    rng = random.Random(seed)
+    groups = _groups(rng, [rng.randint(0, 4) for _ in range(3)])
+    k = 4
+
+    found = top_k_outfits(groups, k, budget)
+    expected = _brute_force(groups, budget)
+
+    assert [(value, price) for value, price, _ in found] == [(value, price) for value, price, _ in expected[:k]]
+    for value, price, chosen in found:
+        assert budget is None or price <= budget + _EPS
+        assert (value, price, frozenset(chosen)) in expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_alternatives_are_not_subsets_of_each_other(seed):
+    rng = random.Random(seed)
+    groups = _groups(rng, [3, 3, 3])
+
+    found = [set(chosen) for _, _, chosen in top_k_outfits(groups, 5, budget=70.0)]
+
+    for a, b in itertools.permutations(found, 2):
+        assert not a <= b
+
+
+def test_best_outfit_keeps_a_piece_its_alternatives_drop():
+    groups = [[(300, 10.0, 0)], [(300, 10.0, 1), (250, 10.0, 2)]]
+
+    found = top_k_outfits(groups, 5)
+
+    assert [chosen for _, _, chosen in found] == [(0, 1), (0, 2)]
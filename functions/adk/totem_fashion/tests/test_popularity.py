@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+from ..tools.catalog import current_catalog
+from ..tools.popularity import PopularityAggregator
+
+HALF_LIFE_S = 24 * 3600
+
+
+@pytest.fixture
+def catalog():
+    return current_catalog()
+
+
+def _aggregator(path=""):
+    return PopularityAggregator(half_life_hours=24, path=path, snapshot_seconds=0)
+
+
+def _net(agg, item_id):
+    counts = agg.counts["item"]
+    return counts.net()[counts.slots[item_id]]
+
+
+def test_future_timestamps_do_not_wipe_the_counts(catalog):
+    agg = _aggregator()
+    item = catalog.items[3]
+    agg.record("like", item)
+    agg.record("like", item)
+    before = agg.scores(catalog)[3]
+
+    agg.record("like", catalog.items[5], ts=time.time() * 1000)
+
+    assert agg.t0 <= time.time()
+    assert agg.scores(catalog)[3] == pytest.approx(before)
+    assert _net(agg, catalog.items[5]["id"]) == pytest.approx(1.0, rel=1e-3)
+
+
+def test_votes_halve_every_half_life(catalog):
+    agg = _aggregator()
+    now = time.time()
+    a, b = catalog.items[0]["id"], catalog.items[1]["id"]
+    agg.record("like", {"id": a}, ts=now)
+    agg.record("like", {"id": b}, ts=now - HALF_LIFE_S)
+    agg.record("like", {"id": b}, ts=now - HALF_LIFE_S)
+
+    assert _net(agg, b) == pytest.approx(_net(agg, a), rel=1e-3)
+
+
+def test_rescale_keeps_relative_counts(catalog):
+    agg = _aggregator()
+    a, b = catalog.items[0]["id"], catalog.items[1]["id"]
+    agg.record("like", {"id": a})
+    agg.record("dislike", {"id": b})
+    ratio = _net(agg, b) / _net(agg, a)
+    # Pretend the instance has been up for 50 half-lives
+    shift = 50 * HALF_LIFE_S
+    agg.t0 -= shift
+    for counts in agg.counts.values():
+        counts.votes *= 2.0 ** 50
+
+    agg.record("like", {"id": "outro"})
+
+    assert agg.t0 == pytest.approx(time.time(), abs=5)
+    assert _net(agg, b) / _net(agg, a) == pytest.approx(ratio)
+    assert _net(agg, "outro") == pytest.approx(1.0, rel=1e-3)
+
+
+def test_ranking_puts_voted_items_first_and_keeps_file_order(catalog):
+    agg = _aggregator()
+    last = catalog.items[-1]["id"]
+    for _ in range(3):
+        agg.record("like", catalog.items[-1])
+
+    ranking = list(agg.ranking(catalog))
+
+    assert catalog.items[ranking[0]]["id"] == last
+    assert sorted(ranking) == list(range(len(catalog.items)))
+
+
+def test_snapshot_round_trip(tmp_path, catalog):
+    path = str(tmp_path / "pop.npz")
+    agg = _aggregator(path)
+    agg.record("like", catalog.items[2])
+    agg.save()
+
+    restored = _aggregator(path)
+
+    assert restored.events == 1
+    assert _net(restored, catalog.items[2]["id"]) == pytest.approx(1.0, rel=1e-3)
+
+
+def test_snapshot_from_the_future_is_ignored(tmp_path, catalog):
+    path = str(tmp_path / "pop.npz")
+    agg = _aggregator(path)
+    agg.record("like", catalog.items[2])
+    agg.t0 = time.time() * 1000
+    agg.save()
+
+    assert _aggregator(path).events == 0
@@ -0,0 +1,160 @@
+import threading
+
+import pytest
+
+from ..agent.session import AppendLog, InMemoryStore, SessionManager
+from ..tools.catalog import current_catalog
+
+
+class _Recorder:
+    """Stands in for the popularity aggregator and the analytics sink."""
+
+    def __init__(self):
+        self.calls = []
+
+    def record(self, kind, product, ts=None):
+        self.calls.append((kind, product["id"]))
+
+    def swipe(self, kind, session_id, item_id, ts):
+        self.calls.append((kind, item_id))
+
+
+class _LoggingStore(InMemoryStore):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def append_event(self, session_id, event):
+        self.events.append((event.type, event.item_id))
+
+
+@pytest.fixture
+def items():
+    return current_catalog().items
+
+
+def test_failed_batch_leaves_no_trace(items):
+    popularity, sink, store = _Recorder(), _Recorder(), _LoggingStore()
+    sm = SessionManager(store, popularity=popularity, events=sink)
+    sm.add_like("s", items[0])
+    before = sm.get_session("s")
+
+    with pytest.raises(AttributeError):
+        sm.record_batch("s", [("like", items[1], None), ("dislike", None, None)])
+
+    after = sm.get_session("s")
+    assert after is before
+    assert [p["id"] for p in after["preferences"]["likes"]] == [items[0]["id"]]
+    assert popularity.calls == sink.calls == store.events == [("like", items[0]["id"])]
+
+
+def test_stored_swipes_are_published_in_order(items):
+    popularity, sink, store = _Recorder(), _Recorder(), _LoggingStore()
+    sm = SessionManager(store, popularity=popularity, events=sink)
+
+    assert sm.record_batch("s", [("like", items[0], 10.0), ("dislike", items[1], 11.0)]) == 2
+
+    expected = [("like", items[0]["id"]), ("dislike", items[1]["id"])]
+    assert popularity.calls == sink.calls == store.events == expected
+    assert [event.ts for event in sm.get_session("s")["history"]] == [10.0, 11.0]
+
+
+def test_concurrent_swipes_on_one_session_are_not_lost(items):
+    sm = SessionManager(InMemoryStore())
+    threads, swipes = 8, 50
+    barrier = threading.Barrier(threads)
+
+    def worker(w):
+        barrier.wait()
+        for n in range(swipes):
+            (sm.add_like if n % 2 else sm.add_dislike)("s", items[(w + n) % len(items)])
+
+    pool = [threading.Thread(target=worker, args=(w,)) for w in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    session = sm.get_session("s")
+    aggregates = session["aggregates"]
+    assert aggregates["likes"]["total"] + aggregates["dislikes"]["total"] == threads * swipes
+    assert len(session["history"]) == threads * swipes
+
+
+def test_snapshots_are_not_changed_by_later_writes(items):
+    sm = SessionManager(InMemoryStore())
+    sm.add_like("s", items[0])
+    snapshot = sm.get_session("s")
+
+    sm.add_like("s", items[1])
+    sm.set_trait("s", "preferred_color", "preto")
+
+    assert len(snapshot["preferences"]["likes"]) == 1
+    assert "preferred_color" not in snapshot["traits"]
+    assert sm.get_session("s")["traits"]["preferred_color"] == "preto"
+
+
+def test_append_log_copies_see_only_their_own_appends():
+    log = AppendLog([1, 2])
+    copy = log.copy()
+    copy.append(3)
+    # The original appends behind the copy's back: it forks, the copy keeps its entries
+    log.append(4)
+
+    assert list(log) == [1, 2, 4]
+    assert list(copy) == [1, 2, 3]
+    assert copy[-1] == 3 and copy[1:] == [2, 3]
+
+
+def test_append_log_ring_buffer_and_marks():
+    log = AppendLog(range(3), maxlen=4)
+    mark = log.total
+    for n in range(3, 20):
+        log.append(n)
+
+    assert list(log) == [16, 17, 18, 19]
+    assert log.total == 20
+    assert log.since(mark) == [16, 17, 18, 19]
+    assert log.since(18) == [18, 19]
+
+
+def test_swipes_share_the_history_between_snapshots(items):
+    sm = SessionManager(InMemoryStore())
+    for n in range(100):
+        sm.add_like("s", items[n % len(items)])
+    before = sm.get_session("s")
+
+    sm.add_like("s", items[0])
+
+    after = sm.get_session("s")
+    assert len(before["history"]) == 100 and len(after["history"]) == 101
+    assert list(after["history"])[:100] == list(before["history"])
+    assert after["history"].since(before["history"].total) == [after["history"][-1]]
+
+
+def test_a_blocked_sink_does_not_hold_the_stripe(items):
+    entered, release = threading.Event(), threading.Event()
+
+    class BlockingSink(_Recorder):
+        def swipe(self, kind, session_id, item_id, ts):
+            if session_id == "slow":
+                entered.set()
+                release.wait(5)
+            super().swipe(kind, session_id, item_id, ts)
+
+    sink = BlockingSink()
+    sm = SessionManager(InMemoryStore(), events=sink, stripes=1)
+    slow = threading.Thread(target=sm.add_like, args=("slow", items[0]))
+    slow.start()
+    assert entered.wait(5)
+
+    done = threading.Thread(target=sm.add_like, args=("fast", items[1]))
+    done.start()
+    done.join(2)
+    stalled = done.is_alive()
+    release.set()
+    slow.join()
+    done.join()
+
+    assert not stalled
+    assert sink.calls == [("like", items[1]["id"]), ("like", items[0]["id"])]
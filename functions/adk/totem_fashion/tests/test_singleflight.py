@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from ..agent.session import InMemoryStore, SessionManager
+from ..tools.catalog import current_catalog
+from ..tools.deck import DeckService
+from ..tools import singleflight
+from ..tools.singleflight import SingleFlight
+
+
+@pytest.fixture(autouse=True)
+def _enabled(monkeypatch):
+    monkeypatch.setattr(singleflight, "ENABLED", True)
+
+
+def _together(count, target):
+    barrier = threading.Barrier(count)
+    results, errors = [None] * count, []
+
+    def run(i):
+        barrier.wait()
+        try:
+            results[i] = target(i)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_computation():
+    flight, calls = SingleFlight("test-shared"), []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return object()
+
+    results, errors = _together(8, lambda i: flight.do("k", compute))
+
+    assert not errors
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"leaders": 1, "shared": 7, "in_flight": 0}
+
+
+def test_waiters_get_the_leaders_exception_and_nothing_is_cached():
+    flight = SingleFlight("test-error")
+
+    def fail():
+        time.sleep(0.2)
+        raise KeyError("boom")
+
+    _, errors = _together(4, lambda i: flight.do("k", fail))
+
+    assert len(errors) == 4 and all(isinstance(exc, KeyError) for exc in errors)
+    assert flight.do("k", lambda: "ok") == "ok"
+
+
+class _SlowPopularity:
+    """Stands in for PopularityAggregator, counting head computations."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def record(self, kind, product, ts=None):
+        pass
+
+    def popular(self, catalog, category=None, k=30):
+        self.calls += 1
+        time.sleep(0.2)
+        return list(catalog.index.positions(category))[:2]
+
+
+def test_kiosks_opening_the_same_category_share_the_head():
+    popularity = _SlowPopularity()
+    sm = SessionManager(InMemoryStore(), popularity=popularity)
+    deck = DeckService(sm, max_entries=0)
+    category = current_catalog().items[0]["category"]
+    sm.add_like("kiosk-1", current_catalog().items[0])
+
+    pages, errors = _together(8, lambda i: deck.page(f"kiosk-{i}", category))
+
+    assert not errors
+    assert popularity.calls == 1
+    first = current_catalog().items[0]["id"]
+    # Shared head, per-session filtering: kiosk-1 already liked the first product
+    assert first not in [item["id"] for item in pages[1].items]
+    assert first in [item["id"] for item in pages[0].items]
@@ -0,0 +1,71 @@
+import json
+import math
+import os
+
+import pytest
+
+from ..tools import data_loader
+from ..tools.snapshot import SnapshotCatalog, build_snapshot, load_snapshot
+
+ITEMS = [
+    {"id": "a", "name": "Camisa Ávila", "brand": "Zara", "category": "Camisa", "gender": "Homem",
+     "color": "azul", "image": "a.jpg", "price": 29.9},
+    {"id": "b", "name": "Calça", "category": "Calça", "color": "azul", "price": 59},
+    {"id": "c", "name": "Sem preço", "sizes": ["S", "M"], "promo": {"pct": 10}},
+]
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    build_snapshot(ITEMS, path)
+    return SnapshotCatalog(path)
+
+
+def test_round_trip_keeps_every_item(snapshot):
+    assert len(snapshot) == len(ITEMS)
+    assert [item.to_dict() for item in snapshot] == ITEMS
+    assert list(snapshot[2]) == ["id", "name", "sizes", "promo"]
+    assert "price" not in snapshot[2]
+    assert snapshot[-1]["id"] == "c"
+    with pytest.raises(IndexError):
+        snapshot[3]
+
+
+def test_columns_are_interned(snapshot):
+    assert snapshot.table("color") == ["azul"]
+    assert list(snapshot.codes("color")) == [0, 0, 0xFFFFFFFF]
+    prices = snapshot.prices()
+    assert prices[:2].tolist() == [29.9, 59.0] and math.isnan(prices[2])
+
+
+def test_invalid_items_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        build_snapshot([{"id": 1}], str(tmp_path / "bad.snap"))
+    with pytest.raises(ValueError):
+        build_snapshot([{"id": "a", "price": "10"}], str(tmp_path / "bad.snap"))
+
+
+def test_non_snapshot_file_is_rejected(tmp_path):
+    path = tmp_path / "other.snap"
+    path.write_bytes(b"not a snapshot")
+    with pytest.raises(ValueError):
+        SnapshotCatalog(str(path))
+    assert load_snapshot(str(tmp_path / "missing.snap")) is None
+
+
+def test_stale_snapshot_falls_back_to_the_json(tmp_path, monkeypatch):
+    data, snap = tmp_path / "catalog.json", tmp_path / "catalog.snap"
+    data.write_text(json.dumps(ITEMS), encoding="utf-8")
+    build_snapshot(ITEMS[:1], str(snap))
+    monkeypatch.setattr(data_loader, "DATA_FILE", str(data))
+    monkeypatch.setattr(data_loader, "SNAPSHOT_FILE", str(snap))
+
+    os.utime(data, (1000, 1000))
+    os.utime(snap, (2000, 2000))
+    fresh = data_loader.load_catalog_items()
+    assert isinstance(fresh, SnapshotCatalog) and len(fresh) == 1
+
+    os.utime(data, (3000, 3000))
+    stale = data_loader.load_catalog_items()
+    assert stale == ITEMS
@@ -0,0 +1,113 @@
+import sqlite3
+
+import pytest
+
+from ..agent.session import SessionManager
+from ..agent.sqlite_store import SQLiteSessionStore
+
+PRODUCT = {"id": "p1", "category": "Camisa", "color": "azul", "price": 29.9}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "sessions.db")
+
+
+def test_cache_miss_sees_events_queued_for_the_next_commit(path):
+    store = SQLiteSessionStore(path, commit_interval=60, cache_size=1)
+    sm = SessionManager(store)
+    sm.add_like("a", PRODUCT)
+    sm.add_like("b", PRODUCT)  # evicts "a" from the read cache
+
+    session = sm.get_session("a")
+
+    assert len(session["history"]) == 1
+    assert len(session["preferences"]["likes"]) == 1
+    assert session["history"][0].item_id == "p1"
+    store.close()
+
+
+def test_group_commit_persists_sessions_and_history(path):
+    store = SQLiteSessionStore(path, commit_interval=60)
+    sm = SessionManager(store)
+    sm.add_like("a", PRODUCT)
+    sm.add_dislike("a", {**PRODUCT, "id": "p2"})
+    assert store.stats()["pending_events"] == 2
+    store.close()
+
+    reopened = SQLiteSessionStore(path, commit_interval=60)
+    session = reopened.get("a")
+
+    assert [e.item_id for e in session["history"]] == ["p1", "p2"]
+    assert session["aggregates"]["likes"]["total"] == 1
+    assert session["aggregates"]["dislikes"]["total"] == 1
+    reopened.close()
+
+
+def test_reload_after_partial_commit_has_no_duplicates(path):
+    store = SQLiteSessionStore(path, commit_interval=60, cache_size=1)
+    sm = SessionManager(store)
+    sm.add_like("a", PRODUCT)
+    store.flush()
+    sm.add_like("a", {**PRODUCT, "id": "p2"})
+    sm.add_like("b", PRODUCT)
+
+    session = sm.get_session("a")
+
+    assert [e.item_id for e in session["history"]] == ["p1", "p2"]
+    assert len(session["preferences"]["likes"]) == 2
+    store.close()
+
+
+def test_products_come_back_from_the_event_log(path):
+    store = SQLiteSessionStore(path, commit_interval=60, max_events=3)
+    sm = SessionManager(store)
+    for n in range(5):
+        sm.add_like("a", {**PRODUCT, "id": f"p{n}"})
+    sm.add_dislike("a", {**PRODUCT, "id": "d"})
+    store.close()
+
+    reopened = SQLiteSessionStore(path, commit_interval=60, max_events=3)
+    session = reopened.get("a")
+
+    assert [p["id"] for p in session["preferences"]["likes"]] == ["p2", "p3", "p4"]
+    assert [p["id"] for p in session["preferences"]["dislikes"]] == ["d"]
+    assert session["preferences"]["likes"][0]["color"] == "azul"
+    assert [e.item_id for e in session["history"]] == ["p3", "p4", "d"]
+    assert session["aggregates"]["likes"]["total"] == 5
+    reopened.close()
+
+
+def test_a_swipe_only_writes_what_it_appended(path):
+    store = SQLiteSessionStore(path, commit_interval=60)
+    sm = SessionManager(store)
+    for n in range(50):
+        sm.add_like("a", {**PRODUCT, "id": f"p{n}"})
+    store.flush()
+
+    sm.add_like("a", PRODUCT)
+
+    assert store.stats()["pending_events"] == 1
+    store.flush()
+    (data,) = store._conn.execute("SELECT data FROM sessions WHERE session_id = 'a'").fetchone()
+    assert "preferences" not in data and "p49" not in data
+    store.close()
+
+
+def test_database_without_the_product_column_is_upgraded(path):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, "
+        "type TEXT NOT NULL, item_id TEXT, ts REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO events (session_id, type, item_id, ts) VALUES ('a', 'like', 'old', 1.0)")
+    conn.commit()
+    conn.close()
+
+    store = SQLiteSessionStore(path, commit_interval=60)
+    SessionManager(store).add_like("a", PRODUCT)
+    store.close()
+
+    session = SQLiteSessionStore(path, commit_interval=60).get("a")
+    assert [e.item_id for e in session["history"]] == ["old", "p1"]
+    assert [p["id"] for p in session["preferences"]["likes"]] == ["p1"]
@@ -0,0 +1,63 @@
+import pytest
+
+from ..tools.catalog import current_catalog
+from ..tools.catalog_search import catalog_search
+from ..tools.text_index import TextIndex, fold, tokenize
+
+
+def _positions(index, query):
+    docs, scores = index.match(query)
+    return [int(doc) for _, doc in sorted(zip(-scores, docs))]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return TextIndex(
+        [
+            ("Camisa Linho", "Camisa", "Zara"),
+            ("Camisola Lã", "Camisola", "Mango"),
+            ("Calças Ganga", "Calças", "Levi's"),
+            ("Cam", "Acessórios", "Zara"),
+            ("Camisa Oxford Azul", "Camisa", "Massimo"),
+        ]
+    )
+
+
+def test_text_is_folded():
+    assert fold("AZUL-Escuro") == "azul escuro"
+    assert tokenize("Calças, Lã & Ténis") == ("calcas", "la", "tenis")
+
+
+def test_every_term_must_match(index):
+    assert _positions(index, "camisa") == [0, 4]
+    assert _positions(index, "camisa zara") == [0]
+    assert _positions(index, "camisa mango") == []
+
+
+def test_prefix_and_infix_matches(index):
+    assert sorted(_positions(index, "cami")) == [0, 1, 4]
+    assert _positions(index, "calcas") == [2]
+    assert _positions(index, "anga") == [2]
+
+
+def test_exact_tokens_outrank_prefixes(index):
+    # "cam" is a whole token of item 3 and only a prefix for the others
+    assert _positions(index, "cam")[0] == 3
+
+
+def test_shorter_texts_rank_higher_for_the_same_term(index):
+    # BM25 length normalization: both items say "camisa" twice
+    assert _positions(index, "camisa") == [0, 4]
+    docs, scores = index.match("camisa")
+    assert scores[0] > scores[1]
+
+
+def test_query_without_terms_matches_nothing(index):
+    assert index.match("!!!") is None
+    assert list(catalog_search(query="!!!")) == []
+    assert list(catalog_search(query="  ?! ")) == []
+
+
+def test_no_query_is_not_filtered():
+    assert len(catalog_search(query=None, limit=5)) == min(5, len(current_catalog().items))
+    assert len(catalog_search(query="", limit=5)) == min(5, len(current_catalog().items))
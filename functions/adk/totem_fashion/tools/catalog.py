@@ -0,0 +1,256 @@
+"""
+Versioned, hot-reloadable catalog.
+
+The catalog used to be a module-level list imported directly by every tool,
+so a price or stock change meant a redeploy. `CatalogHolder` owns the current
+`CatalogVersion` instead: an immutable bundle of the items, their
+`CatalogIndex` and any derived structures registered with
+`register_derived`.
+
+Reloading `DATA_FILE` or applying a delta of upserts and deletes happens on a
+background worker. The new version, including all its derived structures, is
+fully built before it is swapped in with a single reference assignment, so a
+request that grabbed a version keeps a consistent view until it finishes.
+
+Callers should fetch the version once per request::
+
+    catalog = current_catalog()
+    item = catalog.index.get(item_id)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Union
+
+from . import data_loader
+from .catalog_index import CatalogIndex
+
+# Builders for structures derived from a catalog version (e.g. feature
+# matrices). They are run eagerly when a new version is prepared.
+_DERIVED_BUILDERS: Dict[str, Callable[["CatalogVersion"], Any]] = {}
+
+
+def register_derived(name: str, builder: Callable[["CatalogVersion"], Any]) -> None:
+    """Register a structure to build for every catalog version.
+
+    `builder` receives the `CatalogVersion` and its result is cached on that
+    version; retrieve it with `CatalogVersion.derived(name)`.
+    """
+    _DERIVED_BUILDERS[name] = builder
+
+
+class CatalogVersion:
+    """One immutable version of the catalog and its derived structures."""
+
+    def __init__(
+        self,
+        items: Sequence[Dict[str, Any]],
+        version: int,
+        source: str,
+        fingerprint: Optional[str] = None,
+    ) -> None:
+        self.items = items
+        self.version = version
+        self.source = source
+        self.loaded_at = time.time()
+        self.index = CatalogIndex(items)
+        self._fingerprint = fingerprint
+        self._derived: Dict[str, Any] = {}
+        # Re-entrant: builders may depend on other derived structures
+        self._lock = threading.RLock()
+
+    @property
+    def fingerprint(self) -> str:
+        """Content hash of the items, identical across instances for the same data."""
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            for item in self.items:
+                digest.update(json.dumps(dict(item), sort_keys=True, ensure_ascii=False).encode("utf-8"))
+            self._fingerprint = digest.hexdigest()[:16]
+        return self._fingerprint
+
+    def derived(self, name: str) -> Any:
+        """Return the derived structure `name`, building it on first use."""
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = _DERIVED_BUILDERS[name](self)
+            return self._derived[name]
+
+    def prepare(self) -> "CatalogVersion":
+        """Build every registered derived structure and the fingerprint."""
+        self.fingerprint  # noqa: B018 - computed for its caching side effect
+        for name in list(_DERIVED_BUILDERS):
+            self.derived(name)
+        return self
+
+    def describe(self) -> Dict[str, Any]:
+        """Return a small summary suitable for health checks."""
+        return {
+            "version": self.version,
+            "fingerprint": self.fingerprint,
+            "items": len(self.items),
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+        }
+
+
+Delta = Mapping[str, Any]
+
+
+class CatalogHolder:
+    """Owns the current catalog version and swaps in new ones atomically."""
+
+    def __init__(
+        self,
+        loader: Callable[[], Sequence[Dict[str, Any]]] = data_loader.load_catalog_items,
+        initial: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> None:
+        self._loader = loader
+        self._initial = initial
+        self._current: Optional[CatalogVersion] = None
+        self._init_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        # A single worker serializes rebuilds so deltas apply in order.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-reload")
+        self._watcher: Optional[threading.Thread] = None
+
+    def current(self) -> CatalogVersion:
+        """Return the catalog version to use for the rest of a request."""
+        current = self._current
+        if current is not None:
+            return current
+        with self._init_lock:
+            if self._current is None:
+                items = self._initial if self._initial is not None else self._load()
+                self._current = CatalogVersion(items, version=1, source="startup")
+            return self._current
+
+    # --- Full reload ---
+    def reload(self) -> CatalogVersion:
+        """Reload DATA_FILE (or its snapshot) and swap it in; runs in the caller."""
+        with self._write_lock:
+            return self._swap(self._load(), source="reload")
+
+    def reload_in_background(self) -> "Future[CatalogVersion]":
+        """Schedule `reload` on the background worker."""
+        return self._executor.submit(self.reload)
+
+    def replace(self, items: Sequence[Dict[str, Any]], source: str = "replace") -> CatalogVersion:
+        """Swap in a whole new list of items (e.g. a generated catalog); runs in the caller."""
+        with self._write_lock:
+            return self._swap(items, source=source)
+
+    # --- Delta updates ---
+    def apply_delta(self, delta: Union[Delta, str]) -> CatalogVersion:
+        """Apply upserts and deletes to the current version and swap the result in.
+
+        Args:
+            delta: Either a mapping or the path of a JSON file with the shape
+                `{"upserts": [product, ...], "deletes": [product_id, ...]}`.
+                Each upsert is a whole product: it replaces the product with
+                the same id in place (fields are not merged), or is appended
+                when the id is new.
+
+        Raises:
+            ValueError: If an upsert has no string id.
+        """
+        if isinstance(delta, str):
+            with open(os.path.abspath(delta), "r", encoding="utf-8") as fh:
+                delta = json.load(fh)
+        for item in delta.get("upserts") or []:
+            if not isinstance(item.get("id"), str):
+                raise ValueError(f"Upsert sem id: {item!r}")
+        deletes = set(delta.get("deletes") or [])
+        upserts = {item["id"]: dict(item) for item in delta.get("upserts") or []}
+
+        with self._write_lock:
+            base = self.current()
+            items: List[Dict[str, Any]] = []
+            for item in base.items:
+                item_id = item.get("id")
+                if item_id in deletes:
+                    continue
+                items.append(upserts.pop(item_id, item))
+            items.extend(upserts.values())
+
+            digest = hashlib.sha1(base.fingerprint.encode("utf-8"))
+            digest.update(json.dumps(delta, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+            return self._swap(items, source="delta", fingerprint=digest.hexdigest()[:16])
+
+    def apply_delta_in_background(self, delta: Union[Delta, str]) -> "Future[CatalogVersion]":
+        """Schedule `apply_delta` on the background worker."""
+        return self._executor.submit(self.apply_delta, delta)
+
+    # --- File watching ---
+    def watch(self, interval: float) -> None:
+        """Poll DATA_FILE and SNAPSHOT_FILE and reload when either changes."""
+        if self._watcher is not None:
+            return
+
+        def _mtimes() -> tuple:
+            paths = (data_loader.DATA_FILE, data_loader.SNAPSHOT_FILE)
+            return tuple(
+                os.path.getmtime(p) if os.path.exists(p) else None
+                for p in map(os.path.abspath, paths)
+            )
+
+        def _poll() -> None:
+            last = _mtimes()
+            while True:
+                time.sleep(interval)
+                seen = _mtimes()
+                if seen != last:
+                    last = seen
+                    self.reload_in_background()
+
+        self._watcher = threading.Thread(target=_poll, name="catalog-watch", daemon=True)
+        self._watcher.start()
+
+    # --- Internal helpers ---
+    def _load(self) -> Sequence[Dict[str, Any]]:
+        try:
+            return self._loader()
+        except FileNotFoundError:
+            return []
+
+    def _swap(
+        self,
+        items: Sequence[Dict[str, Any]],
+        source: str,
+        fingerprint: Optional[str] = None,
+    ) -> CatalogVersion:
+        """Build a new version off the request path, then publish it.
+
+        Must be called with the write lock held.
+        """
+        base = self.current()
+        candidate = CatalogVersion(items, base.version + 1, source, fingerprint).prepare()
+        # Reference assignment is atomic; readers see either version in full.
+        self._current = candidate
+        return candidate
+
+
+# The free-text index is lazy on CatalogIndex; prepared versions build it
+# up front like any other derived structure.
+register_derived("text_index", lambda version: version.index.text_index)
+
+CATALOG = CatalogHolder(initial=data_loader.ITEMS)
+
+_watch_interval = os.getenv("CATALOG_WATCH_INTERVAL")
+if _watch_interval:
+    CATALOG.watch(float(_watch_interval))
+
+
+def current_catalog() -> CatalogVersion:
+    """Return the current version of the process-wide catalog."""
+    return CATALOG.current()
@@ -0,0 +1,263 @@
+"""
+In-memory index over the product catalog.
+
+`CatalogIndex` is built once from the loaded items and keeps everything that
+`catalog_search` needs precomputed: lowercased hash indexes (posting lists of
+item positions) for category, gender and color, lowercased columns used to
+probe candidates, a price column sorted for `price_max` range cuts and an
+id -> position map. Free-text queries go through a `TextIndex` over name,
+category and brand, built on first use (or when the catalog version is
+prepared).
+
+Searching picks the smallest candidate set among the active filters and only
+probes the remaining filters against those positions, so the cost of a query
+is proportional to its most selective filter rather than to the catalog size.
+Without a query, positions are visited in ascending order, which keeps
+results in file order; with one, results are ranked by BM25 relevance.
+"""
+
+from __future__ import annotations
+
+import heapq
+import threading
+from bisect import bisect_right
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .text_index import TextIndex
+from ..metrics import SEARCH_SCANNED
+
+# Fields indexed for free-text queries.
+TEXT_FIELDS = ("name", "category", "brand")
+
+
+def _lower(value: Any) -> str:
+    """Lowercase a field value, treating missing values as empty strings."""
+    return str(value).lower() if value is not None else ""
+
+
+class CatalogIndex:
+    """Precomputed lookup structures over a list of catalog items."""
+
+    def __init__(self, items: Sequence[Dict[str, Any]]) -> None:
+        self.items = items
+        self._by_id: Dict[Any, int] = {}
+        self._category: Dict[str, List[int]] = {}
+        self._gender: Dict[str, List[int]] = {}
+        self._color: Dict[str, List[int]] = {}
+        self._category_lc: List[str] = []
+        self._gender_lc: List[str] = []
+        self._color_lc: List[str] = []
+        self._text: Optional[TextIndex] = None
+        self._text_lock = threading.Lock()
+        self._prices: List[Optional[float]] = []
+
+        for pos, item in enumerate(items):
+            self._by_id.setdefault(item.get("id"), pos)
+            category = _lower(item.get("category"))
+            gender = _lower(item.get("gender"))
+            color = _lower(item.get("color"))
+            self._category_lc.append(category)
+            self._gender_lc.append(gender)
+            self._color_lc.append(color)
+            self._category.setdefault(category, []).append(pos)
+            self._gender.setdefault(gender, []).append(pos)
+            self._color.setdefault(color, []).append(pos)
+            self._prices.append(item.get("price"))
+
+        # Positions of priced items ordered by price, plus the matching prices
+        # so that `price_max` cuts are a single binary search.
+        self._price_order: List[int] = sorted(
+            (pos for pos, price in enumerate(self._prices) if price is not None),
+            key=self._prices.__getitem__,
+        )
+        self._price_sorted: List[float] = [self._prices[pos] for pos in self._price_order]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def get(self, item_id: Any) -> Optional[Dict[str, Any]]:
+        """Return the item with the given id, or None if it is not indexed."""
+        pos = self._by_id.get(item_id)
+        return self.items[pos] if pos is not None else None
+
+    def position(self, item_id: Any) -> Optional[int]:
+        """Return the position of the item with the given id in `items`."""
+        return self._by_id.get(item_id)
+
+    @property
+    def text_index(self) -> TextIndex:
+        """The free-text index, built on first use."""
+        text = self._text
+        if text is None:
+            with self._text_lock:
+                if self._text is None:
+                    self._text = TextIndex(
+                        tuple(item.get(field) for field in TEXT_FIELDS) for item in self.items
+                    )
+                text = self._text
+        return text
+
+    def positions(self, category: Optional[str] = None) -> Sequence[int]:
+        """Positions of the items in `category` (case-insensitive), or of all items."""
+        if not category:
+            return range(len(self.items))
+        return self._category.get(category.lower(), [])
+
+    def categories(self) -> List[str]:
+        """Return the distinct category names, in their original casing."""
+        seen = {}
+        for postings in self._category.values():
+            seen.setdefault(self.items[postings[0]].get("category"), None)
+        return list(seen)
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        category: Optional[str] = None,
+        color: Optional[str] = None,
+        gender: Optional[str] = None,
+        price_max: Optional[float] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """Return items matching all the given filters, in catalog order.
+
+        Filter semantics mirror the original linear scan: `category` and
+        `gender` are case-insensitive exact matches, `color` is a
+        case-insensitive substring match and `price_max` is inclusive.
+        `query` matches items whose name, category or brand contain every
+        query term (accent- and case-insensitive, see `TextIndex`); results
+        are then ordered by relevance instead of catalog order. A query with
+        no searchable terms (e.g. "!!!") matches nothing.
+        """
+        # Each active filter contributes a candidate source (size, positions)
+        # and a predicate used to probe positions coming from other sources.
+        sources: List[tuple[int, Callable[[], Iterable[int]]]] = []
+        predicates: List[tuple[int, Callable[[int], bool]]] = []
+
+        if category:
+            cat = category.lower()
+            postings = self._category.get(cat, [])
+            sources.append((len(postings), lambda p=postings: p))
+            predicates.append((len(postings), lambda pos, c=cat: self._category_lc[pos] == c))
+
+        if gender:
+            gen = gender.lower()
+            postings = self._gender.get(gen, [])
+            sources.append((len(postings), lambda p=postings: p))
+            predicates.append((len(postings), lambda pos, g=gen: self._gender_lc[pos] == g))
+
+        if color:
+            col = color.lower()
+            matching = [p for key, p in self._color.items() if col in key]
+            size = sum(len(p) for p in matching)
+            sources.append((size, lambda m=matching: m[0] if len(m) == 1 else heapq.merge(*m)))
+            predicates.append((size, lambda pos, c=col: c in self._color_lc[pos]))
+
+        if price_max is not None:
+            cut = bisect_right(self._price_sorted, price_max)
+            sources.append((cut, lambda k=cut: sorted(self._price_order[:k])))
+            predicates.append(
+                (
+                    cut,
+                    lambda pos, m=price_max: self._prices[pos] is not None
+                    and self._prices[pos] <= m,
+                )
+            )
+
+        if query:
+            matched = self.text_index.match(query)
+            if matched is None:
+                # Only punctuation: no item can contain every term of nothing
+                return []
+            return self._ranked(*matched, sources, predicates, limit)
+
+        if sources:
+            driver_idx = min(range(len(sources)), key=lambda i: sources[i][0])
+            if sources[driver_idx][0] == 0:
+                return []
+            candidates = sources[driver_idx][1]()
+            # The driver's own predicate is implied by its posting list; probe
+            # the rest from most to least selective so misses fail fast.
+            checks = [
+                check
+                for _, check in sorted(
+                    (pred for i, pred in enumerate(predicates) if i != driver_idx),
+                    key=lambda pred: pred[0],
+                )
+            ]
+        else:
+            candidates = range(len(self.items))
+            checks = [check for _, check in predicates]
+
+        if limit < 0:
+            # Preserve the slicing semantics of the original implementation.
+            return self._collect(candidates, checks, None)[:limit]
+        if limit == 0:
+            return []
+        return self._collect(candidates, checks, limit)
+
+    def _collect(
+        self,
+        candidates: Iterable[int],
+        checks: List[Callable[[int], bool]],
+        limit: Optional[int],
+    ) -> List[Dict[str, Any]]:
+        """Materialize up to `limit` items whose positions pass every check."""
+        results: List[Dict[str, Any]] = []
+        scanned = 0
+        for pos in candidates:
+            scanned += 1
+            if all(check(pos) for check in checks):
+                results.append(self.items[pos])
+                if limit is not None and len(results) >= limit:
+                    break
+        SEARCH_SCANNED.inc(scanned)
+        return results
+
+    def _ranked(
+        self,
+        docs: np.ndarray,
+        scores: np.ndarray,
+        sources: List[tuple[int, Callable[[], Iterable[int]]]],
+        predicates: List[tuple[int, Callable[[int], bool]]],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """Filter text matches and return them by score (desc), then position."""
+        if sources and len(docs):
+            # Narrow by the most selective filter in one vectorized pass
+            size, positions = min(sources, key=lambda source: source[0])
+            if size < len(docs):
+                keep = np.isin(docs, np.fromiter(positions(), dtype=np.int64, count=size))
+                docs, scores = docs[keep], scores[keep]
+        checks = [check for _, check in sorted(predicates, key=lambda pred: pred[0])]
+        wanted = len(docs) if limit < 0 else limit
+        if wanted == 0 or not len(docs):
+            return []
+
+        results: List[Dict[str, Any]] = []
+        done = 0
+        batch = max(4 * wanted, 64)
+        while done < len(docs):
+            # Only sort as much of the ranking as needed to fill `limit`: all
+            # docs scoring at least the (done + batch)-th best, ties included,
+            # so each round extends the exact global order.
+            if done + batch < len(docs):
+                cut = len(docs) - done - batch
+                top = np.flatnonzero(scores >= np.partition(scores, cut)[cut])
+            else:
+                top = np.arange(len(docs))
+            ordered = top[np.lexsort((docs[top], -scores[top]))]
+            for i in ordered[done:]:
+                pos = int(docs[i])
+                done += 1
+                if all(check(pos) for check in checks):
+                    results.append(self.items[pos])
+                    if limit >= 0 and len(results) >= limit:
+                        SEARCH_SCANNED.inc(done)
+                        return results
+            done = len(ordered)
+            batch *= 4
+        SEARCH_SCANNED.inc(done)
+        return results[:limit] if limit < 0 else results
@@ -4,18 +4,32 @@ Search utilities for the Fashion Finder.
 This module provides the `catalog_search` function which filters the in-memory
 list of items by various attributes (query, category, color, gender, price).
 
-By performing the search in memory, the system avoids network calls and works
-without a backend server. For larger datasets or production use, you may want
-to back this with a database or search engine.
+Lookups are answered by the `CatalogIndex` of the current catalog version, so
+each call only touches the items of its most selective filter instead of
+scanning the whole catalog. By performing the search in memory, the system
+avoids network calls and works without a backend server.
+
+Results are memoized per catalog version (see `memo`) and returned as
+read-only sequences of read-only items.
 """
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Mapping, Optional, Sequence
+
+from .catalog import current_catalog
+from .memo import VersionedMemo
+from .text_index import tokenize
+from ..metrics import SEARCH_RETURNED, timed
+
+_MEMO = VersionedMemo("catalog_search")
 
-from .data_loader import ITEMS
 
+def _lower(value: Optional[str]) -> Optional[str]:
+    return value.lower() if value else None
 
+
+@timed("catalog_search")
 def catalog_search(
     query: Optional[str] = None,
     category: Optional[str] = None,
@@ -23,11 +37,13 @@ def catalog_search(
     gender: Optional[str] = None,
     price_max: Optional[float] = None,
     limit: int = 20,
-) -> List[Dict[str, Any]]:
-    """Filter the ITEMS list based on the provided parameters.
+) -> Sequence[Mapping[str, Any]]:
+    """Filter the current catalog based on the provided parameters.
 
     Args:
-        query: Text to search for in the name, category, or brand.
+        query: Words to search for in the name, category, or brand
+            (accent-insensitive; partial words match). Results are then
+            ordered by relevance.
         category: Exact category name to match (case-insensitive).
         color: A color or substring to look for in the color field.
         gender: Exact gender to match ("Homem" or "Mulher").
@@ -35,40 +51,21 @@ def catalog_search(
         limit: Maximum number of results to return.
 
     Returns:
-        A list of item dicts matching the filters, truncated to the given limit.
+        A read-only sequence of the items matching the filters, truncated to
+        the given limit.
     """
-    # Start with the full dataset
-    results: List[Dict[str, Any]] = ITEMS.copy()
-
-    if query:
-        q = query.lower()
-        results = [
-            item
-            for item in results
-            if q in item.get("name", "").lower()
-            or q in item.get("category", "").lower()
-            or q in item.get("brand", "").lower()
-        ]
-
-    if category:
-        results = [
-            item for item in results if item.get("category", "").lower() == category.lower()
-        ]
-
-    if color:
-        c = color.lower()
-        results = [
-            item
-            for item in results
-            if c in item.get("color", "").lower()
-        ]
-
-    if gender:
-        results = [
-            item for item in results if item.get("gender", "").lower() == gender.lower()
-        ]
-
-    if price_max is not None:
-        results = [item for item in results if item.get("price") is not None and item["price"] <= price_max]
-
-    return results[:limit]
+    catalog = current_catalog()
+    # Normalized as the index would: case-insensitive filters, folded terms.
+    # A query without terms keys as () and matches nothing, unlike no query.
+    terms = tuple(dict.fromkeys(tokenize(query))) if query else None
+    key = (
+        terms,
+        _lower(category),
+        _lower(color),
+        _lower(gender),
+        None if price_max is None else float(price_max),
+        int(limit),
+    )
+    results = _MEMO.get_or_compute(catalog, key, lambda: catalog.index.search(query, *key[1:]))
+    SEARCH_RETURNED.inc(len(results))
+    return results
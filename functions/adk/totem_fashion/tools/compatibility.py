@@ -0,0 +1,224 @@
+"""
+Color and category compatibility tables, compiled per catalog version.
+
+Stylist knowledge lives in three tables:
+
+* `color_synonyms`: alternative spellings mapped to a canonical color name
+  ("azul marinho" -> "azul escuro");
+* `color_pairs`: for a color, the colors that go with it, best first;
+* `complements`: for a category, the categories that complete an outfit
+  with it, best first.
+
+Color and category names are normalized before use: lowercased, accents
+stripped, hyphens and underscores turned into spaces and whitespace
+collapsed, so "Azul-Escuro", "azul escuro" and "AZUL  ESCURO" are the same
+color. Colors then go through the synonym table.
+
+`CompatibilityEngine` interns every normalized name (from the catalog and the
+tables) into a dense id and compiles the pair tables into float32 matrices
+of scores in [0, 1]: the i-th entry of a list of L scores (L - i) / L. A
+color with no pairs is compatible with itself only. Callers look rows up by
+id and index them with NumPy arrays of ids instead of scanning dicts.
+
+The defaults below can be extended or overridden without code changes in
+`config.json` (path overridable with CONFIG_FILE), e.g.::
+
+    {"compatibility": {
+        "color_synonyms": {"cor de vinho": "bordeaux"},
+        "color_pairs": {"bordeaux": ["bege", "preto", "cinzento"]},
+        "complements": {"Vestido Liocel": ["Casaco Bomber"]}}}
+
+Entries in the file replace the default entry with the same key. The tables
+are read whenever a catalog version is built, so a catalog reload also picks
+up configuration changes. An empty or missing file means "defaults only".
+`CompatibilityEngine.tables_hash` identifies the tables an engine was
+compiled from, so artifacts built with other tables (the lookbook) can tell.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .catalog import CatalogVersion, register_derived
+from .text_index import fold
+
+CONFIG_FILE = os.getenv(
+    "CONFIG_FILE",
+    os.path.join(os.path.dirname(__file__), "..", "config.json"),
+)
+
+DEFAULT_COLOR_SYNONYMS: Dict[str, str] = {
+    "cinza": "cinzento",
+    "cinza escuro": "cinzento escuro",
+    "cinza claro": "cinzento",
+    "azul marinho": "azul escuro",
+    "marinho": "azul escuro",
+    "azul navy": "azul escuro",
+    "azul bebe": "azul claro",
+    "creme": "bege claro",
+    "cru": "bege claro",
+    "camel": "castanho",
+    "preta": "preto",
+    "branca": "branco",
+    "castanha": "castanho",
+    "cor de rosa": "rosa",
+    "multicolor": "multicor",
+    "estampado": "multicor",
+}
+
+DEFAULT_COLOR_PAIRS: Dict[str, List[str]] = {
+    "bege": ["castanho", "branco", "bege claro", "preto"],
+    "cinzento escuro": ["preto", "branco", "rosa"],
+    "verde": ["preto", "bege", "branco"],
+    "multicor": [],  # no specific harmonies
+    "branco": ["preto", "bege", "azul escuro"],
+    "preto": ["branco", "bege", "azul escuro"],
+    "bege claro": ["bege", "castanho", "branco"],
+    "azul escuro": ["branco", "bege", "preto"],
+    "rosa": ["branco", "bege", "preto"],
+}
+
+DEFAULT_COMPLEMENTS: Dict[str, List[str]] = {
+    "Casaco Bomber": ["Camisola de Malha", "Calças de Ganga Skinny", "Calças de Ganga Wide Leg"],
+    "Camisola de Malha": ["Calças de Ganga Skinny", "Calças Marine", "Casaco Bomber"],
+    "Pijama Polar de Natal": ["Pijama Polar de Natal"],
+    "Polo Jersey": ["Calças Loose Fit", "Casaco Bomber"],
+    "Calças Loose Fit": ["Polo Jersey", "Casaco Bomber"],
+    "Calças de Ganga Wide Leg": ["Camisola de Malha", "Casaco Bomber"],
+}
+
+
+def load_tables(path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Return the default tables updated with the `compatibility` block of the config file."""
+    tables: Dict[str, Dict[str, Any]] = {
+        "color_synonyms": dict(DEFAULT_COLOR_SYNONYMS),
+        "color_pairs": dict(DEFAULT_COLOR_PAIRS),
+        "complements": dict(DEFAULT_COMPLEMENTS),
+    }
+    path = os.path.abspath(path or CONFIG_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            raw = fh.read()
+    except FileNotFoundError:
+        return tables
+    if not raw.strip():
+        return tables
+    try:
+        overrides = json.loads(raw).get("compatibility") or {}
+    except (ValueError, AttributeError) as e:
+        print(f"⚠️  config.json inválido, a usar tabelas por omissão: {e}")
+        return tables
+    for name, table in tables.items():
+        table.update(overrides.get(name) or {})
+    return tables
+
+
+def tables_hash(tables: Dict[str, Dict[str, Any]]) -> str:
+    """Content hash of compatibility tables, independent of key order."""
+    encoded = json.dumps(tables, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def _pair_matrix(pairs: Dict[str, List[str]], ids: Dict[str, int], key: Any) -> np.ndarray:
+    """Compile `{name: [best, ...]}` into a score matrix over `ids`."""
+    matrix = np.zeros((len(ids), len(ids)), dtype=np.float32)
+    for name, partners in pairs.items():
+        row = ids[key(name)]
+        partners = [ids[key(p)] for p in partners]
+        for rank, col in enumerate(partners):
+            matrix[row, col] = max(matrix[row, col], (len(partners) - rank) / len(partners))
+    return matrix
+
+
+def _distinct(items: Any, dim: str) -> List[Any]:
+    """Distinct values of one field, in catalog order."""
+    if hasattr(items, "table"):
+        # Snapshot catalogs keep the interned values of each field.
+        return list(items.table(dim))
+    return list(dict.fromkeys(item.get(dim) for item in items))
+
+
+class CompatibilityEngine:
+    """Interned color/category ids and their compatibility matrices."""
+
+    def __init__(
+        self,
+        colors: Iterable[Any],
+        categories: Iterable[Any],
+        tables: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        tables = tables or load_tables()
+        self.tables_hash = tables_hash(tables)
+        self.synonyms = {fold(k): fold(v) for k, v in tables["color_synonyms"].items()}
+
+        # Colors: canonical normalized name -> id
+        self.color_ids: Dict[str, int] = {}
+        names = [*colors, *tables["color_pairs"]]
+        names += [p for partners in tables["color_pairs"].values() for p in partners]
+        for name in names:
+            if name:
+                self.color_ids.setdefault(self.normalize_color(name), len(self.color_ids))
+        self.colors = list(self.color_ids)
+        self.color_matrix = _pair_matrix(tables["color_pairs"], self.color_ids, self.normalize_color)
+        # A color without pairs only goes with itself
+        lonely = np.flatnonzero(~self.color_matrix.any(axis=1))
+        self.color_matrix[lonely, lonely] = 1.0
+
+        # Categories: folded name -> id, keeping the first spelling seen
+        self.category_ids: Dict[str, int] = {}
+        self.categories: List[str] = []
+        names = [*categories, *tables["complements"]]
+        names += [c for partners in tables["complements"].values() for c in partners]
+        for name in names:
+            if name and fold(name) not in self.category_ids:
+                self.category_ids[fold(name)] = len(self.categories)
+                self.categories.append(str(name))
+        self.category_matrix = _pair_matrix(tables["complements"], self.category_ids, fold)
+
+    def normalize_color(self, name: Any) -> str:
+        """Canonical color name: folded, then resolved through the synonyms."""
+        folded = fold(name)
+        return self.synonyms.get(folded, folded)
+
+    def color_id(self, name: Any) -> Optional[int]:
+        return self.color_ids.get(self.normalize_color(name)) if name else None
+
+    def category_id(self, name: Any) -> Optional[int]:
+        return self.category_ids.get(fold(name)) if name else None
+
+    def color_scores(self, color: Any) -> np.ndarray:
+        """Compatibility of every color id with `color` (all zeros if unknown)."""
+        cid = self.color_id(color)
+        if cid is None:
+            return np.zeros(len(self.colors), dtype=np.float32)
+        return self.color_matrix[cid]
+
+    def complements(self, category: Any) -> List[str]:
+        """Categories that complete an outfit with `category`, best first."""
+        cid = self.category_id(category)
+        if cid is None:
+            return []
+        row = self.category_matrix[cid]
+        ranked = np.flatnonzero(row)
+        ranked = ranked[np.lexsort((ranked, -row[ranked]))]
+        return [self.categories[i] for i in ranked]
+
+    def harmonious_colors(self, color: Any) -> List[str]:
+        """Colors that pair with `color`, best first."""
+        row = self.color_scores(color)
+        ranked = np.flatnonzero(row)
+        ranked = ranked[np.lexsort((ranked, -row[ranked]))]
+        return [self.colors[i] for i in ranked]
+
+
+def build_engine(catalog: CatalogVersion) -> CompatibilityEngine:
+    """Derived-structure builder: the engine for a catalog version."""
+    return CompatibilityEngine(_distinct(catalog.items, "color"), _distinct(catalog.items, "category"))
+
+
+register_derived("compatibility", build_engine)
@@ -7,13 +7,23 @@ products and exposes it as a module-level list `ITEMS`.
 By loading the data at import time, we avoid repeatedly reading the file on
 every search. You can override the default file location using the `DATA_FILE`
 environment variable.
+
+If a binary snapshot built by `tools.snapshot` exists (`SNAPSHOT_FILE`, by
+default next to the JSON file) and is not older than the JSON, it is
+memory-mapped instead and `ITEMS` becomes a read-only sequence of lazy,
+dict-like item views. This skips the JSON parse on cold start.
+
+`ITEMS` is only the startup load: the live, reloadable catalog is owned by
+`tools.catalog.CATALOG`, which is what the tools and the agent read from.
 """
 
 from __future__ import annotations
 
 import json
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Sequence
+
+from .snapshot import load_snapshot
 
 # Default path to the data file relative to this module. Allows override via env.
 DATA_FILE = os.getenv(
@@ -25,6 +35,12 @@ DATA_FILE = os.getenv(
     ),
 )
 
+# Compiled columnar snapshot of DATA_FILE. Allows override via env.
+SNAPSHOT_FILE = os.getenv(
+    "SNAPSHOT_FILE",
+    os.path.splitext(DATA_FILE)[0] + ".snap",
+)
+
 
 def load_items() -> List[Dict[str, Any]]:
     """Load and return the list of items from the JSON file.
@@ -36,8 +52,27 @@ def load_items() -> List[Dict[str, Any]]:
         return json.load(fh)
 
 
+def load_catalog_items() -> Sequence[Dict[str, Any]]:
+    """Return the catalog, preferring a fresh binary snapshot over the JSON.
+
+    The snapshot is ignored when the JSON file is newer, so an updated
+    db_preco.json is never shadowed by a stale build.
+    Raises FileNotFoundError if neither file exists.
+    """
+    data_path = os.path.abspath(DATA_FILE)
+    snap_path = os.path.abspath(SNAPSHOT_FILE)
+    if os.path.exists(snap_path) and (
+        not os.path.exists(data_path)
+        or os.path.getmtime(snap_path) >= os.path.getmtime(data_path)
+    ):
+        snapshot = load_snapshot(snap_path)
+        if snapshot is not None:
+            return snapshot
+    return load_items()
+
+
 try:
-    ITEMS: List[Dict[str, Any]] = load_items()
+    ITEMS: Sequence[Dict[str, Any]] = load_catalog_items()
 except FileNotFoundError:
     # In development environments where the file isn't present, fallback to empty
     ITEMS = []
@@ -0,0 +1,283 @@
+"""
+Per-session swipe decks with stateless continuation cursors.
+
+Each session sees the catalog (or one category of it) in its own order: a
+deterministic shuffle given by the affine permutation `i -> (a * i + b) % n`,
+with `a` coprime to `n` and both derived from a 64-bit seed. The seed comes
+from the session id, so the same session gets the same deck on any instance,
+and walking the permutation needs no per-session state beyond an offset.
+
+With cross-session popularity available (`PopularityAggregator`), a deck
+starts with a head of the POPULARITY_HEAD most popular products (those with
+a positive score), in the session's own order, followed by the rest of the
+shuffled deck. The head is picked once, when the deck starts, and travels in
+the cursor, so the ranking moving between pages (it changes with every swipe
+on any kiosk) never repeats or skips a product. Mirrors opening decks of the
+same category at once share one head computation; each session's shuffle
+and the products it already swiped are applied afterwards.
+
+A cursor is the URL-safe base64 of `(seed, offset)` plus the head positions;
+any instance can resume from it. Products the session already liked or
+disliked are skipped while walking. If the catalog changes between pages,
+the deck is reshuffled over the new positions from the same offset.
+
+`DeckService` adds prefetching: after a swipe, the page the session would get
+next (from the last cursor it was served) is computed in a background thread
+and cached, so the next fetch is a cache hit. Cached pages are tied to the
+catalog version and to how many swipes the session had, and are recomputed
+inline when either has moved on. Prefetching is best effort: a session has at
+most one prefetch queued (it computes whatever page is next when it runs),
+and swipes are not prefetched for once DECK_PREFETCH_BACKLOG sessions are
+waiting, so a burst of swipes cannot pile up work nobody will read.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import math
+import os
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .catalog import CatalogVersion, current_catalog
+from .singleflight import SingleFlight
+from ..metrics import timed
+
+PAGE_SIZE = 30
+PREFETCH_ENTRIES = int(os.getenv("DECK_PREFETCH_ENTRIES", "4096"))
+PREFETCH_BACKLOG = int(os.getenv("DECK_PREFETCH_BACKLOG", "256"))
+POPULARITY_HEAD = int(os.getenv("DECK_POPULARITY_HEAD", "30"))
+
+_CURSOR = struct.Struct(">QI")
+_HEADS = SingleFlight("discover")
+
+
+class DeckPage(NamedTuple):
+    """One page of a deck and the cursor of the next one (None at the end)."""
+
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def session_seed(session_id: str, category: Optional[str] = None) -> int:
+    """Stable 64-bit seed of a session's deck (independent of PYTHONHASHSEED)."""
+    key = f"{session_id}\x00{(category or '').lower()}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+
+def encode_cursor(seed: int, offset: int, head: Sequence[int] = ()) -> str:
+    raw = _CURSOR.pack(seed, offset) + struct.pack(f">{len(head)}I", *head)
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int, Tuple[int, ...]]:
+    """Return `(seed, offset, head)`; raises ValueError for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        seed, offset = _CURSOR.unpack_from(raw)
+        head = struct.unpack(f">{(len(raw) - _CURSOR.size) // 4}I", raw[_CURSOR.size :])
+    except (binascii.Error, struct.error, UnicodeEncodeError):
+        raise ValueError("Cursor inválido") from None
+    return seed, offset, head
+
+
+def _affine(seed: int, n: int) -> Tuple[int, int]:
+    """Multiplier coprime to n and offset of the permutation for `seed`."""
+    a = (seed >> 32) % n or 1
+    while math.gcd(a, n) != 1:
+        a += 1
+    return a, seed % n
+
+
+def seen_positions(session: Dict[str, Any], catalog: CatalogVersion) -> Set[int]:
+    """Catalog positions of the products a session already swiped."""
+    prefs = session.get("preferences", {})
+    seen = set()
+    for key in ("likes", "dislikes"):
+        for product in prefs.get(key, ()):
+            pos = catalog.index.position(product.get("id"))
+            if pos is not None:
+                seen.add(pos)
+    return seen
+
+
+def deck_page(
+    catalog: CatalogVersion,
+    seed: int,
+    offset: int,
+    category: Optional[str] = None,
+    limit: int = PAGE_SIZE,
+    exclude: Optional[Set[int]] = None,
+    head: Sequence[int] = (),
+) -> DeckPage:
+    """Walk the shuffled deck from `offset` until `limit` unseen items are found.
+
+    Args:
+        head: Positions dealt first, shuffled among themselves, before the
+            rest of the deck; the next cursor carries them along.
+    """
+    candidates = catalog.index.positions(category)
+    n = len(candidates)
+    # A head from an older catalog version may point past it or elsewhere
+    folded = (category or "").lower()
+    head = [pos for pos in head if pos < len(catalog.items)]
+    if folded:
+        head = [pos for pos in head if str(catalog.items[pos].get("category") or "").lower() == folded]
+    h = len(head)
+    total = h + n
+    items: List[Any] = []
+    if offset < total:
+        exclude = exclude or set()
+        skip = set(head)
+        ha, hb = _affine(seed, h) if h else (1, 0)
+        a, b = _affine(seed, n) if n else (1, 0)
+        while offset < total and len(items) < limit:
+            in_head = offset < h
+            if in_head:
+                pos = head[(ha * offset + hb) % h]
+            else:
+                pos = int(candidates[(a * (offset - h) + b) % n])
+            offset += 1
+            # Head products come up again in the shuffled rest: deal them once
+            if pos not in exclude and (in_head or pos not in skip):
+                items.append(catalog.items[pos])
+    return DeckPage(items, encode_cursor(seed, offset, head) if offset < total else None)
+
+
+def _swipe_count(session: Dict[str, Any]) -> int:
+    aggregates = session.get("aggregates") or {}
+    return sum(side.get("total", 0) for side in aggregates.values())
+
+
+class DeckService:
+    """Serves deck pages for sessions and prefetches the next one after swipes."""
+
+    def __init__(
+        self, session_manager: Any, max_entries: int = PREFETCH_ENTRIES, max_backlog: int = PREFETCH_BACKLOG
+    ) -> None:
+        self.sm = session_manager
+        self.max_entries = max_entries
+        self.max_backlog = max_backlog
+        # (session, category, cursor, limit) -> (catalog version, swipes, page)
+        self._pages: "OrderedDict[Hashable, Tuple[int, int, DeckPage]]" = OrderedDict()
+        # session -> (category, cursor, limit) of its next page
+        self._next: "OrderedDict[str, Tuple[Optional[str], str, int]]" = OrderedDict()
+        # sessions with a prefetch queued and not started yet
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="deck-prefetch")
+        self._stats = {"hits": 0, "misses": 0, "prefetched": 0, "prefetch_dropped": 0}
+
+    @timed("deck_page")
+    def page(
+        self,
+        session_id: str,
+        category: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = PAGE_SIZE,
+    ) -> DeckPage:
+        """Return a page of the session's deck, starting at `cursor` (or the top).
+
+        Raises:
+            ValueError: If `cursor` is malformed.
+        """
+        catalog = current_catalog()
+        session = self.sm.get_session(session_id)
+        key = (session_id, (category or "").lower(), cursor, limit)
+        with self._lock:
+            cached = self._pages.get(key)
+            if cached is not None and cached[:2] == (catalog.version, _swipe_count(session)):
+                self._pages.move_to_end(key)
+                self._stats["hits"] += 1
+                page = cached[2]
+            else:
+                page = None
+                self._stats["misses"] += 1
+        if page is None:
+            page = self._compute(catalog, session, session_id, category, cursor, limit)
+        with self._lock:
+            if page.next_cursor is None:
+                self._next.pop(session_id, None)
+            else:
+                self._next[session_id] = (category, page.next_cursor, limit)
+                self._next.move_to_end(session_id)
+                while len(self._next) > self.max_entries:
+                    self._next.popitem(last=False)
+        return page
+
+    def prefetch(self, session_id: str) -> None:
+        """Compute the session's next page in the background, if it has one.
+
+        Skipped when the session already has a prefetch queued, and dropped
+        when `max_backlog` sessions are waiting.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if session_id not in self._next or session_id in self._pending:
+                return
+            if len(self._pending) >= self.max_backlog:
+                self._stats["prefetch_dropped"] += 1
+                return
+            self._pending.add(session_id)
+        self._executor.submit(self._prefetch, session_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, cached_pages=len(self._pages), prefetch_backlog=len(self._pending))
+
+    # --- Internal helpers ---
+    def _head(self, catalog: CatalogVersion, category: Optional[str]) -> List[int]:
+        """Most popular positions to open a new deck with (none without popularity)."""
+        popularity = getattr(self.sm, "popularity", None)
+        if popularity is None or POPULARITY_HEAD <= 0:
+            return []
+        key = (catalog.version, (category or "").lower())
+        return _HEADS.do(key, lambda: popularity.popular(catalog, category, POPULARITY_HEAD))
+
+    def _prefetch(self, session_id: str) -> None:
+        # Swipes from now on queue a new prefetch; this one reads the latest state
+        with self._lock:
+            self._pending.discard(session_id)
+            upcoming = self._next.get(session_id)
+        if upcoming is None:
+            return
+        category, cursor, limit = upcoming
+        try:
+            catalog = current_catalog()
+            session = self.sm.get_session(session_id)
+            self._compute(catalog, session, session_id, category, cursor, limit)
+        except Exception as exc:  # background work must never take the worker down
+            print(f"⚠️  Falha ao pré-calcular o deck de {session_id}: {exc}")
+            return
+        with self._lock:
+            self._stats["prefetched"] += 1
+
+    def _compute(
+        self,
+        catalog: CatalogVersion,
+        session: Dict[str, Any],
+        session_id: str,
+        category: Optional[str],
+        cursor: Optional[str],
+        limit: int,
+    ) -> DeckPage:
+        swipes = _swipe_count(session)
+        if cursor:
+            seed, offset, head = decode_cursor(cursor)
+        else:
+            seed, offset, head = session_seed(session_id, category), 0, self._head(catalog, category)
+        page = deck_page(catalog, seed, offset, category, limit, seen_positions(session, catalog), head)
+        if self.max_entries > 0:
+            key = (session_id, (category or "").lower(), cursor, limit)
+            with self._lock:
+                self._pages[key] = (catalog.version, swipes, page)
+                self._pages.move_to_end(key)
+                while len(self._pages) > self.max_entries:
+                    self._pages.popitem(last=False)
+        return page
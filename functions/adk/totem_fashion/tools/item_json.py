@@ -0,0 +1,120 @@
+"""
+Pre-serialized JSON payloads of catalog items.
+
+API responses are mostly lists of products, and encoding them was most of the
+CPU spent per request. `ItemJSON` keeps, per catalog version, the JSON bytes
+of every product (encoded the first time it is served) and of its field
+projections (`fields=("id", "image", "price")`), so a response is assembled
+by joining cached fragments instead of encoding the products again.
+
+`encode` serializes a whole response value: products of the catalog (found
+by id and still equal to the catalog entry) come from the cache, everything
+else is encoded as usual. Any other mapping with an "id" is a product too
+(e.g. one swiped by a kiosk but not in the catalog) and gets the same
+projection, so every product of a response has the same shape. The output
+matches FastAPI's `JSONResponse` (compact separators, UTF-8, no NaN).
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .catalog import CatalogVersion, register_derived
+
+Fields = Optional[Tuple[str, ...]]
+
+# Distinct `fields` projections cached per version (the full payload included).
+MAX_PROJECTIONS = 16
+
+
+def _default(value: Any) -> Any:
+    # NumPy scalars (e.g. prices of snapshot catalogs)
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a value the way FastAPI's JSONResponse does."""
+    return json.dumps(
+        value, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+def parse_fields(fields: Optional[str]) -> Fields:
+    """Turn a `fields=id,image,price` parameter into a projection (None = all)."""
+    if not fields:
+        return None
+    names = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    return names or None
+
+
+class ItemJSON:
+    """Per-version cache of product JSON fragments, full or projected."""
+
+    def __init__(self, catalog: CatalogVersion) -> None:
+        self.catalog = catalog
+        self._fragments: Dict[Fields, List[Optional[bytes]]] = {}
+        self._lock = threading.Lock()
+
+    def fragment(self, pos: int, fields: Fields = None) -> bytes:
+        """JSON bytes of the product at `pos`, restricted to `fields` if given."""
+        cache = self._fragments.get(fields)
+        if cache is None:
+            with self._lock:
+                if len(self._fragments) >= MAX_PROJECTIONS and fields not in self._fragments:
+                    # Projections come from clients: only the first few get a cache
+                    return dumps(_project(self.catalog.items[pos], fields))
+                cache = self._fragments.setdefault(fields, [None] * len(self.catalog.items))
+        raw = cache[pos]
+        if raw is None:
+            # Concurrent misses encode the same bytes; either write wins.
+            raw = cache[pos] = dumps(_project(self.catalog.items[pos], fields))
+        return raw
+
+    def items(self, items: Sequence[Any], fields: Fields = None) -> bytes:
+        """JSON array of products, from cache when they belong to the catalog."""
+        return b"[" + b",".join(self._encode(item, fields) for item in items) + b"]"
+
+    def encode(self, value: Any, fields: Fields = None) -> bytes:
+        """JSON bytes of a response value; catalog products inside it come from cache."""
+        return self._encode(value, fields)
+
+    def _encode(self, value: Any, fields: Fields) -> bytes:
+        if isinstance(value, Mapping):
+            pos = self._position(value)
+            if pos is not None:
+                return self.fragment(pos, fields)
+            if fields is not None and "id" in value:
+                return dumps(_project(value, fields))
+            parts = [dumps(str(key)) + b":" + self._encode(v, fields) for key, v in value.items()]
+            return b"{" + b",".join(parts) + b"}"
+        if isinstance(value, (list, tuple)):
+            return b"[" + b",".join(self._encode(v, fields) for v in value) + b"]"
+        return dumps(value)
+
+    def _position(self, value: Mapping) -> Optional[int]:
+        """Catalog position of `value` if it is an unmodified catalog product."""
+        item_id = value.get("id")
+        if item_id is None:
+            return None
+        try:
+            pos = self.catalog.index.position(item_id)
+        except TypeError:  # unhashable id
+            return None
+        if pos is None:
+            return None
+        item = self.catalog.items[pos]
+        return pos if value is item or value == item else None
+
+
+def _project(item: Any, fields: Fields) -> Dict[str, Any]:
+    if fields is None:
+        return dict(item)
+    return {name: item[name] for name in fields if name in item}
+
+
+register_derived("item_json", ItemJSON)
@@ -0,0 +1,243 @@
+"""
+Precomputed lookbook: the outfit for every catalog item, built offline.
+
+Composing an outfit runs a branch-and-bound search over the price-sorted
+pool of every complementary category (see `outfit_solver`). The result only
+depends on the seed, the budget, the catalog contents and the compatibility
+tables, so it can be computed ahead of time for every item and a few budget
+tiers. The build fans the seeds out over a process pool and
+writes a compact NumPy artifact:
+
+* `members`: int32 array of shape (items, tiers, slots) holding the catalog
+  positions of the items added to each seed's outfit, padded with -1;
+* `tiers`: float64 budgets, NaN meaning "no budget";
+* `fingerprint`: the content hash of the catalog it was built from;
+* `tables`: the hash of the compatibility tables (config.json included) it
+  was built with;
+* `composer`: the `COMPOSER_VERSION` that produced it.
+
+Positions are only meaningful for that exact catalog, and outfits for those
+exact tables, so the artifact is keyed by both: a catalog version whose
+fingerprint differs (after a reload or a delta), or whose compatibility
+engine was compiled from other tables (config.json edited, then the catalog
+reloaded), simply has no lookbook and `/outfit` composes live, as it does
+for budgets that are not one of the tiers and for `k > 1`.
+
+Build it next to the catalog with::
+
+    python -m adk.totem_fashion.tools.lookbook --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import data_loader
+from .catalog import CatalogVersion, register_derived
+from .compatibility import CompatibilityEngine
+from .outfit_composer import COMPOSER_VERSION, compose_outfit_from_seed, outfit_response
+from ..metrics import timed
+
+# Compiled lookbook of DATA_FILE. Allows override via env.
+LOOKBOOK_FILE = os.getenv(
+    "LOOKBOOK_FILE",
+    os.path.splitext(data_loader.DATA_FILE)[0] + ".lookbook.npz",
+)
+
+# Budget tiers precomputed by default; None is the unconstrained outfit.
+DEFAULT_TIERS: Tuple[Optional[float], ...] = (None, 50.0, 75.0, 100.0, 150.0)
+
+# Catalog version used by pool workers, loaded once per worker process.
+_worker_catalog: Optional[CatalogVersion] = None
+
+
+class Lookbook:
+    """Outfits precomputed for one catalog fingerprint and compatibility tables."""
+
+    def __init__(
+        self, members: np.ndarray, tiers: Sequence[Optional[float]], fingerprint: str, tables: str
+    ) -> None:
+        self.members = members
+        self.tiers = tuple(tiers)
+        self.fingerprint = fingerprint
+        self.tables = tables
+        self._tier_column = {tier: col for col, tier in enumerate(self.tiers)}
+
+    def __len__(self) -> int:
+        return int(self.members.shape[0])
+
+    def outfit(
+        self, catalog: CatalogVersion, seed_id: Any, budget: Optional[float] = None, k: int = 1
+    ) -> Optional[Dict[str, Any]]:
+        """Return the precomputed outfit for a seed, or None on a miss.
+
+        A miss is a catalog with another fingerprint or compatibility tables,
+        an unknown seed, a budget that is not one of the tiers or more than
+        one outfit asked for.
+        """
+        if k != 1 or not self.matches(catalog):
+            return None
+        col = self._tier_column.get(None if budget is None else float(budget))
+        pos = catalog.index.position(seed_id)
+        if col is None or pos is None or pos >= len(self):
+            return None
+        items = catalog.items
+        seed = items[pos]
+        return outfit_response(seed, [[items[int(p)] for p in self.members[pos, col] if p >= 0]])
+
+    def matches(self, catalog: CatalogVersion) -> bool:
+        """Whether this lookbook was built from `catalog` and its compatibility tables."""
+        engine: CompatibilityEngine = catalog.derived("compatibility")
+        return catalog.fingerprint == self.fingerprint and engine.tables_hash == self.tables
+
+    def save(self, path: str) -> None:
+        """Write the artifact atomically (write to a temp file, then rename)."""
+        tiers = np.array([math.nan if t is None else t for t in self.tiers], dtype=np.float64)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            np.savez(
+                fh,
+                members=self.members,
+                tiers=tiers,
+                fingerprint=np.array(self.fingerprint),
+                tables=np.array(self.tables),
+                composer=np.array(COMPOSER_VERSION),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Lookbook":
+        """Read an artifact; raises ValueError if an older composer built it."""
+        with np.load(path) as data:
+            if "composer" not in data or int(data["composer"]) != COMPOSER_VERSION:
+                raise ValueError("construído por outra versão do compositor")
+            tiers = [None if math.isnan(t) else float(t) for t in data["tiers"]]
+            tables = str(data["tables"]) if "tables" in data else ""
+            return cls(data["members"], tiers, str(data["fingerprint"]), tables)
+
+
+def _outfit_positions(catalog: CatalogVersion, seed: Dict[str, Any], budget: Optional[float]) -> List[int]:
+    """Catalog positions of the items composed around `seed` (seed excluded)."""
+    outfit = compose_outfit_from_seed(seed, budget, catalog)
+    return [catalog.index.position(item.get("id")) for item in outfit["items"][1:]]
+
+
+def _init_worker(source: Optional[str]) -> None:
+    global _worker_catalog
+    _worker_catalog = CatalogVersion(_load_items(source), version=0, source="lookbook")
+
+
+def _compose_chunk(start: int, stop: int, tiers: Sequence[Optional[float]]) -> Tuple[int, List[List[List[int]]]]:
+    """Compose the outfits of seeds `start..stop` in a pool worker."""
+    catalog = _worker_catalog
+    rows = []
+    for pos in range(start, stop):
+        seed = catalog.items[pos]
+        rows.append([_outfit_positions(catalog, seed, tier) for tier in tiers])
+    return start, rows
+
+
+def _load_items(source: Optional[str]) -> Sequence[Dict[str, Any]]:
+    if source is None:
+        return data_loader.load_catalog_items()
+    with open(os.path.abspath(source), "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def build_lookbook(
+    source: Optional[str] = None,
+    tiers: Sequence[Optional[float]] = DEFAULT_TIERS,
+    workers: Optional[int] = None,
+    chunk_size: int = 2048,
+) -> Lookbook:
+    """Compose the outfit of every item for every tier across a process pool.
+
+    Args:
+        source: JSON catalog to read; defaults to DATA_FILE (or its snapshot).
+        tiers: Budgets to precompute; None is the unconstrained outfit.
+        workers: Pool size; defaults to the CPU count. 1 runs in-process.
+        chunk_size: Seeds composed per pool task.
+
+    Returns:
+        The lookbook, keyed by the fingerprint of the catalog and the hash of
+        the compatibility tables it was built from.
+    """
+    catalog = CatalogVersion(_load_items(source), version=0, source="lookbook")
+    count = len(catalog.items)
+    chunks = [(start, min(start + chunk_size, count)) for start in range(0, count, chunk_size)]
+    results: List[Tuple[int, List[List[List[int]]]]] = []
+    if workers == 1:
+        global _worker_catalog
+        _worker_catalog = catalog
+        results = [_compose_chunk(start, stop, tiers) for start, stop in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(source,)) as pool:
+            futures = [pool.submit(_compose_chunk, start, stop, tiers) for start, stop in chunks]
+            results = [future.result() for future in futures]
+
+    slots = max((len(o) for _, rows in results for row in rows for o in row), default=0)
+    members = np.full((count, len(tiers), max(slots, 1)), -1, dtype=np.int32)
+    for start, rows in results:
+        for offset, row in enumerate(rows):
+            for col, positions in enumerate(row):
+                members[start + offset, col, : len(positions)] = positions
+    engine: CompatibilityEngine = catalog.derived("compatibility")
+    return Lookbook(members, tiers, catalog.fingerprint, engine.tables_hash)
+
+
+def _load_for_version(catalog: CatalogVersion) -> Optional[Lookbook]:
+    """Derived-structure builder: the lookbook on disk, if it matches `catalog` and its tables."""
+    if not os.path.exists(LOOKBOOK_FILE):
+        return None
+    try:
+        lookbook = Lookbook.load(LOOKBOOK_FILE)
+    except Exception as e:
+        print(f"⚠️  Lookbook inválido em {LOOKBOOK_FILE}: {e}")
+        return None
+    if not lookbook.matches(catalog) or len(lookbook) != len(catalog.items):
+        return None
+    return lookbook
+
+
+register_derived("lookbook", _load_for_version)
+
+
+@timed("lookbook")
+def lookbook_outfit(
+    catalog: CatalogVersion, seed_id: Any, budget: Optional[float] = None, k: int = 1
+) -> Optional[Dict[str, Any]]:
+    """Return the precomputed outfit for a seed, or None if it must be composed live."""
+    lookbook = catalog.derived("lookbook")
+    return lookbook.outfit(catalog, seed_id, budget, k) if lookbook is not None else None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command-line entry point: build LOOKBOOK_FILE for the current catalog."""
+    parser = argparse.ArgumentParser(description="Precompute the outfit of every catalog item.")
+    parser.add_argument("--source", default=None, help="JSON catalog (default: DATA_FILE or its snapshot)")
+    parser.add_argument("--output", default=LOOKBOOK_FILE, help="lookbook file to write")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPUs)")
+    parser.add_argument("--tiers", default="none,50,75,100,150", help="comma-separated budgets; 'none' = no budget")
+    parser.add_argument("--chunk-size", type=int, default=2048)
+    args = parser.parse_args(argv)
+
+    tiers = [None if t.strip().lower() == "none" else float(t) for t in args.tiers.split(",")]
+    start = time.perf_counter()
+    lookbook = build_lookbook(args.source, tiers, args.workers, args.chunk_size)
+    lookbook.save(os.path.abspath(args.output))
+    print(
+        f"Lookbook com {len(lookbook)} produtos x {len(tiers)} orçamentos escrito em {args.output} "
+        f"({time.perf_counter() - start:.1f}s, catálogo {lookbook.fingerprint})"
+    )
+
+
+if __name__ == "__main__":
+    main()
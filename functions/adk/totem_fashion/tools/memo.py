@@ -0,0 +1,124 @@
+"""
+Versioned memoization for pure catalog tools.
+
+`catalog_search` and the outfit composer only depend on their arguments and
+the catalog contents, and the same calls repeat across users (suggestions
+for a session without swipes are the same page for everyone).
+`VersionedMemo` caches their results per catalog version: each version
+carries its own bounded LRU as a derived structure, so a reload or delta
+starts from an empty cache and the old entries go away with the old
+version. No explicit invalidation needed.
+
+Cached values are frozen (dicts become read-only `MappingProxyType`s, lists
+become tuples), so a caller cannot corrupt what the next caller receives;
+code that needs to modify a result must copy it first.
+
+Every memo counts hits, misses and evictions; `memo_stats()` reports them
+for `/health`. MEMO_MAX_ENTRIES bounds each cache (0 disables memoization).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .catalog import CatalogVersion, register_derived
+from .singleflight import SingleFlight
+
+MAX_ENTRIES = int(os.getenv("MEMO_MAX_ENTRIES", "2048"))
+
+_MEMOS: Dict[str, "VersionedMemo"] = {}
+
+
+def freeze(value: Any) -> Any:
+    """Return a read-only deep copy of dicts and lists (other values as-is)."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Return a plain, mutable copy of a value: mappings to dicts, sequences to lists."""
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
+
+
+class _LRU:
+    """Bounded mapping with least-recently-used eviction."""
+
+    __slots__ = ("entries", "lock")
+
+    def __init__(self) -> None:
+        self.entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.lock = threading.Lock()
+
+
+class VersionedMemo:
+    """LRU memo of a pure function of (catalog version, normalized arguments)."""
+
+    def __init__(self, name: str, maxsize: int = MAX_ENTRIES) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self._derived = f"memo:{name}"
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        self._latest: Optional[int] = None
+        self._lock = threading.Lock()
+        self._flights = SingleFlight(self._derived)
+        register_derived(self._derived, self._new_cache)
+        _MEMOS[name] = self
+
+    def _new_cache(self, catalog: CatalogVersion) -> _LRU:
+        with self._lock:
+            if self._latest is not None and catalog.version > self._latest:
+                self._counters["invalidations"] += 1
+            self._latest = max(self._latest or 0, catalog.version)
+        return _LRU()
+
+    def get_or_compute(self, catalog: CatalogVersion, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the frozen result for `key` on `catalog`, computing it on a miss.
+
+        Args:
+            catalog: Catalog version the result depends on.
+            key: Normalized, hashable call arguments.
+            compute: Produces the result; called without the cache lock.
+                Concurrent misses on the same key share one call.
+        """
+        if self.maxsize <= 0:
+            return freeze(compute())
+        cache: _LRU = catalog.derived(self._derived)
+        with cache.lock:
+            try:
+                value = cache.entries[key]
+            except KeyError:
+                pass
+            else:
+                cache.entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return value
+        value = self._flights.do((catalog.version, key), lambda: freeze(compute()))
+        with cache.lock:
+            self._counters["misses"] += 1
+            cache.entries[key] = value
+            cache.entries.move_to_end(key)
+            while len(cache.entries) > self.maxsize:
+                cache.entries.popitem(last=False)
+                self._counters["evictions"] += 1
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit/miss/eviction/invalidation counters."""
+        return dict(self._counters, maxsize=self.maxsize)
+
+
+def memo_stats() -> Dict[str, Dict[str, int]]:
+    """Counters of every memo, by name."""
+    return {name: memo.stats() for name, memo in _MEMOS.items()}
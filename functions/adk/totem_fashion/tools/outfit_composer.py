@@ -2,110 +2,102 @@
 Outfit composition utilities for the Fashion Finder.
 
 Given a seed product (the item the user likes), this module can assemble a
-coordinated outfit by selecting additional items from the catalog. The
-functionality here is intentionally simple: it defines a mapping between
-categories to suggest possible complements, and a very basic color
-harmonisation to find matching colors. For a more sophisticated styling,
-these mappings and palettes can be expanded.
+coordinated outfit by selecting additional items from the catalog. Which
+categories complete an outfit and which colors go together comes from the
+compatibility tables in `compatibility` (extensible through config.json).
 """
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Mapping, Optional
 
-from .catalog_search import catalog_search
+from .catalog import CatalogVersion, current_catalog
+from .memo import VersionedMemo
+from .outfit_solver import solve
+from ..metrics import timed
 
+# Bumped whenever composition results change, so precomputed lookbooks built
+# by an older composer are ignored.
+COMPOSER_VERSION = 3
 
-# Suggest complementary categories for a given category
-_COMPLEMENT = {
-    "Casaco Bomber": ["Camisola de Malha", "Calças de Ganga Skinny", "Calças de Ganga Wide Leg"],
-    "Camisola de Malha": ["Calças de Ganga Skinny", "Calças Marine", "Casaco Bomber"],
-    "Pijama Polar de Natal": ["Pijama Polar de Natal"],
-    "Polo Jersey": ["Calças Loose Fit", "Casaco Bomber"],
-    "Calças Loose Fit": ["Polo Jersey", "Casaco Bomber"],
-    "Calças de Ganga Wide Leg": ["Camisola de Malha", "Casaco Bomber"],
-    # Add more mappings as the dataset expands
-}
+_MEMO = VersionedMemo("outfits")
 
 
-def _harmonize_colors(color: Optional[str]) -> List[str]:
-    """Return a list of colors that pair well with the given color.
+def compose_outfit_from_seed(
+    seed: Dict[str, Any],
+    budget: Optional[float] = None,
+    catalog: Optional[CatalogVersion] = None,
+    k: int = 1,
+) -> Dict[str, Any]:
+    """Given a seed product, assemble the best complementary outfits.
 
-    This simple palette is based on intuitive combinations; feel free to
-    expand with more nuanced rules. If color is None or not found, return
-    an empty list to allow broader matching.
-    """
-    if not color:
-        return []
-    palette = {
-        "bege": ["castanho", "branco", "bege claro", "preto"],
-        "cinzento escuro": ["preto", "branco", "rosa"],
-        "verde": ["preto", "bege", "branco"],
-        "multicor": [],  # no specific harmonies
-        "branco": ["preto", "bege", "azul escuro"],
-        "preto": ["branco", "bege", "azul escuro"],
-        "bege claro": ["bege", "castanho", "branco"],
-        "azul escuro": ["branco", "bege", "preto"],
-        "rosa": ["branco", "bege", "preto"],
-        # Extend with more colors from the dataset
-    }
-    return palette.get(color.lower(), [])
-
-
-def compose_outfit_from_seed(seed: Dict[str, Any], budget: Optional[float] = None) -> Dict[str, Any]:
-    """Given a seed product, assemble a list of complementary items.
+    Each complementary category contributes at most one item; the solver in
+    `outfit_solver` picks the combinations with the best color compatibility
+    with the seed that fit the budget, preferring cheaper items on ties.
 
     Args:
         seed: The base product dict from which to build an outfit.
-        budget: Optional maximum total price for the outfit; if provided,
-            items that would cause the total to exceed the budget are skipped.
+        budget: Optional maximum total price for the outfit, seed included.
+        catalog: Catalog version to compose from; defaults to the current
+            one. All lookups of a composition use the same version.
+        k: Number of alternative outfits to return.
 
     Returns:
-        A dict containing the selected items, the total price, and an
-        explanation string.
+        A dict containing the best outfit's items, total price and
+        explanation, plus `outfits`: the k best outfits in the same shape.
     """
+    catalog = catalog or current_catalog()
+    engine = catalog.derived("compatibility")
     seed_cat = seed.get("category")
-    seed_color = seed.get("color")
     seed_price = float(seed.get("price", 0.0))
 
     # Determine target categories. Use fallback if none defined.
-    target_cats = _COMPLEMENT.get(seed_cat, [])
+    target_cats = engine.complements(seed_cat)
     if not target_cats:
         # fallback: choose up to 3 different categories other than the seed category
         # get unique categories from the catalog
-        from .data_loader import ITEMS
-        all_cats = sorted(set(item.get("category") for item in ITEMS))
+        all_cats = sorted(catalog.index.categories())
         target_cats = [c for c in all_cats if c != seed_cat][:3]
 
-    # Determine matching colors
-    colors = _harmonize_colors(seed_color)
-    if not colors:
-        colors = [seed_color] if seed_color else []
-
-    outfit: List[Dict[str, Any]] = [seed]
-    total_price = seed_price
-
-    for cat in target_cats:
-        # Search for items in this category that match one of the preferred colors
-        item = None
-        for color in colors:
-            results = catalog_search(category=cat, color=color, limit=1)
-            if results:
-                item = results[0]
-                break
-        # If no color match, pick the first item in the category
-        if item is None:
-            results = catalog_search(category=cat, limit=1)
-            item = results[0] if results else None
-        # Add to outfit if found and within budget
-        if item:
-            if budget is not None and total_price + float(item.get("price", 0.0)) > budget:
-                continue
-            outfit.append(item)
-            total_price += float(item.get("price", 0.0))
+    outfits = solve(
+        catalog,
+        target_cats,
+        engine.color_scores(seed.get("color")),
+        k=max(k, 1),
+        budget=None if budget is None else budget - seed_price,
+        exclude=catalog.index.position(seed.get("id")),
+    )
+    return outfit_response(seed, outfits or [[]])
+
+
+@timed("outfit_composer")
+def outfit_for_seed(
+    seed: Dict[str, Any],
+    budget: Optional[float] = None,
+    catalog: Optional[CatalogVersion] = None,
+    k: int = 1,
+) -> Mapping[str, Any]:
+    """Memoized `compose_outfit_from_seed`, keyed by seed id, budget and k.
+
+    The seed must come from `catalog`. The result is read-only.
+    """
+    catalog = catalog or current_catalog()
+    key = (seed.get("id"), None if budget is None else float(budget), max(int(k), 1))
+    return _MEMO.get_or_compute(catalog, key, lambda: compose_outfit_from_seed(seed, budget, catalog, k))
+
 
+def outfit_result(seed: Dict[str, Any], extras: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the outfit response for a seed and the items chosen around it."""
+    total_price = float(seed.get("price", 0.0))
+    for item in extras:
+        total_price += float(item.get("price", 0.0))
     return {
-        "items": outfit,
+        "items": [seed, *extras],
         "total_price": round(total_price, 2),
         "explanation": f"Outfit baseado em '{seed.get('name')}', com cores e categorias complementares.",
     }
+
+
+def outfit_response(seed: Dict[str, Any], outfits: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Build the `/outfit` response: the best outfit plus all alternatives."""
+    return {**outfit_result(seed, outfits[0]), "outfits": [outfit_result(seed, extras) for extras in outfits]}
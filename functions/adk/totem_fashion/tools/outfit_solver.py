@@ -0,0 +1,265 @@
+"""
+Budget-constrained top-k outfit search.
+
+An outfit is the seed plus at most one item from each complementary
+category, which makes composition a multiple-choice knapsack: each category
+is a group, each candidate has a value (how well it goes with the seed) and a
+weight (its price), a group may be skipped, and the total price must fit the
+budget.
+
+Values are small integers so ties are exact: a candidate is worth
+`2 * SCALE` plus its color compatibility with the seed (a score in [0, 1]
+from the `compatibility` matrix) times `SCALE`. Every piece is therefore
+worth more than any color bonus, so fuller outfits rank first and, among
+equally full ones, better colors and then lower prices win.
+
+Per catalog version, the items of every category are kept as price-sorted
+NumPy columns of prices and interned color ids (`outfit_pools`). A request
+scores a category's pool with one gather from the seed's row of the color
+matrix and reduces it to at most k candidates per value level, then
+drops candidates dominated (higher-or-equal price, lower-or-equal value) by k
+others, since none of those can appear in a top-k outfit. The remaining
+handful per category are searched with depth-first branch-and-bound: the
+bound of a partial outfit adds, for every open category, the best value still
+affordable with the remaining budget.
+
+Alternatives must be real alternatives: an outfit that leaves a category
+empty although one of its items would still fit the budget is only the
+outfit with that item, minus a piece, and is never returned. Every outfit
+returned therefore differs from every other one in a slot it fills. The best
+outfit is never affected (adding the piece would score higher).
+"""
+
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_right
+from itertools import count
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .catalog import CatalogVersion, register_derived
+from .compatibility import CompatibilityEngine
+
+# (value, price, catalog position)
+Candidate = Tuple[int, float, int]
+
+# Slack for float price sums against the budget.
+_EPS = 1e-9
+# Integer resolution of color compatibility scores.
+SCALE = 100
+
+
+class CategoryPool:
+    """Items of one category as columns sorted by price (then catalog order).
+
+    `color_ids` are the compatibility engine's color ids; items without a
+    (known) color use the extra id `len(engine.colors)`.
+    """
+
+    __slots__ = ("positions", "prices", "color_ids")
+
+    def __init__(self, positions: np.ndarray, prices: np.ndarray, color_ids: np.ndarray) -> None:
+        self.positions = positions
+        self.prices = prices
+        self.color_ids = color_ids
+
+
+def build_pools(catalog: CatalogVersion) -> Dict[int, CategoryPool]:
+    """Group the catalog by compatibility category id into `CategoryPool`s."""
+    engine: CompatibilityEngine = catalog.derived("compatibility")
+    no_color = len(engine.colors)
+    color_cache: Dict[Any, int] = {}
+    category_cache: Dict[Any, Optional[int]] = {}
+    grouped: Dict[int, Tuple[List[int], List[float], List[int]]] = {}
+    for pos, item in enumerate(catalog.items):
+        category = item.get("category")
+        if category not in category_cache:
+            category_cache[category] = engine.category_id(category)
+        key = category_cache[category]
+        if key is None:
+            continue
+        color = item.get("color")
+        if color not in color_cache:
+            cid = engine.color_id(color)
+            color_cache[color] = no_color if cid is None else cid
+        positions, prices, color_ids = grouped.setdefault(key, ([], [], []))
+        positions.append(pos)
+        prices.append(float(item.get("price") or 0.0))
+        color_ids.append(color_cache[color])
+
+    pools: Dict[int, CategoryPool] = {}
+    for key, (positions, prices, color_ids) in grouped.items():
+        price_arr = np.asarray(prices, dtype=np.float64)
+        order = np.argsort(price_arr, kind="stable")
+        pools[key] = CategoryPool(
+            np.asarray(positions, dtype=np.int64)[order],
+            price_arr[order],
+            np.asarray(color_ids, dtype=np.int32)[order],
+        )
+    return pools
+
+
+register_derived("outfit_pools", build_pools)
+
+
+def category_candidates(
+    pool: CategoryPool,
+    color_values: np.ndarray,
+    k: int,
+    max_price: Optional[float] = None,
+    exclude: Optional[int] = None,
+) -> List[Candidate]:
+    """Value a category and keep only the candidates a top-k outfit can use.
+
+    Args:
+        pool: The category's items.
+        color_values: Integer value of a piece for every color id (see
+            `piece_values`).
+        k: Number of outfits requested.
+        max_price: Most a single item may cost (the budget left after the seed).
+        exclude: Catalog position never to pick (the seed itself).
+
+    Returns:
+        Candidates sorted by value (desc), price and catalog position.
+    """
+    size = len(pool.prices)
+    if max_price is not None:
+        size = int(np.searchsorted(pool.prices, max_price + _EPS, side="right"))
+    if size == 0:
+        return []
+    values = color_values[pool.color_ids[:size]]
+
+    # Pools are price-sorted, so the first k of each level are its k cheapest
+    picks: List[int] = []
+    for level in np.unique(values):
+        level_idx = np.flatnonzero(values == level)
+        if exclude is not None:
+            level_idx = level_idx[pool.positions[level_idx] != exclude]
+        picks.extend(level_idx[:k].tolist())
+    candidates = sorted(
+        ((int(values[i]), float(pool.prices[i]), int(pool.positions[i])) for i in picks),
+        key=lambda c: (-c[0], c[1], c[2]),
+    )
+
+    # Every kept candidate before `c` has a value >= c's; drop `c` once k of
+    # them are also no more expensive.
+    kept: List[Candidate] = []
+    for cand in candidates:
+        if sum(1 for other in kept if other[1] <= cand[1]) < k:
+            kept.append(cand)
+    return kept
+
+
+def piece_values(color_scores: np.ndarray) -> np.ndarray:
+    """Integer value of a piece per color id, plus a last entry for "no color"."""
+    values = np.full(len(color_scores) + 1, 2 * SCALE, dtype=np.int64)
+    values[:-1] += np.rint(color_scores * SCALE).astype(np.int64)
+    return values
+
+
+def top_k_outfits(
+    groups: Sequence[Sequence[Candidate]],
+    k: int,
+    budget: Optional[float] = None,
+) -> List[Tuple[int, float, Tuple[int, ...]]]:
+    """Find the k best combinations of at most one candidate per group.
+
+    Args:
+        groups: Candidates per category, as returned by `category_candidates`.
+        k: Number of combinations to return.
+        budget: Maximum summed price of the chosen candidates, if any.
+
+    Returns:
+        (value, price, positions) tuples, best first. Combinations leaving a
+        group empty while one of its candidates still fits are skipped: they
+        are a better combination minus a piece.
+    """
+    if k <= 0:
+        return []
+    # Per group: option prices ascending and the best value up to each price,
+    # to bound what the open groups can still add within a budget.
+    by_price = [sorted(group, key=lambda c: c[1]) for group in groups]
+    bound_prices = [[c[1] for c in group] for group in by_price]
+    bound_values: List[List[int]] = []
+    for group in by_price:
+        best, running = [], 0
+        for cand in group:
+            running = max(running, cand[0])
+            best.append(running)
+        bound_values.append(best)
+
+    def bound(start: int, left: Optional[float]) -> int:
+        total = 0
+        for g in range(start, len(groups)):
+            if left is None:
+                total += bound_values[g][-1] if bound_values[g] else 0
+            else:
+                cut = bisect_right(bound_prices[g], left + _EPS)
+                total += bound_values[g][cut - 1] if cut else 0
+        return total
+
+    heap: List[Tuple[int, float, int, Tuple[int, ...]]] = []  # (value, -price, -seq, positions)
+    seq = count()
+
+    def fits(g: int, left: Optional[float]) -> bool:
+        """Whether some candidate of group g costs at most `left`."""
+        return bool(bound_prices[g]) and (left is None or bound_prices[g][0] <= left + _EPS)
+
+    def search(g: int, value: int, price: float, chosen: Tuple[int, ...], skipped: Tuple[int, ...]) -> None:
+        left = None if budget is None else budget - price
+        if len(heap) == k:
+            worst_value, worst_neg_price = heap[0][0], heap[0][1]
+            best = value + bound(g, left)
+            if best < worst_value or (best == worst_value and -price <= worst_neg_price):
+                return
+        if g == len(groups):
+            if any(fits(s, left) for s in skipped):
+                return
+            entry = (value, -price, -next(seq), chosen)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heappushpop(heap, entry)
+            return
+        for cand_value, cand_price, pos in groups[g]:
+            if left is not None and cand_price > left + _EPS:
+                continue
+            search(g + 1, value + cand_value, price + cand_price, chosen + (pos,), skipped)
+        # Leaving the category out is only valid if, in the end, none of it
+        # fits; the budget left only shrinks, so check those that fit now.
+        search(g + 1, value, price, chosen, skipped + (g,) if fits(g, left) else skipped)
+
+    search(0, 0, 0.0, (), ())
+    ranked = sorted(heap, reverse=True)
+    return [(value, -neg_price, chosen) for value, neg_price, _, chosen in ranked]
+
+
+def solve(
+    catalog: CatalogVersion,
+    categories: Sequence[str],
+    color_scores: np.ndarray,
+    k: int = 1,
+    budget: Optional[float] = None,
+    exclude: Optional[int] = None,
+) -> List[List[Dict[str, Any]]]:
+    """Return the items of the k best outfits over `categories`, best first.
+
+    Args:
+        catalog: Catalog version to pick items from.
+        categories: Complementary categories, at most one item each.
+        color_scores: Compatibility of every color id with the seed's color.
+        k: Number of outfits.
+        budget: Budget left for the added items (seed excluded), if any.
+        exclude: Catalog position never to pick (the seed itself).
+    """
+    engine: CompatibilityEngine = catalog.derived("compatibility")
+    pools = catalog.derived("outfit_pools")
+    values = piece_values(color_scores)
+    groups = []
+    for category in categories:
+        pool = pools.get(engine.category_id(category))
+        groups.append(category_candidates(pool, values, k, budget, exclude) if pool is not None else [])
+    items = catalog.items
+    return [[items[pos] for pos in chosen] for _, _, chosen in top_k_outfits(groups, k, budget)]
@@ -0,0 +1,287 @@
+"""
+Cross-session popularity with exponential time decay.
+
+`PopularityAggregator` is fed every swipe by `SessionManager` and keeps, for
+each product id, category and color, how many likes and dislikes it got
+across all sessions, with older swipes counting less: a swipe's weight
+halves every POPULARITY_HALF_LIFE_HOURS (24 by default).
+
+Decay costs nothing per event. Counts are stored scaled to a reference time
+`t0`: a swipe at time `ts` adds `exp(rate * (ts - t0))`, and reading a count
+at time `t` multiplies by `exp(-rate * (t - t0))`. Every count decays by the
+same factor, so rankings only need the stored values. When the scale gets
+large, all arrays are rescaled to a new `t0` in one NumPy pass. Counts live
+in flat float64 arrays, one slot per key, grown by doubling.
+
+`ranking(catalog)` orders a catalog version by popularity: an item's net
+votes (likes minus DISLIKE_WEIGHT dislikes) plus a share of the net votes of
+its category and color, averaged over their items, so new products inherit
+the taste for their category and color. Products nobody reacted to keep
+file order. Rankings are cached for RANK_TTL seconds. `popular(catalog, k)`
+returns only the head of the ranking: the top k products with a positive
+score.
+
+Counts are saved to POPULARITY_FILE every POPULARITY_SNAPSHOT_SECONDS (if
+anything changed) and loaded back on startup, so a restarted instance
+resumes warm. Set POPULARITY_FILE to an empty string to disable snapshots.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from .catalog import CatalogVersion, register_derived
+from .compatibility import CompatibilityEngine, fold
+from .singleflight import SingleFlight
+
+HALF_LIFE_HOURS = float(os.getenv("POPULARITY_HALF_LIFE_HOURS", "24"))
+POPULARITY_FILE = os.getenv(
+    "POPULARITY_FILE", os.path.join(tempfile.gettempdir(), "totem_popularity.npz")
+)
+SNAPSHOT_SECONDS = float(os.getenv("POPULARITY_SNAPSHOT_SECONDS", "60"))
+RANK_TTL = 30.0
+
+# A dislike is a weaker signal than a like (as in the recommender).
+DISLIKE_WEIGHT = 0.6
+# Share of the per-item category and color votes added to an item's score.
+CATEGORY_WEIGHT = 0.5
+COLOR_WEIGHT = 0.25
+# Rescale to a new t0 before exp() of the scale grows past this.
+_MAX_EXPONENT = 30.0
+
+
+class _Counts:
+    """Decayed like/dislike counts for a growing set of keys."""
+
+    def __init__(self) -> None:
+        self.slots: Dict[str, int] = {}
+        self.votes = np.zeros((2, 64), dtype=np.float64)  # rows: likes, dislikes
+
+    def add(self, key: str, row: int, weight: float) -> None:
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = self.slots[key] = len(self.slots)
+            if slot == self.votes.shape[1]:
+                self.votes = np.concatenate([self.votes, np.zeros_like(self.votes)], axis=1)
+        self.votes[row, slot] += weight
+
+    def net(self) -> np.ndarray:
+        """Likes minus weighted dislikes, per slot."""
+        used = len(self.slots)
+        return self.votes[0, :used] - DISLIKE_WEIGHT * self.votes[1, :used]
+
+    def state(self, prefix: str) -> Dict[str, np.ndarray]:
+        return {
+            f"{prefix}_keys": np.array(list(self.slots), dtype=str),
+            f"{prefix}_votes": self.votes[:, : len(self.slots)].copy(),
+        }
+
+    @classmethod
+    def from_state(cls, keys: np.ndarray, votes: np.ndarray) -> "_Counts":
+        counts = cls()
+        counts.slots = {str(key): slot for slot, key in enumerate(keys)}
+        counts.votes = np.zeros((2, max(64, 2 * len(keys))), dtype=np.float64)
+        counts.votes[:, : len(keys)] = votes
+        return counts
+
+
+class _CatalogCodes:
+    """Folded category and canonical color of every item of a catalog version."""
+
+    def __init__(self, catalog: CatalogVersion) -> None:
+        engine: CompatibilityEngine = catalog.derived("compatibility")
+        self.dims: Dict[str, Tuple[List[str], np.ndarray, np.ndarray]] = {}
+        for dim, normalize in (("category", fold), ("color", engine.normalize_color)):
+            vocab: Dict[str, int] = {}
+            codes = np.fromiter(
+                (vocab.setdefault(normalize(item.get(dim)), len(vocab)) for item in catalog.items),
+                dtype=np.int32,
+                count=len(catalog.items),
+            )
+            sizes = np.bincount(codes, minlength=len(vocab)).astype(np.float64)
+            self.dims[dim] = (list(vocab), codes, sizes)
+
+
+register_derived("popularity_codes", _CatalogCodes)
+_RANKINGS = SingleFlight("popularity_ranking")
+
+
+class PopularityAggregator:
+    """Time-decayed swipe counts per item, category and color, across sessions."""
+
+    def __init__(
+        self,
+        half_life_hours: float = HALF_LIFE_HOURS,
+        path: Optional[str] = POPULARITY_FILE,
+        snapshot_seconds: float = SNAPSHOT_SECONDS,
+    ) -> None:
+        self.rate = math.log(2) / (half_life_hours * 3600.0)
+        self.path = path or None
+        self.t0 = time.time()
+        self.counts = {"item": _Counts(), "category": _Counts(), "color": _Counts()}
+        self.events = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        # (catalog version, category) -> (computed at, ordered positions, how many scored > 0)
+        self._rankings: Dict[Tuple[int, str], Tuple[float, np.ndarray, int]] = {}
+        if self.path:
+            self.load()
+            if snapshot_seconds > 0:
+                thread = threading.Thread(
+                    target=self._run_snapshots, args=(snapshot_seconds,), name="popularity-snapshot", daemon=True
+                )
+                thread.start()
+
+    def record(self, kind: str, product: Mapping[str, Any], ts: Optional[float] = None) -> None:
+        """Count one like or dislike, in O(1).
+
+        A `ts` in the future (clock skew, milliseconds) counts as now: scaling
+        to it would move `t0` past every other count.
+        """
+        now = time.time()
+        ts = now if ts is None else min(ts, now)
+        row = 0 if kind == "like" else 1
+        with self._lock:
+            if self.rate * (now - self.t0) > _MAX_EXPONENT:
+                self._rescale(now)
+            weight = math.exp(self.rate * (ts - self.t0))
+            if product.get("id") is not None:
+                self.counts["item"].add(str(product["id"]), row, weight)
+            if product.get("category"):
+                self.counts["category"].add(fold(product["category"]), row, weight)
+            if product.get("color"):
+                self.counts["color"].add(fold(product["color"]), row, weight)
+            self.events += 1
+            self._dirty = True
+
+    def scores(self, catalog: CatalogVersion) -> np.ndarray:
+        """Popularity score of every item of a catalog version, in scaled units."""
+        codes: _CatalogCodes = catalog.derived("popularity_codes")
+        engine: CompatibilityEngine = catalog.derived("compatibility")
+        scores = np.zeros(len(catalog.items), dtype=np.float64)
+        with self._lock:
+            for dim, weight in (("category", CATEGORY_WEIGHT), ("color", COLOR_WEIGHT)):
+                vocab, item_codes, sizes = codes.dims[dim]
+                counts = self.counts[dim]
+                net = counts.net()
+                normalize = engine.normalize_color if dim == "color" else fold
+                # Votes are keyed by folded name; colors merge their synonyms
+                per_value = np.zeros(len(vocab), dtype=np.float64)
+                canonical = {name: i for i, name in enumerate(vocab)}
+                for key, slot in counts.slots.items():
+                    value = canonical.get(normalize(key))
+                    if value is not None:
+                        per_value[value] += net[slot]
+                scores += weight * (per_value / np.maximum(sizes, 1.0))[item_codes]
+            items = self.counts["item"]
+            net = items.net()
+            for item_id, slot in items.slots.items():
+                pos = catalog.index.position(item_id)
+                if pos is not None:
+                    scores[pos] += net[slot]
+        return scores
+
+    def ranking(self, catalog: CatalogVersion, category: Optional[str] = None) -> np.ndarray:
+        """Positions of the catalog (or of one category) from most to least popular.
+
+        Ties, including products nobody reacted to, keep catalog order.
+        """
+        return self._ranked(catalog, category)[0]
+
+    def popular(self, catalog: CatalogVersion, category: Optional[str] = None, k: int = 30) -> List[int]:
+        """Positions of the (up to) k most popular products with a positive score."""
+        ranked, positive = self._ranked(catalog, category)
+        return [int(pos) for pos in ranked[: min(k, positive)]]
+
+    def _ranked(self, catalog: CatalogVersion, category: Optional[str]) -> Tuple[np.ndarray, int]:
+        key = (catalog.version, (category or "").lower())
+        now = time.time()
+        cached = self._rankings.get(key)
+        if cached is not None and now - cached[0] < RANK_TTL:
+            return cached[1:]
+        # Mirrors opening on the same category at once share one ranking
+        return _RANKINGS.do(key, lambda: self._rank(catalog, category, key, now))
+
+    def _rank(
+        self, catalog: CatalogVersion, category: Optional[str], key: Tuple[int, str], now: float
+    ) -> Tuple[np.ndarray, int]:
+        scores = self.scores(catalog)
+        candidates = np.asarray(catalog.index.positions(category), dtype=np.int64)
+        ranked = candidates[np.lexsort((candidates, -scores[candidates]))]
+        positive = int(np.count_nonzero(scores[candidates] > 0))
+        if len(self._rankings) > 256:
+            self._rankings.clear()
+        self._rankings[key] = (now, ranked, positive)
+        return ranked, positive
+
+    def top(self, catalog: CatalogVersion, k: int) -> List[Any]:
+        """The k most popular products."""
+        return [catalog.items[int(pos)] for pos in self.ranking(catalog)[:k]]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "events": self.events,
+                "items": len(self.counts["item"].slots),
+                "half_life_hours": round(math.log(2) / self.rate / 3600.0, 2),
+                "snapshot": self.path,
+            }
+
+    # --- Snapshots ---
+    def save(self) -> None:
+        """Write the counts to `path` atomically, if they changed."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            state = {"t0": np.array(self.t0), "rate": np.array(self.rate), "events": np.array(self.events)}
+            for name, counts in self.counts.items():
+                state.update(counts.state(name))
+            self._dirty = False
+        tmp = f"{self.path}.tmp.npz"
+        np.savez(tmp, **state)
+        os.replace(tmp, self.path)
+
+    def load(self) -> bool:
+        """Resume from the snapshot at `path`; returns False if there is none."""
+        try:
+            with np.load(self.path) as data:
+                state = {key: data[key] for key in data.files}
+        except (FileNotFoundError, OSError, ValueError) as exc:
+            if os.path.exists(self.path):
+                print(f"⚠️  Snapshot de popularidade inválido ({self.path}): {exc}")
+            return False
+        if float(state["t0"]) > time.time():
+            print(f"⚠️  Snapshot de popularidade ignorado ({self.path}): t0 no futuro")
+            return False
+        with self._lock:
+            counts = {name: _Counts.from_state(state[f"{name}_keys"], state[f"{name}_votes"]) for name in self.counts}
+            # Bring the stored values to this instance's decay rate and t0
+            factor = math.exp(-float(state["rate"]) * (self.t0 - float(state["t0"])))
+            for c in counts.values():
+                c.votes *= factor
+            self.counts = counts
+            self.events = int(state["events"])
+        return True
+
+    def _rescale(self, now: float) -> None:
+        factor = math.exp(-self.rate * (now - self.t0))
+        for counts in self.counts.values():
+            counts.votes *= factor
+        self.t0 = now
+
+    def _run_snapshots(self, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                self.save()
+            except OSError as exc:
+                print(f"⚠️  Falha ao gravar a popularidade em {self.path}: {exc}")
@@ -8,7 +8,7 @@ current profile.
 
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 from ..agent.session import SessionManager
 
@@ -29,6 +29,12 @@ class PreferenceStoreTool:
         self.sm.add_dislike(session_id, product)
         return {"ok": True}
 
+    def record_batch(
+        self, session_id: str, swipes: Iterable[Tuple[str, Dict[str, Any], Optional[float]]]
+    ) -> Dict[str, Any]:
+        """Record `(kind, product, ts)` swipes in order and report how many were applied."""
+        return {"ok": True, "applied": self.sm.record_batch(session_id, swipes)}
+
     def get_profile(self, session_id: str) -> Dict[str, Any]:
         """Return the entire session data for a given session id."""
         return self.sm.get_session(session_id)
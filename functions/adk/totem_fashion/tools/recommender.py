@@ -0,0 +1,192 @@
+"""
+Vectorized preference scoring for swipe recommendations.
+
+Each catalog version is encoded once as a one-hot feature matrix over
+category, color, brand, gender and price band (the same 10 EUR buckets as the
+session price histogram). Colors and categories are normalized by the
+compatibility engine first, so spelling variants ("Azul-Escuro", "azul
+marinho") share a column. Products that share every feature get identical
+scores, so the matrix stores one row per distinct feature combination
+("profile") together with a CSR-style table mapping profiles back to item
+positions. For real catalogs this is a few thousand rows even at a million
+items, which keeps a full-catalog scoring pass well under a millisecond.
+
+A session's preference vector is derived from its running like/dislike
+aggregates (see `history_recall`): liked values pull the score up, disliked
+values push it down. Scoring is a single matrix-vector product, the best
+profiles are picked with `argpartition`, and items the session has already
+swiped are masked out while expanding profiles into products.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .catalog import CatalogVersion, register_derived
+from .compatibility import CompatibilityEngine, fold
+from .history_recall import ATTRIBUTES, ensure_aggregates, price_bucket
+from ..metrics import timed
+
+# Relative importance of each feature block in the score.
+DIMENSION_WEIGHTS = {"category": 1.0, "color": 1.0, "brand": 0.5, "gender": 0.75, "price": 0.5}
+# Dislikes count for less than likes: a single "no" is a weaker signal.
+DISLIKE_WEIGHT = 0.6
+
+_DIMENSIONS = (*ATTRIBUTES, "price")
+
+
+def _column_values(items: Any, dim: str) -> List[Optional[str]]:
+    """Return the raw value of one feature for every item."""
+    if dim == "price":
+        if hasattr(items, "prices"):
+            # Snapshot catalogs expose the price column directly.
+            return [None if p != p else price_bucket(p) for p in items.prices()]
+        return [price_bucket(item.get("price")) for item in items]
+    if hasattr(items, "codes"):
+        table = items.table(dim)
+        return [table[c] if c < len(table) else None for c in items.codes(dim)]
+    return [item.get(dim) for item in items]
+
+
+class PreferenceScorer:
+    """Feature matrix of one catalog version, deduplicated into profiles."""
+
+    def __init__(self, catalog: CatalogVersion) -> None:
+        self.catalog = catalog
+        engine: CompatibilityEngine = catalog.derived("compatibility")
+        # Canonical spelling of a raw value, per dimension
+        self._normalizers: Dict[str, Callable[[Any], str]] = {
+            "color": engine.normalize_color,
+            "category": fold,
+        }
+        count = len(catalog.items)
+        # value -> column in the feature matrix, per dimension
+        self.columns: Dict[str, Dict[str, int]] = {}
+        codes = []
+        width = 0
+        for dim in _DIMENSIONS:
+            vocab: Dict[str, int] = {}
+            values = _column_values(catalog.items, dim)
+            normalize = self._normalizers.get(dim)
+            if normalize is not None:
+                values = [normalize(v) if v else v for v in values]
+            # Code 0 means "missing"; real values start at 1.
+            dim_codes = np.fromiter(
+                (vocab.setdefault(v, len(vocab) + 1) if v else 0 for v in values),
+                dtype=np.int64,
+                count=count,
+            )
+            self.columns[dim] = {value: width + code - 1 for value, code in vocab.items()}
+            width += len(vocab)
+            codes.append((dim_codes, len(vocab) + 1))
+
+        # Mixed-radix key of the feature combination of each item.
+        keys = np.zeros(count, dtype=np.int64)
+        for dim_codes, radix in codes:
+            keys = keys * radix + dim_codes
+        _, first_pos, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        # Number profiles by first appearance so ties keep catalog order.
+        rank = np.empty(len(first_pos), dtype=np.int64)
+        rank[np.argsort(first_pos, kind="stable")] = np.arange(len(first_pos))
+        profile_of = rank[inverse.reshape(-1)]
+        representatives = np.sort(first_pos)
+
+        self.matrix = np.zeros((len(first_pos), width), dtype=np.float32)
+        rows = np.arange(len(first_pos))
+        offset = 0
+        for dim_codes, radix in codes:
+            rep_codes = dim_codes[representatives]
+            present = rep_codes > 0
+            self.matrix[rows[present], offset + rep_codes[present] - 1] = 1.0
+            offset += radix - 1
+
+        self._members = np.argsort(profile_of, kind="stable").astype(np.int64)
+        self._offsets = np.zeros(len(first_pos) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(profile_of, minlength=len(first_pos)), out=self._offsets[1:])
+
+    @property
+    def profiles(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def profile_members(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Catalog positions grouped by profile, as (members, offsets).
+
+        The items of profile `p` are `members[offsets[p]:offsets[p + 1]]`, in
+        catalog order. Both arrays are shared: callers must not modify them.
+        """
+        return self._members, self._offsets
+
+    def preference_vector(self, aggregates: Dict[str, Any]) -> np.ndarray:
+        """Build the session's preference vector from its like/dislike counters."""
+        vector = np.zeros(self.matrix.shape[1], dtype=np.float32)
+        for kind, sign in (("likes", 1.0), ("dislikes", -DISLIKE_WEIGHT)):
+            side = aggregates[kind]
+            total = side["total"]
+            if not total:
+                continue
+            for dim in _DIMENSIONS:
+                columns = self.columns[dim]
+                normalize = self._normalizers.get(dim)
+                scale = sign * DIMENSION_WEIGHTS[dim] / total
+                for value, count in side[dim]["counts"].items():
+                    column = columns.get(normalize(value) if normalize and value else value)
+                    if column is not None:
+                        vector[column] += scale * count
+        return vector
+
+    def top_k(self, vector: np.ndarray, k: int, exclude: Set[int] = frozenset()) -> List[int]:
+        """Return the positions of the k best-scoring items not in `exclude`."""
+        if k <= 0 or not self.profiles:
+            return []
+        scores = self.matrix @ vector
+        # Every profile holds at least one item, so this many profiles always
+        # contain k items that were not excluded (if the catalog has them).
+        wanted = min(self.profiles, k + len(exclude))
+        if wanted < self.profiles:
+            candidates = np.argpartition(-scores, wanted - 1)[:wanted]
+        else:
+            candidates = np.arange(self.profiles)
+        ordered = candidates[np.lexsort((candidates, -scores[candidates]))]
+
+        picked: List[int] = []
+        for profile in ordered:
+            for pos in self._members[self._offsets[profile] : self._offsets[profile + 1]]:
+                pos = int(pos)
+                if pos in exclude:
+                    continue
+                picked.append(pos)
+                if len(picked) == k:
+                    return picked
+        return picked
+
+
+register_derived("preference_scorer", PreferenceScorer)
+
+
+def _seen_positions(catalog: CatalogVersion, session: Dict[str, Any]) -> Set[int]:
+    prefs = session.get("preferences", {})
+    ids: Iterable[Any] = [
+        *(p.get("id") for p in prefs.get("likes", [])),
+        *(p.get("id") for p in prefs.get("dislikes", [])),
+    ]
+    positions = (catalog.index.position(item_id) for item_id in ids)
+    return {pos for pos in positions if pos is not None}
+
+
+@timed("recommend_for_session")
+def recommend_for_session(
+    session: Dict[str, Any],
+    catalog: CatalogVersion,
+    k: int = 12,
+) -> List[Dict[str, Any]]:
+    """Return the k items that best match the session's likes and dislikes.
+
+    Items the session already liked or disliked are never suggested again.
+    """
+    scorer: PreferenceScorer = catalog.derived("preference_scorer")
+    vector = scorer.preference_vector(ensure_aggregates(session))
+    positions = scorer.top_k(vector, k, _seen_positions(catalog, session))
+    return [catalog.items[pos] for pos in positions]
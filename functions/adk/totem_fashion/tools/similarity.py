@@ -0,0 +1,128 @@
+"""
+Item-to-item "more like this" index.
+
+Similarity is the cosine between the attribute vectors of two products: the
+same one-hot features the recommender scores (category, color, brand,
+gender and price band, see `recommender.PreferenceScorer`), each block
+weighted by its `DIMENSION_WEIGHTS` entry. Products with identical features
+are identical neighbors, so the index works on the scorer's distinct feature
+combinations ("profiles") rather than on items: for each profile it keeps the
+`k + 1` most similar items (its own members first), which is enough to answer
+"k neighbors of any member" once the item itself is dropped.
+
+Profile similarities are computed in row blocks (`block @ matrix.T`) sized
+to stay under `BLOCK_BYTES`, so memory does not grow with the square of the
+catalog. The result is two compact arrays per catalog version: int32
+neighbor positions and float16 scores, one row per profile, plus the int32
+profile of each item.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from .catalog import CatalogVersion, register_derived
+from .recommender import DIMENSION_WEIGHTS, PreferenceScorer
+from ..metrics import timed
+
+# Neighbors kept per item; queries can ask for fewer.
+NEIGHBORS = int(os.getenv("SIMILAR_NEIGHBORS", "20"))
+# Upper bound for one block of the profile similarity matrix.
+BLOCK_BYTES = 64 * 1024 * 1024
+
+
+class SimilarityIndex:
+    """Top-k most similar items of every product of a catalog version."""
+
+    def __init__(self, catalog: CatalogVersion, k: int = NEIGHBORS) -> None:
+        self.catalog = catalog
+        self.k = k
+        scorer: PreferenceScorer = catalog.derived("preference_scorer")
+        members, offsets = scorer.profile_members
+        profiles = scorer.profiles
+        sizes = np.diff(offsets)
+
+        self.profile_of = np.empty(len(members), dtype=np.int32)
+        self.profile_of[members] = np.repeat(np.arange(profiles, dtype=np.int32), sizes)
+
+        # Weighted, L2-normalized profile vectors: dot products are cosines.
+        weights = np.zeros(scorer.matrix.shape[1], dtype=np.float32)
+        for dim, columns in scorer.columns.items():
+            weights[list(columns.values())] = DIMENSION_WEIGHTS[dim]
+        vectors = scorer.matrix * weights
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms > 0, norms, 1.0)
+
+        width = min(k + 1, len(members))
+        self.neighbors = np.full((profiles, width), -1, dtype=np.int32)
+        self.scores = np.zeros((profiles, width), dtype=np.float16)
+        block = max(1, BLOCK_BYTES // max(1, 4 * profiles))
+        for start in range(0, profiles, block):
+            sims = vectors[start : start + block] @ vectors.T
+            rows = np.arange(len(sims))
+            # Own members first, even for items without any feature
+            sims[rows, rows + start] = np.inf
+            # Every profile has at least one member, so `width` profiles suffice
+            if width < profiles:
+                best = np.argpartition(-sims, width - 1, axis=1)[:, :width]
+            else:
+                best = np.broadcast_to(np.arange(profiles), sims.shape)
+            best = np.sort(best, axis=1)
+            order = np.argsort(-np.take_along_axis(sims, best, axis=1), axis=1, kind="stable")
+            best = np.take_along_axis(best, order, axis=1)
+            for row in rows:
+                self._fill(start + row, best[row], sims[row], members, offsets, width)
+
+    def _fill(
+        self,
+        profile: int,
+        best: np.ndarray,
+        sims: np.ndarray,
+        members: np.ndarray,
+        offsets: np.ndarray,
+        width: int,
+    ) -> None:
+        """Expand a profile's most similar profiles into `width` item positions."""
+        filled = 0
+        for other in best:
+            take = members[offsets[other] : offsets[other + 1]][: width - filled]
+            self.neighbors[profile, filled : filled + len(take)] = take
+            self.scores[profile, filled : filled + len(take)] = 1.0 if other == profile else sims[other]
+            filled += len(take)
+            if filled == width:
+                break
+
+    @property
+    def nbytes(self) -> int:
+        return self.neighbors.nbytes + self.scores.nbytes + self.profile_of.nbytes
+
+    def neighbors_of(self, pos: int, k: int) -> List[Tuple[int, float]]:
+        """Up to k `(position, cosine)` pairs most similar to the item at `pos`."""
+        profile = self.profile_of[pos]
+        found = []
+        for other, score in zip(self.neighbors[profile], self.scores[profile]):
+            if other < 0 or len(found) == k:
+                break
+            if other != pos:
+                found.append((int(other), float(score)))
+        return found
+
+
+register_derived("similarity", SimilarityIndex)
+
+
+@timed("similar_items")
+def similar_items(catalog: CatalogVersion, item_id: Any, k: int = 10) -> List[Dict[str, Any]]:
+    """Return the k products most similar to `item_id`, best first.
+
+    Raises:
+        ValueError: If the product is not in the catalog.
+    """
+    pos = catalog.index.position(item_id)
+    if pos is None:
+        raise ValueError(f"Produto com id '{item_id}' não encontrado")
+    index: SimilarityIndex = catalog.derived("similarity")
+    return [catalog.items[other] for other, _ in index.neighbors_of(pos, k)]
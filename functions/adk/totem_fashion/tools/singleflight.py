@@ -0,0 +1,90 @@
+"""
+Request coalescing ("single flight") for duplicate concurrent work.
+
+When mirrors wake up together they send the same requests at the same time,
+and every one of them would compute the same deck ranking, outfit or memo
+miss independently. `SingleFlight.do(key, compute)` lets the first caller
+for a key compute while concurrent callers with the same key wait for, and
+share, its result (or its exception). Nothing is cached: once the leader
+finishes, the next call computes again, so keys should carry everything the
+result depends on (catalog version included).
+
+Shared results are handed to several callers at once and must not be
+modified. SINGLEFLIGHT_ENABLED=0 turns coalescing off.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from ..metrics import counter
+
+ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "1").lower() not in ("0", "false", "no")
+
+COALESCED = counter(
+    "singleflight_calls_total", "Coalesced calls, by group and role (leader or shared).", ("group", "role")
+)
+
+_GROUPS: Dict[str, "SingleFlight"] = {}
+
+
+class _Call:
+    __slots__ = ("done", "value", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one computation."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._counters = {"leaders": 0, "shared": 0}
+        _GROUPS[name] = self
+
+    def do(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return `compute()`, or the result of an identical call already running."""
+        if not ENABLED:
+            return compute()
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._counters["leaders"] += 1
+            else:
+                call.waiters += 1
+                self._counters["shared"] += 1
+        COALESCED.inc(1, self.name, "leader" if leader else "shared")
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = compute()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters, in_flight=len(self._calls))
+
+
+def singleflight_stats() -> Dict[str, Dict[str, int]]:
+    """Counters of every single-flight group, by name."""
+    return {name: group.stats() for name, group in _GROUPS.items()}
@@ -0,0 +1,290 @@
+"""
+Columnar binary snapshot of the product catalog.
+
+Parsing `db_preco.json` and keeping one Python dict per product is the main
+cold-start cost once the catalog grows. This module compiles the JSON array
+into a compact, column-oriented binary file that can be memory-mapped:
+
+* low-cardinality fields (brand, category, color, gender) are interned into a
+  string table and stored as one integer code per item;
+* free-text fields (id, name, image) live in a UTF-8 blob addressed by an
+  offsets table;
+* prices are a float64 array, with NaN marking a missing price;
+* any other keys are kept as a JSON blob per item so nothing is lost.
+
+`SnapshotCatalog` maps such a file and exposes it as a read-only sequence of
+`ItemView` objects. Views are tiny (`__slots__`) and decode fields lazily, but
+otherwise behave like the product dicts returned by `json.load`.
+
+Build a snapshot next to the JSON file with::
+
+    python -m adk.totem_fashion.tools.snapshot
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterator, List, Optional
+
+MAGIC = b"TFSNAP01"
+FORMAT_VERSION = 1
+
+# Canonical key order of a product, matching db_preco.json.
+FIELDS = ("id", "name", "brand", "category", "gender", "color", "image", "price")
+INTERNED_FIELDS = ("brand", "category", "gender", "color")
+TEXT_FIELDS = ("id", "name", "image")
+_EXTRA = "_extra"
+_PRESENCE = "_present"
+_BIT = {name: 1 << i for i, name in enumerate(FIELDS)}
+_MISSING_CODE = 0xFFFFFFFF
+_ALIGN = 8
+
+
+def _pack_strings(values: List[str]) -> tuple[array, bytes]:
+    """Encode strings as an offsets table (len + 1 entries) and a UTF-8 blob."""
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for value in values:
+        blob.extend(value.encode("utf-8"))
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def build_snapshot(items: List[Dict[str, Any]], path: str) -> None:
+    """Compile a list of product dicts into a snapshot file at `path`.
+
+    Raises:
+        ValueError: if an item does not fit the snapshot schema (string fields
+            must be strings, `price` must be a number).
+    """
+    count = len(items)
+    presence = array("B", bytes(count))
+    tables: Dict[str, Dict[str, int]] = {name: {} for name in INTERNED_FIELDS}
+    codes: Dict[str, array] = {name: array("I") for name in INTERNED_FIELDS}
+    texts: Dict[str, List[str]] = {name: [] for name in TEXT_FIELDS}
+    extras: List[str] = []
+    prices = array("d")
+
+    for pos, item in enumerate(items):
+        mask = 0
+        for name in FIELDS:
+            value = item.get(name)
+            if value is None:
+                continue
+            if name == "price":
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise ValueError(f"Item {pos}: 'price' must be a number, got {value!r}")
+            elif not isinstance(value, str):
+                raise ValueError(f"Item {pos}: '{name}' must be a string, got {value!r}")
+            mask |= _BIT[name]
+        presence[pos] = mask
+
+        for name in INTERNED_FIELDS:
+            value = item.get(name)
+            if value is None:
+                codes[name].append(_MISSING_CODE)
+            else:
+                codes[name].append(tables[name].setdefault(value, len(tables[name])))
+        for name in TEXT_FIELDS:
+            texts[name].append(item.get(name) or "")
+        price = item.get("price")
+        prices.append(float(price) if price is not None else math.nan)
+        extra = {k: v for k, v in item.items() if k not in _BIT}
+        extras.append(json.dumps(extra, ensure_ascii=False) if extra else "")
+
+    sections: Dict[str, bytes] = {_PRESENCE: presence.tobytes(), "price": prices.tobytes()}
+    meta: Dict[str, Any] = {"count": count, "sections": {}}
+    for name in INTERNED_FIELDS:
+        offsets, blob = _pack_strings(list(tables[name]))
+        sections[f"{name}.codes"] = codes[name].tobytes()
+        sections[f"{name}.table.offsets"] = offsets.tobytes()
+        sections[f"{name}.table.blob"] = blob
+    for name in (*TEXT_FIELDS, _EXTRA):
+        offsets, blob = _pack_strings(extras if name == _EXTRA else texts[name])
+        sections[f"{name}.offsets"] = offsets.tobytes()
+        sections[f"{name}.blob"] = blob
+
+    # Lay sections out after the header, each aligned for its array typecode.
+    layout: List[tuple[int, bytes]] = []
+    cursor = 0
+    for name, data in sections.items():
+        cursor += -cursor % _ALIGN
+        meta["sections"][name] = [cursor, len(data)]
+        layout.append((cursor, data))
+        cursor += len(data)
+
+    header = json.dumps(meta).encode("utf-8")
+    prefix_len = len(MAGIC) + 8 + len(header)
+    base = prefix_len + (-prefix_len % _ALIGN)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(MAGIC)
+        fh.write(struct.pack("<II", FORMAT_VERSION, len(header)))
+        fh.write(header)
+        fh.write(b"\0" * (base - prefix_len))
+        written = 0
+        for offset, data in layout:
+            fh.write(b"\0" * (offset - written))
+            fh.write(data)
+            written = offset + len(data)
+    os.replace(tmp_path, path)
+
+
+class ItemView(Mapping):
+    """Read-only, dict-like view of one product inside a `SnapshotCatalog`."""
+
+    __slots__ = ("_catalog", "_pos")
+
+    def __init__(self, catalog: "SnapshotCatalog", pos: int) -> None:
+        self._catalog = catalog
+        self._pos = pos
+
+    def __getitem__(self, key: str) -> Any:
+        return self._catalog._value(self._pos, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._catalog._keys(self._pos))
+
+    def __len__(self) -> int:
+        return len(self._catalog._keys(self._pos))
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a plain dict copy of the product."""
+        return {key: self[key] for key in self}
+
+    copy = to_dict
+
+
+class SnapshotCatalog(Sequence):
+    """A memory-mapped snapshot exposed as a sequence of `ItemView`s."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mmap)
+        if bytes(buf[: len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        version, header_len = struct.unpack_from("<II", buf, len(MAGIC))
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version {version}")
+        header_start = len(MAGIC) + 8
+        meta = json.loads(bytes(buf[header_start : header_start + header_len]))
+        base = header_start + header_len
+        base += -base % _ALIGN
+
+        def section(name: str, typecode: str = "B") -> memoryview:
+            offset, length = meta["sections"][name]
+            view = buf[base + offset : base + offset + length]
+            return view.cast(typecode) if typecode != "B" else view
+
+        self._count: int = meta["count"]
+        self._presence = section(_PRESENCE)
+        self._prices = section("price", "d")
+        self._codes = {name: section(f"{name}.codes", "I") for name in INTERNED_FIELDS}
+        # String tables are small by construction; decode them eagerly so
+        # interned fields never touch the blob on access.
+        self._tables: Dict[str, List[str]] = {}
+        for name in INTERNED_FIELDS:
+            offsets = section(f"{name}.table.offsets", "Q")
+            blob = section(f"{name}.table.blob")
+            self._tables[name] = [
+                str(blob[offsets[i] : offsets[i + 1]], "utf-8") for i in range(len(offsets) - 1)
+            ]
+        self._texts = {
+            name: (section(f"{name}.offsets", "Q"), section(f"{name}.blob"))
+            for name in (*TEXT_FIELDS, _EXTRA)
+        }
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [ItemView(self, pos) for pos in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("catalog index out of range")
+        return ItemView(self, index)
+
+    def copy(self) -> List[ItemView]:
+        """Return a list of all item views, mirroring `list.copy`."""
+        return self[:]
+
+    def table(self, name: str) -> List[str]:
+        """Return the interned string table of a low-cardinality field."""
+        return self._tables[name]
+
+    def codes(self, name: str) -> memoryview:
+        """Return the per-item codes of an interned field (zero-copy)."""
+        return self._codes[name]
+
+    def prices(self) -> memoryview:
+        """Return the float64 price column, NaN where the price is missing (zero-copy)."""
+        return self._prices
+
+    # --- Field decoding used by ItemView ---
+    def _text(self, name: str, pos: int) -> str:
+        offsets, blob = self._texts[name]
+        return str(blob[offsets[pos] : offsets[pos + 1]], "utf-8")
+
+    def _extra(self, pos: int) -> Dict[str, Any]:
+        raw = self._text(_EXTRA, pos)
+        return json.loads(raw) if raw else {}
+
+    def _keys(self, pos: int) -> List[str]:
+        mask = self._presence[pos]
+        keys = [name for name in FIELDS if mask & _BIT[name]]
+        if self._texts[_EXTRA][0][pos + 1] != self._texts[_EXTRA][0][pos]:
+            keys.extend(self._extra(pos))
+        return keys
+
+    def _value(self, pos: int, key: str) -> Any:
+        bit = _BIT.get(key)
+        if bit is None:
+            return self._extra(pos)[key]
+        if not self._presence[pos] & bit:
+            raise KeyError(key)
+        if key == "price":
+            return self._prices[pos]
+        if key in self._codes:
+            return self._tables[key][self._codes[key][pos]]
+        return self._text(key, pos)
+
+
+def load_snapshot(path: str) -> Optional[SnapshotCatalog]:
+    """Map the snapshot at `path`, or return None if the file does not exist."""
+    if not os.path.exists(path):
+        return None
+    return SnapshotCatalog(path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command-line entry point: compile DATA_FILE into SNAPSHOT_FILE."""
+    from . import data_loader
+
+    parser = argparse.ArgumentParser(description="Compile the catalog JSON into a binary snapshot.")
+    parser.add_argument("--source", default=data_loader.DATA_FILE, help="JSON catalog to compile")
+    parser.add_argument("--output", default=data_loader.SNAPSHOT_FILE, help="snapshot file to write")
+    args = parser.parse_args(argv)
+
+    with open(os.path.abspath(args.source), "r", encoding="utf-8") as fh:
+        items = json.load(fh)
+    build_snapshot(items, os.path.abspath(args.output))
+    print(f"Snapshot com {len(items)} produtos escrito em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Inverted text index over product name, category and brand.
+
+Text is folded before indexing and querying (lowercase, accents stripped,
+punctuation as separators), so "calcas" finds "Calças" and "AZUL-ESCURO"
+finds "azul escuro". Each folded token gets a posting list of the items that
+contain it, with term frequencies, stored as flat NumPy arrays (CSR layout).
+
+A query term matches every vocabulary token that contains it: exact tokens,
+tokens it is a prefix of (typeahead: "cam" -> "camisola", "camisa") and, for
+terms of three or more characters, alphabetic tokens it appears inside
+("anga" -> "ganga"). Infix candidates come from a trigram index over the
+vocabulary, which keeps expansion proportional to the vocabulary rather than
+the catalog; tokens with digits (references, sizes) are left out of it.
+
+An item must match every query term and is ranked with BM25; a term's best
+expansion counts, weighted by how it matched (exact > prefix > infix).
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# BM25 parameters.
+K1 = 1.2
+B = 0.75
+# Weight of a term's expansion by kind of match.
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.8
+INFIX_WEIGHT = 0.5
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+@lru_cache(maxsize=4096)
+def fold(name: Any) -> str:
+    """Normalize a name: lowercase, no accents, single spaces for - and _."""
+    if name is None:
+        return ""
+    text = str(name)
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.lower().replace("-", " ").replace("_", " ")
+    return " ".join(text.split())
+
+
+@lru_cache(maxsize=65536)
+def tokenize(text: Any) -> Tuple[str, ...]:
+    """Split text into folded alphanumeric tokens."""
+    if text is None:
+        return ()
+    text = str(text)
+    if not text.isascii():
+        # Tokens are ASCII, so dropping whatever is left after NFKD is enough
+        text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return tuple(_TOKEN.findall(text.lower()))
+
+
+def _trigrams(token: str) -> Set[str]:
+    return {token[i : i + 3] for i in range(len(token) - 2)}
+
+
+class TextIndex:
+    """BM25-ranked inverted index with prefix and infix term matching."""
+
+    def __init__(self, texts: Iterable[Sequence[Any]]) -> None:
+        """Index one tuple of searchable field values per item, in catalog order."""
+        token_ids: Dict[str, int] = {}
+        # Items often share their text (same model in several sizes), so
+        # tokenize each distinct text once and expand to items with NumPy.
+        text_ids: Dict[Tuple[Any, ...], int] = {}
+        text_of: List[int] = []
+        flat_tids: List[int] = []
+        flat_tfs: List[int] = []
+        text_starts: List[int] = [0]
+        for fields in texts:
+            fields = tuple(fields)
+            text = text_ids.get(fields)
+            if text is None:
+                text = text_ids[fields] = len(text_ids)
+                tokens: Dict[str, int] = {}
+                for field in fields:
+                    for token in tokenize(field):
+                        tokens[token] = tokens.get(token, 0) + 1
+                for token, tf in tokens.items():
+                    flat_tids.append(token_ids.setdefault(token, len(token_ids)))
+                    flat_tfs.append(tf)
+                text_starts.append(len(flat_tids))
+            text_of.append(text)
+
+        # Expand the per-text token lists into one (token, item, tf) entry
+        # per item: entry j of item i is flat token j of item i's text.
+        text_of_item = np.asarray(text_of, dtype=np.int32)
+        starts = np.asarray(text_starts, dtype=np.int64)
+        per_item = (starts[1:] - starts[:-1])[text_of_item]
+        item_of_entry = np.repeat(np.arange(len(text_of_item), dtype=np.int32), per_item)
+        first_entry = np.cumsum(per_item) - per_item
+        flat = np.arange(len(item_of_entry), dtype=np.int64)
+        flat += np.repeat(starts[:-1][text_of_item] - first_entry, per_item)
+        ids = np.asarray(flat_tids, dtype=np.int32)[flat]
+        tfs = np.asarray(flat_tfs, dtype=np.float32)[flat]
+
+        # CSR: postings of token t are docs[offsets[t]:offsets[t + 1]],
+        # ascending by position.
+        order = np.argsort(ids, kind="stable")
+        self.docs = item_of_entry[order]
+        self.tfs = tfs[order]
+        self.offsets = np.zeros(len(token_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ids, minlength=len(token_ids)), out=self.offsets[1:])
+
+        self.doc_count = len(text_of_item)
+        doc_len = np.bincount(item_of_entry, weights=tfs, minlength=self.doc_count).astype(np.float32)
+        avg_len = float(doc_len.mean()) if self.doc_count else 0.0
+        # Per-doc BM25 length normalization, precomputed
+        self._norm = (K1 * (1 - B + B * doc_len / avg_len)).astype(np.float32) if avg_len else doc_len
+
+        self.token_ids = token_ids
+        self._vocab = sorted(token_ids)
+        self._trigram_tokens: Dict[str, Set[str]] = {}
+        for token in token_ids:
+            if not token.isalpha():
+                # Codes and references are matched by exact or prefix only
+                continue
+            for gram in _trigrams(token):
+                self._trigram_tokens.setdefault(gram, set()).add(token)
+        self._expansions: Dict[str, List[Tuple[int, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.token_ids)
+
+    def expand(self, term: str) -> List[Tuple[int, float]]:
+        """Vocabulary tokens matching a folded query term, with their weights."""
+        cached = self._expansions.get(term)
+        if cached is not None:
+            return cached
+        matches: Dict[str, float] = {}
+        start = bisect_left(self._vocab, term)
+        for token in self._vocab[start:]:
+            if not token.startswith(term):
+                break
+            matches[token] = EXACT_WEIGHT if token == term else PREFIX_WEIGHT
+        if len(term) >= 3:
+            grams = sorted(_trigrams(term), key=lambda g: len(self._trigram_tokens.get(g, ())))
+            candidates = set(self._trigram_tokens.get(grams[0], ()))
+            for gram in grams[1:]:
+                candidates &= self._trigram_tokens.get(gram, set())
+            for token in candidates:
+                if token not in matches and term in token:
+                    matches[token] = INFIX_WEIGHT
+        expansion = [(self.token_ids[token], weight) for token, weight in matches.items()]
+        if len(self._expansions) < 10000:
+            self._expansions[term] = expansion
+        return expansion
+
+    def _term_scores(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Docs matching a term (ascending) and their best weighted BM25 score."""
+        parts_docs, parts_scores = [], []
+        for tid, weight in self.expand(term):
+            lo, hi = self.offsets[tid], self.offsets[tid + 1]
+            docs = self.docs[lo:hi]
+            tfs = self.tfs[lo:hi]
+            df = hi - lo
+            idf = math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+            parts_docs.append(docs)
+            parts_scores.append(weight * idf * tfs * (K1 + 1) / (tfs + self._norm[docs]))
+        if not parts_docs:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        if len(parts_docs) == 1:
+            return parts_docs[0], parts_scores[0]
+        if sum(len(d) for d in parts_docs) * 8 > self.doc_count:
+            # Broad terms (short prefixes): a dense max is cheaper than sorting
+            dense = np.zeros(self.doc_count, dtype=np.float32)
+            for docs, scores in zip(parts_docs, parts_scores):
+                dense[docs] = np.maximum(dense[docs], scores)
+            docs = np.flatnonzero(dense > 0).astype(np.int32)
+            return docs, dense[docs]
+        docs = np.concatenate(parts_docs)
+        scores = np.concatenate(parts_scores)
+        order = np.lexsort((-scores, docs))
+        docs, scores = docs[order], scores[order]
+        first = np.flatnonzero(np.r_[True, docs[1:] != docs[:-1]])
+        return docs[first], scores[first]
+
+    def match(self, query: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Return (positions ascending, BM25 scores) of items matching every term.
+
+        Returns None when the query has no searchable terms.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return None
+        # Rarest terms first keeps the intersections small
+        per_term = sorted((self._term_scores(term) for term in terms), key=lambda ds: len(ds[0]))
+        docs, scores = per_term[0]
+        scores = scores.astype(np.float32)
+        for term_docs, term_scores in per_term[1:]:
+            if not len(docs):
+                break
+            if len(term_docs) * 8 > self.doc_count:
+                # Broad term: scatter its scores densely and gather (BM25 > 0)
+                dense = np.zeros(self.doc_count, dtype=np.float32)
+                dense[term_docs] = term_scores
+                found = dense[docs]
+                keep = found > 0
+                docs, scores = docs[keep], scores[keep] + found[keep]
+            else:
+                # Both lists are sorted: binary-search the shorter into the longer
+                at = np.minimum(np.searchsorted(term_docs, docs), len(term_docs) - 1)
+                keep = term_docs[at] == docs if len(term_docs) else np.zeros(len(docs), dtype=bool)
+                docs, scores = docs[keep], scores[keep] + term_scores[at[keep]]
+        return docs, scores
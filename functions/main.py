@@ -1,19 +1,20 @@
-import asyncio
 import os
+import threading
 from functools import lru_cache
-from pathlib import Path
+
+# Perfil de arranque opcional (STARTUP_PROFILE=1); instalado antes dos
+# restantes imports para que também sejam medidos
+from adk.totem_fashion import metrics, startup_profile
+startup_profile.install()
 
 from firebase_functions import https_fn
 from firebase_functions.options import set_global_options
 
+from adk.totem_fashion.api.asgi_bridge import AsgiBridge
+from adk.totem_fashion.sdk import load_local_env
+
 # Carrega .env apenas em desenvolvimento (caso exista)
-try:
-    from dotenv import load_dotenv
-    env_path = Path(__file__).resolve().parent / "adk" / "totem_fashion" / ".env"
-    if env_path.exists():
-        load_dotenv(dotenv_path=env_path)
-except Exception:
-    pass
+load_local_env()
 
 # Limita instâncias paralelas
 set_global_options(max_instances=10)
@@ -40,21 +41,19 @@ def _build_scope(req: https_fn.Request) -> dict:
         "client": ("", 0),
     }
 
-async def _run_asgi(app, scope, body: bytes) -> tuple[int, list[tuple[bytes, bytes]], bytes]:
-    async def receive():
-        return {"type": "http.request", "body": body, "more_body": False}
-    status, headers, chunks = 200, [], bytearray()
-    async def send(message):
-        nonlocal status, headers, chunks
-        if message["type"] == "http.response.start":
-            status = message.get("status", 200)
-            headers = message.get("headers", [])
-        elif message["type"] == "http.response.body":
-            chunks.extend(message.get("body", b""))
-    await app(scope, receive, send)
-    return status, headers, bytes(chunks)
+# Um único event loop por instância, partilhado por todos os pedidos
+_BRIDGE = AsgiBridge()
 
-# Lazy singletons para evitar timeouts no import
+def _respond(app, req: https_fn.Request) -> https_fn.Response:
+    scope = _build_scope(req)
+    body = req.get_data() or b""
+    status, headers, payload = _BRIDGE.run(app, scope, body)
+    # Lista de tuplos preserva cabeçalhos repetidos (ex.: set-cookie)
+    hdrs = [(k.decode(), v.decode()) for k, v in headers]
+    return https_fn.Response(response=payload, status=status, headers=hdrs)
+
+# Lazy singletons para evitar timeouts no import. Ambas as apps partilham o
+# mesmo contentor de serviços (adk.totem_fashion.services.get_services)
 @lru_cache(maxsize=1)
 def get_fastapi_app():
     from adk.totem_fashion.api.app import app as fastapi_app
@@ -69,19 +68,22 @@ def get_adk_app():
 
 @https_fn.on_request()
 def totem_api(req: https_fn.Request) -> https_fn.Response:
-    scope = _build_scope(req)
-    body = req.get_data() or b""
-    fastapi_app = get_fastapi_app()
-    status, headers, payload = asyncio.run(_run_asgi(fastapi_app, scope, body))
-    hdrs = {k.decode(): v.decode() for k, v in headers}
-    return https_fn.Response(response=payload, status=status, headers=hdrs)
+    with startup_profile.first_request("totem_api"), metrics.timer(metrics.FUNCTION_LATENCY, "totem_api"):
+        return _respond(get_fastapi_app(), req)
 
 @https_fn.on_request()
 def adk_webhook(req: https_fn.Request) -> https_fn.Response:
-    scope = _build_scope(req)
-    body = req.get_data() or b""
-    adk_app = get_adk_app()
-    status, headers, payload = asyncio.run(_run_asgi(adk_app, scope, body))
-    hdrs = {k.decode(): v.decode() for k, v in headers}
-    return https_fn.Response(response=payload, status=status, headers=hdrs)
+    with startup_profile.first_request("adk_webhook"), metrics.timer(metrics.FUNCTION_LATENCY, "adk_webhook"):
+        return _respond(get_adk_app(), req)
+
+def _warm_up() -> None:
+    from adk.totem_fashion.services import get_services
+    get_services().warm_up()
+    get_fastapi_app()
+    _BRIDGE.loop  # noqa: B018 - arranca o event loop partilhado
 
+# Aquece índices e estruturas derivadas do catálogo no arranque da instância,
+# em background. K_SERVICE só existe no runtime (não durante o deploy);
+# TOTEM_WARMUP=0/1 força o comportamento.
+if os.environ.get("TOTEM_WARMUP", "1" if os.environ.get("K_SERVICE") else "0") == "1":
+    threading.Thread(target=_warm_up, name="instance-warm-up", daemon=True).start()